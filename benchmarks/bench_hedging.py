@@ -0,0 +1,88 @@
+"""Benchmarks get_docset latency with and without hedging against a fake Aryn API with heavy-tailed latency
+
+Response times follow a Pareto distribution (alpha 1.5) with a median around 40 ms and a p99 around 350 ms, the
+shape where a few slow responses dominate the tail.
+
+Run with: python benchmarks/bench_hedging.py [--requests N] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+os.environ.setdefault("ARYN_API_KEY", "benchmark")
+os.environ["ARYN_MCP_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["ARYN_MCP_DOCSET_CACHE_TTL"] = "0"
+os.environ["ARYN_MCP_RATE_LIMIT"] = "0"
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager  # noqa: E402
+from aryn_mcp_server.utils.resilience import get_resilience, use_resilient_transport  # noqa: E402
+
+
+class HeavyTailedAPI:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self.lock:
+            self.requests += 1
+            latency = min(0.015 * (1 + self.rng.paretovariate(1.5)), 2.0)
+        time.sleep(latency)
+        return httpx.Response(
+            200,
+            json={
+                "account_id": "a",
+                "docset_id": request.url.path.rsplit("/", 1)[-1],
+                "name": "benchmark",
+                "created_at": "2025-01-01T00:00:00Z",
+                "readonly": False,
+            },
+        )
+
+
+def percentile(latencies: list[float], p: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)] * 1000
+
+
+def run(label: str, hedge: bool, requests: int, workers: int) -> None:
+    os.environ["ARYN_MCP_HEDGE"] = "true" if hedge else "false"
+    api = HeavyTailedAPI(seed=0)
+    manager = ArynDocSetManager()
+    use_resilient_transport(manager.client, get_resilience("Aryn API"), httpx.MockTransport(api))
+
+    def timed_get(i: int) -> float:
+        start = time.perf_counter()
+        manager.get_docset(f"ds-{i}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(timed_get, range(requests)))
+
+    print(
+        f"{label:<12} p50 {percentile(latencies, 50):6.1f} ms  p95 {percentile(latencies, 95):6.1f} ms  "
+        f"p99 {percentile(latencies, 99):6.1f} ms  max {max(latencies) * 1000:7.1f} ms  "
+        f"requests sent {api.requests / requests:.2f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    run("no hedging", False, args.requests, args.workers)
+    run("hedging", True, args.requests, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmarks building DocSet info for list_docsets on synthetic accounts with large schemas
+
+Run with: python benchmarks/bench_list_docsets.py [--docsets N] [--fields N]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from aryn_sdk.types.docset import DocSetMetadata
+
+os.environ.setdefault("ARYN_API_KEY", "benchmark")
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager  # noqa: E402
+
+
+def make_docsets(docset_count: int, field_count: int) -> list[DocSetMetadata]:
+    schema = {
+        "properties": [
+            {
+                "name": f"field_{i}",
+                "field_type": "str",
+                "description": f"The value of field {i}, which is described at some length",
+                "examples": [f"example {i}", f"another example {i}"],
+            }
+            for i in range(field_count)
+        ]
+    }
+    return [
+        DocSetMetadata(
+            account_id="account",
+            docset_id=f"aryn:ds-{i}",
+            name=f"docset {i}",
+            created_at="2025-01-01T00:00:00Z",
+            readonly=False,
+            size=i,
+            schema=schema,
+        )
+        for i in range(docset_count)
+    ]
+
+
+def eager_docset_info(docset_params, exclude_schema: bool) -> dict:
+    # The implementation _generate_docset_info used before DocSet info became lazy
+    docset_info = {
+        "docset_id": docset_params.docset_id,
+        "name": docset_params.name,
+        "readonly": docset_params.readonly,
+        "properties": docset_params.properties,
+        "schema": (
+            [vars(property) for property in docset_params.schema_.properties] if docset_params.schema_ else None
+        ),
+        "size": docset_params.size,
+    }
+    if exclude_schema:
+        docset_info.pop("schema")
+    return docset_info
+
+
+def measure(name: str, build, docsets: list[DocSetMetadata], repeat: int) -> None:
+    tracemalloc.start()
+    build(docsets)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build(docsets)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print(f"{name:<24} {elapsed * 1000:9.3f} ms/listing {peak / 1024:10.1f} KiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docsets", type=int, default=500)
+    parser.add_argument("--fields", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    docsets = make_docsets(args.docsets, args.fields)
+    manager = ArynDocSetManager()
+    print(f"{args.docsets} docsets with {args.fields} schema fields each")
+
+    measure("eager, schema excluded", lambda d: [eager_docset_info(p, True) for p in d], docsets, args.repeat)
+    measure(
+        "lazy, schema excluded",
+        lambda d: [manager._generate_docset_info(p, True, True) for p in d],
+        docsets,
+        args.repeat,
+    )
+    measure("eager, schema included", lambda d: [eager_docset_info(p, False) for p in d], docsets, args.repeat)
+    measure(
+        "lazy, schema included",
+        lambda d: [manager._generate_docset_info(p, True, False) for p in d],
+        docsets,
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmarks filtering and aggregating the local property store on a synthetic DocSet of contracts
+
+Run with: python benchmarks/bench_property_store.py [--documents N]
+"""
+
+import argparse
+import random
+import time
+
+from aryn_mcp_server.models import PropertiesFilterModel
+from aryn_mcp_server.utils.property_store import PropertySnapshot
+
+STATES = ["CA", "NY", "TX", "WA", "FL", "IL", "MA", "OR", "CO", "GA"]
+FIELD_TYPES = {"state": "str", "value": "float", "signed": "date", "renewals": "int"}
+
+
+def make_documents(document_count: int) -> list[tuple[str, dict]]:
+    rng = random.Random(0)
+    return [
+        (
+            f"doc-{i}",
+            {
+                "state": rng.choice(STATES),
+                "value": rng.lognormvariate(13, 1.5),
+                "signed": f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                "renewals": rng.randint(0, 5),
+            },
+        )
+        for i in range(document_count)
+    ]
+
+
+def timed(label: str, function, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    print(f"{label:<45} {(time.perf_counter() - start) / repeat * 1000:8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100_000)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents)
+    snapshot = timed("build snapshot", lambda: PropertySnapshot.build("ds", FIELD_TYPES, documents), repeat=1)
+
+    over_1m = [PropertiesFilterModel(property="value", operator=">", value="1000000", property_type="float")]
+    timed("filter value > 1M", lambda: snapshot.filter_mask(over_1m))
+    timed(
+        "count and sum of value > 1M per state",
+        lambda: snapshot.aggregate(over_1m, ["state"], [("count", None), ("sum", "value")]),
+    )
+    timed(
+        "avg value per state and renewals", lambda: snapshot.aggregate(None, ["state", "renewals"], [("avg", "value")])
+    )
+
+    # What the same question costs without the store: a pass over the documents in Python
+    def python_count():
+        counts: dict[str, int] = {}
+        for _, properties in documents:
+            if properties["value"] > 1_000_000:
+                counts[properties["state"]] = counts.get(properties["state"], 0) + 1
+        return counts
+
+    timed("count of value > 1M per state, plain Python", python_count)
+
+
+if __name__ == "__main__":
+    main()
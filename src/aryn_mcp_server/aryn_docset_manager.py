@@ -3,84 +3,238 @@ from aryn_sdk.client.client import SearchRequest
 
 from aryn_sdk.types.query import Query
 from aryn_sdk.types.schema import Schema, SchemaField
+from aryn_sdk.types.transforms import TransformResponse
+
+import time
+import httpx
+import uuid
+import threading
+from functools import partial
+from typing import Any, Callable, Literal, TypeVar
+from .utils.cache import (
+    QueryResultCache,
+    RefreshingCache,
+    TTLCache,
+    notify_docset_changed,
+    notify_docset_properties_changed,
+    on_docset_changed,
+    on_docset_properties_changed,
+)
+from .utils.utils import get_account_cache_dir, get_env_float, get_env_int
+from .utils.properties_filter import PropertiesFilter, compile_properties_filter
+from .utils.cancellation import (
+    CancellationToken,
+    current_cancellation,
+    phase,
+    propagate_cancellation,
+    use_cancellation,
+)
+from .utils.export import get_listed_document_properties, schema_column_types
+from .utils.hedging import get_hedger
+from .utils.jobs import Job, JobRegistry
+from .utils.ledger import ExtractionLedger, hash_schema_field
+from .utils.property_store import PropertyStore
+from .utils.rate_limit import GovernedTransport, get_governor
+from .utils.resilience import get_resilience, use_resilient_transport
+from .utils.single_flight import SingleFlight
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+T = TypeVar("T")
+
+
+class DocSetInfo:
+    """The metadata of a DocSet, with the schema only turned into dictionaries when it is asked for"""
+
+    __slots__ = ("docset_id", "name", "readonly", "properties", "size", "_schema_properties", "_schema")
+
+    def __init__(self, docset_params):
+        self.docset_id: str = docset_params.docset_id
+        self.name: str = docset_params.name
+        self.readonly: bool = docset_params.readonly
+        self.properties: dict | None = docset_params.properties
+        self.size: int | None = docset_params.size
+        self._schema_properties: list[SchemaField] | None = (
+            docset_params.schema_.properties if docset_params.schema_ else None
+        )
+        self._schema: list[dict] | None = None
+
+    @property
+    def schema(self) -> list[dict] | None:
+        if self._schema is None and self._schema_properties is not None:
+            self._schema = [vars(property) for property in self._schema_properties]
+        return self._schema
+
+    def as_dict(self, include_schema: bool = True) -> dict:
+        docset_info = {
+            "docset_id": self.docset_id,
+            "name": self.name,
+            "readonly": self.readonly,
+            "properties": self.properties,
+        }
+        if include_schema:
+            docset_info["schema"] = self.schema
+        docset_info["size"] = self.size
 
-from typing import Literal
-from .models import PropertiesFilterModel
+        return docset_info
 
-from collections import defaultdict
+
+class QueryResultBuilder:
+    """Assembles the result of a streamed DocSet query one event at a time"""
+
+    __slots__ = ("doc_id", "doc_ids", "summary_chunks", "summary_length", "no_results", "stop_reason")
+
+    def __init__(self):
+        self.doc_id: str | None = None
+        self.doc_ids: set[str] = set()
+        self.summary_chunks: list[str] = []
+        self.summary_length = 0
+        self.no_results = False
+        self.stop_reason: str | None = None
+
+    def add_event(self, event) -> str | None:
+        """Adds an event and returns the text worth forwarding to the caller, if any"""
+        if event.event_type == "trace_doc":
+            doc_id = event.data.doc["doc_id"]
+            self.doc_id = doc_id
+            self.doc_ids.add(doc_id)
+            return doc_id
+        elif event.event_type == "result_summary":
+            self.summary_chunks.append(event.data)
+            self.summary_length += len(event.data)
+            return event.data
+        elif event.event_type == "complete" and event.data[-9:] == "0 results":
+            self.no_results = True
+        return None
+
+    def check_limits(
+        self,
+        max_docs: int | None = None,
+        max_summary_chars: int | None = None,
+        cancellation: CancellationToken | None = None,
+    ) -> bool:
+        """Returns whether the query should stop, recording why"""
+        if max_docs is not None and len(self.doc_ids) >= max_docs:
+            self.stop_reason = f"found {max_docs} documents"
+        elif max_summary_chars is not None and self.summary_length >= max_summary_chars:
+            self.stop_reason = f"summary reached {max_summary_chars} characters"
+        elif cancellation is not None and cancellation.cancelled:
+            self.stop_reason = cancellation.reason
+        return self.stop_reason is not None
+
+    def result(self, max_summary_chars: int | None = None) -> dict:
+        if self.no_results:
+            return {"summary": "No results found", "doc_id": "No results found"}
+
+        query_result_data: dict = {}
+        if self.doc_id is not None:
+            query_result_data["doc_id"] = self.doc_id
+        if self.summary_chunks:
+            query_result_data["summary"] = "".join(self.summary_chunks)[:max_summary_chars]
+        if self.stop_reason is not None:
+            query_result_data["stopped_early"] = self.stop_reason
+        return query_result_data
 
 
 class ArynDocSetManager:
+    max_fan_out_workers = 16
+    # How long query_docsets waits for the queries it stopped to return what they found
+    stopped_query_grace_seconds = 2.0
+
     def __init__(self, aryn_api_key: str | None = None, aryn_url: str = "https://api.aryn.ai"):
         if aryn_api_key and aryn_url:
             self.client = Client(aryn_api_key=aryn_api_key, aryn_url=aryn_url)
         else:
             self.client = Client()
-
-    def _parse_through_schema(self, schema: list[SchemaField]):
-        properties_list = [vars(property) for property in schema]
-        return properties_list
+        cache_dir = get_account_cache_dir(self.client.config.api_key(), self.client.config.aryn_url())
+
+        self.governor = get_governor()
+        self.resilience = get_resilience("Aryn API")
+        use_resilient_transport(self.client, self.resilience, GovernedTransport(self.governor, httpx.HTTPTransport()))
+
+        self.search_cache = TTLCache(
+            ttl_seconds=get_env_float("ARYN_MCP_SEARCH_CACHE_TTL", 60.0),
+            max_entries=get_env_int("ARYN_MCP_SEARCH_CACHE_SIZE", 512),
+        )
+        on_docset_changed(self.search_cache.invalidate_docset)
+
+        self.query_cache = QueryResultCache(
+            path=cache_dir / "query_results.sqlite3",
+            max_staleness_seconds=get_env_float("ARYN_MCP_QUERY_CACHE_MAX_STALENESS", 3600.0),
+        )
+        on_docset_changed(self.query_cache.invalidate_docset)
+
+        self.docset_cache = RefreshingCache(
+            fresh_seconds=get_env_float("ARYN_MCP_DOCSET_CACHE_TTL", 30.0),
+            max_stale_seconds=get_env_float("ARYN_MCP_DOCSET_CACHE_MAX_STALENESS", 300.0),
+        )
+        on_docset_changed(self.docset_cache.invalidate)
+
+        self.single_flight = SingleFlight()
+        on_docset_changed(self.single_flight.forget_docset)
+        self.hedger = get_hedger()
+
+        self.jobs = JobRegistry()
+        self.extraction_ledger = ExtractionLedger(cache_dir / "extraction_ledger.sqlite3")
+
+        self.property_store = PropertyStore(
+            list_documents=lambda docset_id: self.client.list_docs(docset_id=docset_id),
+            get_properties=self._get_listed_document_properties,
+            max_workers=self.max_fan_out_workers,
+        )
+        on_docset_changed(self.property_store.mark_changed)
+        on_docset_properties_changed(self.property_store.mark_properties_changed)
+
+    def _hedged(self, operation: str, read: Callable[[], T]) -> T:
+        return self.hedger.call(operation, read) if self.hedger is not None else read()
 
     def _generate_docset_info(self, docset, listing: bool = False, exclude_schema: bool = False) -> dict:
         docset_params = docset
         if not listing:
             docset_params = docset.value
 
-        docset_info = {
-            "docset_id": docset_params.docset_id,
-            "name": docset_params.name,
-            "readonly": docset_params.readonly,
-            "properties": docset_params.properties,
-            "schema": (self._parse_through_schema(docset_params.schema_.properties) if docset_params.schema_ else None),
-            "size": docset_params.size,
-        }
+        return DocSetInfo(docset_params).as_dict(include_schema=not exclude_schema)
 
-        if exclude_schema:
-            docset_info.pop("schema")
-
-        return docset_info
-
-    def _generate_properties_filter_string(self, properties_filter: list[PropertiesFilterModel]):
-        properties_filter_string = ""
-        for filter in properties_filter:
-            if filter.property_type == "str" or filter.property_type == "bool":
-                properties_filter_string += (
-                    f"""(properties.entity."{filter.property}"{filter.operator}"{filter.value}") AND """
-                )
-            elif filter.property_type == "int":
-                properties_filter_string += (
-                    f"""(properties.entity."{filter.property}"{filter.operator}{filter.value}) AND """
-                )
-
-        properties_filter_string = properties_filter_string[:-5]
-
-        return properties_filter_string
+    def _generate_properties_filter_string(self, properties_filter: PropertiesFilter):
+        return compile_properties_filter(properties_filter)
 
     def create_docset(self, name: str, schema: Schema | None) -> dict:
         try:
             docset = self.client.create_docset(name=name, schema=schema)
             created_docset_info = self._generate_docset_info(docset)
+            notify_docset_changed(created_docset_info["docset_id"])
 
             return created_docset_info
 
         except Exception as e:
             raise Exception(f"Failed to create docset {name}: {str(e)}") from e
 
-    def get_docset(self, docset_id: str, exclude_schema: bool = False) -> dict | None:
+    def _load_docset_info(self, docset_id: str) -> DocSetInfo | None:
         try:
-            docset = self.client.get_docset(docset_id=docset_id)
-            docset_info = self._generate_docset_info(docset, exclude_schema=exclude_schema)
-
-            return docset_info
+            with phase(f"getting docset {docset_id}"):
+                docset = self._hedged("get_docset", partial(self.client.get_docset, docset_id=docset_id))
+            return DocSetInfo(docset.value)
 
         except Exception as e:
             if "404" in str(e) or "not found" in str(e).lower():
                 return None
             raise Exception(f"Failed to get docset {docset_id}: {str(e)}") from e
 
+    def get_docset(self, docset_id: str, exclude_schema: bool = False) -> dict | None:
+        docset_info = self.docset_cache.get_or_load(
+            docset_id,
+            lambda: self.single_flight.do(("get_docset", docset_id), partial(self._load_docset_info, docset_id))[0],
+        )
+        if docset_info is None:
+            return None
+
+        return docset_info.as_dict(include_schema=not exclude_schema)
+
     def delete_docset(self, docset_id: str) -> dict:
         try:
             docset = self.client.delete_docset(docset_id=docset_id)
+            notify_docset_changed(docset_id)
+            self.extraction_ledger.forget_docset(docset_id)
             deleted_docset_info = self._generate_docset_info(docset)
 
             return deleted_docset_info
@@ -92,12 +246,8 @@ class ArynDocSetManager:
 
     def list_docsets(self, page_size: int, name_eq: str | None = None, page_token: str | None = None) -> list[dict]:
         try:
-            if name_eq:
-                docsets = self.client.list_docsets(
-                    page_size=page_size, name_eq=name_eq, page_token=page_token
-                ).get_all()
-            else:
-                docsets = self.client.list_docsets(page_size=page_size).get_all()
+            with phase("listing docsets"):
+                docsets = self._list_docsets(page_size, name_eq, page_token)
 
             docsets_info = [self._generate_docset_info(d, True, True) for d in docsets]
             return docsets_info
@@ -105,6 +255,14 @@ class ArynDocSetManager:
         except Exception as e:
             raise Exception(f"Failed to list docsets: {str(e)}") from e
 
+    def _list_docsets(self, page_size: int, name_eq: str | None, page_token: str | None) -> list:
+        if name_eq:
+            return self._hedged(
+                "list_docsets",
+                lambda: self.client.list_docsets(page_size=page_size, name_eq=name_eq, page_token=page_token).get_all(),
+            )
+        return self._hedged("list_docsets", lambda: self.client.list_docsets(page_size=page_size).get_all())
+
     def extract_properties(self, docset_id: str, properties_to_extract: Schema) -> dict:
         try:
             # NOTE: Extracting a property from an empty docset will do nothing, pending fix from Aryn
@@ -112,7 +270,13 @@ class ArynDocSetManager:
             if not docset_info or docset_info["size"] is None or docset_info["size"] == 0:
                 raise Exception(f"Docset {docset_id} is empty, cannot extract properties")
 
-            result = self.client.extract_properties(docset_id=docset_id, schema=properties_to_extract)
+            try:
+                result = self.client.extract_properties(docset_id=docset_id, schema=properties_to_extract)
+            finally:
+                # A failed job may still have written properties to some documents. Which documents now hold which
+                # version of the fields is unknown, so the next incremental extraction checks them again.
+                self.extraction_ledger.forget_fields(docset_id, [p.name for p in properties_to_extract.fields])
+                notify_docset_properties_changed(docset_id)
             result = result.value
 
             if result.exit_status == 0:
@@ -129,7 +293,11 @@ class ArynDocSetManager:
     def delete_properties(self, docset_id: str, properties_to_delete: list[str]) -> dict:
 
         try:
-            result = self.client.delete_properties(docset_id=docset_id, property_names=properties_to_delete)
+            try:
+                result = self.client.delete_properties(docset_id=docset_id, property_names=properties_to_delete)
+            finally:
+                self.extraction_ledger.forget_fields(docset_id, properties_to_delete)
+                notify_docset_properties_changed(docset_id)
 
             result = result.value
 
@@ -143,13 +311,215 @@ class ArynDocSetManager:
         except Exception as e:
             raise Exception(f"Failed to delete properties for docset {docset_id}: {str(e)}") from e
 
+    def _check_transform_task(self, task) -> TransformResponse | None:
+        result = self.client.get_async_result(task)
+        if result.status_code == 202:
+            return None
+
+        result = TransformResponse.model_validate(result.value)
+        if result.exit_status != 0:
+            raise Exception(f"Exit status: {result.exit_status}")
+        return result
+
+    def _get_listed_document_properties(self, docset_id: str, doc) -> dict:
+        return get_listed_document_properties(
+            doc,
+            lambda doc_id: self.client.get_doc(
+                docset_id=docset_id, doc_id=doc_id, include_elements=False
+            ).value.properties,
+        )
+
+    def _plan_incremental_extraction(
+        self, docset_id: str, properties_to_extract: Schema
+    ) -> tuple[list[tuple[str, str]], dict[str, set[str]]]:
+        """Returns every (doc_id, created_at) of a DocSet and the fields each document is still missing
+
+        A field is up to date for a document if the ledger recorded extracting the same field definition for the same
+        version of the document. Fields the ledger knows nothing about count as up to date if the document already has
+        them, e.g. because they were extracted before incremental extraction was used.
+        """
+        field_hashes = {field.name: hash_schema_field(field) for field in properties_to_extract.fields}
+        ledger = self.extraction_ledger.get_docset(docset_id)
+
+        documents = []
+        missing_fields: dict[str, set[str]] = {}
+        unrecorded: list[tuple[object, list[str]]] = []
+        for doc in self.client.list_docs(docset_id=docset_id):
+            documents.append((doc.doc_id, doc.created_at))
+            unrecorded_fields = []
+            for field_name, field_hash in field_hashes.items():
+                recorded = ledger.get((doc.doc_id, field_name))
+                if recorded is None:
+                    unrecorded_fields.append(field_name)
+                elif recorded != (field_hash, doc.created_at):
+                    missing_fields.setdefault(doc.doc_id, set()).add(field_name)
+            if unrecorded_fields:
+                unrecorded.append((doc, unrecorded_fields))
+
+        if unrecorded:
+            with ThreadPoolExecutor(max_workers=self.max_fan_out_workers) as executor:
+                entities = executor.map(
+                    propagate_cancellation(lambda item: self._get_listed_document_properties(docset_id, item[0])),
+                    unrecorded,
+                )
+                for (doc, unrecorded_fields), entity in zip(unrecorded, entities):
+                    absent_fields = {field_name for field_name in unrecorded_fields if field_name not in entity}
+                    if absent_fields:
+                        missing_fields.setdefault(doc.doc_id, set()).update(absent_fields)
+                    present_fields = {f: field_hashes[f] for f in unrecorded_fields if f not in absent_fields}
+                    if present_fields:
+                        self.extraction_ledger.record(docset_id, [(doc.doc_id, doc.created_at)], present_fields)
+
+        return documents, missing_fields
+
+    def submit_extract_properties(
+        self, docset_id: str, properties_to_extract: Schema, incremental: bool = False
+    ) -> Job:
+        try:
+            # NOTE: Extracting a property from an empty docset will do nothing, pending fix from Aryn
+            docset_info = self.get_docset(docset_id)
+            if not docset_info or docset_info["size"] is None or docset_info["size"] == 0:
+                raise Exception(f"Docset {docset_id} is empty, cannot extract properties")
+
+            result: dict[str, Any] = {
+                "docset_id": docset_id,
+                "extracted_properties": [p.name for p in properties_to_extract.fields],
+            }
+
+            documents, missing_fields = None, None
+            if incremental:
+                with phase(f"listing the documents of docset {docset_id}"):
+                    documents, missing_fields = self._plan_incremental_extraction(docset_id, properties_to_extract)
+                fields_to_extract = set().union(*missing_fields.values())
+                result = {
+                    "docset_id": docset_id,
+                    "extracted_properties": [
+                        p.name for p in properties_to_extract.fields if p.name in fields_to_extract
+                    ],
+                    "documents_missing_properties": len(missing_fields),
+                    "documents_up_to_date": len(documents) - len(missing_fields),
+                }
+
+                if not fields_to_extract:
+                    job = self.jobs.submit(Job(f"noop-{uuid.uuid4()}", "extract_properties", docset_id, lambda: result))
+                    return self.jobs.poll(job.job_id)
+
+                # The extraction API works on whole DocSets, so the job is narrowed to the fields that are missing
+                properties_to_extract = type(properties_to_extract)(
+                    fields=[p for p in properties_to_extract.fields if p.name in fields_to_extract]
+                )
+
+            field_hashes = {field.name: hash_schema_field(field) for field in properties_to_extract.fields}
+            task = self.client.extract_properties_async(docset_id=docset_id, schema=properties_to_extract)
+
+            def check():
+                if self._check_transform_task(task) is None:
+                    return None
+                if documents is not None:
+                    self.extraction_ledger.record(docset_id, documents, field_hashes)
+                return result
+
+            # A failed job may still have written properties to some documents
+            job = Job(
+                task.task_id,
+                "extract_properties",
+                docset_id,
+                check,
+                lambda _: notify_docset_properties_changed(docset_id),
+            )
+            return self.jobs.submit(job)
+
+        except Exception as e:
+            raise Exception(f"Failed to extract properties for docset {docset_id}: {str(e)}") from e
+
+    def submit_delete_properties(self, docset_id: str, properties_to_delete: list[str]) -> Job:
+        try:
+            task = self.client.delete_properties_async(docset_id=docset_id, property_names=properties_to_delete)
+
+            def check():
+                if self._check_transform_task(task) is None:
+                    return None
+                self.extraction_ledger.forget_fields(docset_id, properties_to_delete)
+                return {"docset_id": docset_id, "deleted_properties": properties_to_delete}
+
+            job = Job(
+                task.task_id,
+                "delete_properties",
+                docset_id,
+                check,
+                lambda _: notify_docset_properties_changed(docset_id),
+            )
+            return self.jobs.submit(job)
+
+        except Exception as e:
+            raise Exception(f"Failed to delete properties for docset {docset_id}: {str(e)}") from e
+
+    def _get_property_field_types(self, docset_id: str) -> dict[str, str]:
+        docset_info = self.get_docset(docset_id)
+        if docset_info is None:
+            raise Exception(f"Docset {docset_id} not found")
+        return schema_column_types(docset_info["schema"])
+
+    def sync_properties(self, docset_id: str, full_refresh: bool = False) -> dict:
+        try:
+            return self.property_store.refresh(docset_id, self._get_property_field_types(docset_id), full_refresh)
+        except Exception as e:
+            raise Exception(f"Failed to sync properties of docset {docset_id}: {str(e)}") from e
+
+    def _get_property_snapshot(self, docset_id: str):
+        snapshot = self.property_store.get(docset_id)
+        if snapshot is None:
+            raise Exception(
+                f"Docset {docset_id} has no local properties yet, sync them with sync_aryn_docset_properties"
+            )
+        return snapshot
+
+    def filter_properties(self, docset_id: str, properties_filter: PropertiesFilter, limit: int) -> dict:
+        try:
+            start = time.perf_counter()
+            snapshot = self._get_property_snapshot(docset_id)
+            matched = snapshot.doc_ids[snapshot.filter_mask(properties_filter)]
+
+            return {
+                "docset_id": docset_id,
+                "matched_documents": len(matched),
+                "doc_ids": matched[:limit].tolist(),
+                "snapshot_at": snapshot.refreshed_at.isoformat(),
+                "stale": self.property_store.is_stale(docset_id),
+                "query_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+        except Exception as e:
+            raise Exception(f"Failed to filter properties of docset {docset_id}: {str(e)}") from e
+
+    def aggregate_properties(
+        self,
+        docset_id: str,
+        properties_filter: PropertiesFilter | None,
+        group_by: list[str],
+        aggregations: list[tuple[str, str | None]],
+    ) -> dict:
+        try:
+            start = time.perf_counter()
+            snapshot = self._get_property_snapshot(docset_id)
+            groups = snapshot.aggregate(properties_filter, group_by, aggregations)
+
+            return {
+                "docset_id": docset_id,
+                "groups": groups,
+                "snapshot_at": snapshot.refreshed_at.isoformat(),
+                "stale": self.property_store.is_stale(docset_id),
+                "query_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+        except Exception as e:
+            raise Exception(f"Failed to aggregate properties of docset {docset_id}: {str(e)}") from e
+
     def search(
         self,
         docset_id: str,
         query_or_properties_filter: Literal["query", "properties_filter"],
         query: str | None,
         query_type: Literal["keyword", "vector", "lexical", "hybrid"] | None,
-        properties_filter: list[PropertiesFilterModel] | None,
+        properties_filter: PropertiesFilter | None,
         page_size: int,
         return_type: Literal["doc", "element"],
         page_token: str | None,
@@ -159,40 +529,171 @@ class ArynDocSetManager:
         if properties_filter is not None:
             properties_filter_string = self._generate_properties_filter_string(properties_filter=properties_filter)
 
+        # Only the inputs the selected search mode actually sends to the server are part of the cache key
+        search_criteria: tuple[str | None, ...]
+        if query_or_properties_filter == "query":
+            search_criteria = ("query", query.strip() if query else query, query_type)
+        else:
+            search_criteria = ("properties_filter", properties_filter_string)
+        cache_key = (docset_id, search_criteria, page_size, return_type, page_token)
+        cached_search_result = self.search_cache.get(cache_key)
+        if cached_search_result is not None:
+            return cached_search_result
+
         try:
             if query_or_properties_filter == "query":
-                search_result = self.client.search(
-                    docset_id=docset_id,
-                    query=SearchRequest(
-                        query=query,
-                        query_type=query_type,
-                        include_fields=["doc_id"],
-                        return_type=return_type,
-                    ),
-                    page_size=page_size,
+                search_request = SearchRequest(
+                    query=query,
+                    query_type=query_type,
+                    include_fields=["doc_id"],
+                    return_type=return_type,
                 )
             elif query_or_properties_filter == "properties_filter":
-                search_result = self.client.search(
-                    docset_id=docset_id,
-                    query=SearchRequest(
-                        properties_filter=properties_filter_string,
-                        include_fields=["doc_id"],
-                        return_type=return_type,
-                    ),
-                    page_size=page_size,
+                search_request = SearchRequest(
+                    properties_filter=properties_filter_string,
+                    include_fields=["doc_id"],
+                    return_type=return_type,
                 )
 
+            with phase(f"searching docset {docset_id}"):
+                search_result = self._hedged(
+                    "search",
+                    partial(self.client.search, docset_id=docset_id, query=search_request, page_size=page_size),
+                )
             search_result = search_result.value
 
-            return {
+            search_result_info = {
                 "results": search_result.results,
                 "next_page_token": search_result.next_page_token,
             }
+            self.search_cache.put(cache_key, search_result_info, docset_id=docset_id)
+
+            return search_result_info
         except Exception as e:
             raise Exception(f"Failed to search docset {docset_id}: {str(e)}") from e
 
-    def query(self, docset_id: str, query: str, summarize_result: bool):
+    def _merge_search_results(self, docset_ids: list[str], search_results: dict[str, dict]) -> list[dict]:
+        # Results are ranked by score when every result carries one, otherwise by their rank within their own
+        # DocSet. Ties keep the order the DocSets were given in, so the merge is stable across calls.
+        ranked_results: list[tuple[int, int, dict]] = []
+        for docset_index, docset_id in enumerate(docset_ids):
+            if docset_id not in search_results:
+                continue
+            for rank, result in enumerate(search_results[docset_id]["results"]):
+                ranked_results.append((rank, docset_index, {**result, "docset_id": docset_id}))
+
+        scores = [result.get("score", result.get("_score")) for _, _, result in ranked_results]
+        sort_keys: list[tuple[float, ...]]
+        if scores and all(isinstance(score, (int, float)) for score in scores):
+            sort_keys = [(-score, docset_index, rank) for score, (rank, docset_index, _) in zip(scores, ranked_results)]
+        else:
+            sort_keys = [(rank, docset_index) for rank, docset_index, _ in ranked_results]
+        ordered_results = [result for _, (*_, result) in sorted(zip(sort_keys, ranked_results), key=lambda x: x[0])]
+
+        merged_results = []
+        seen_results = set()
+        for result in ordered_results:
+            # A document or element found in several DocSets is kept once, at its best rank
+            result_key = self._search_result_key(result)
+            if result_key is not None:
+                if result_key in seen_results:
+                    continue
+                seen_results.add(result_key)
+            merged_results.append(result)
+
+        return merged_results
+
+    @staticmethod
+    def _search_result_key(result: dict) -> tuple[str, str | None] | None:
+        # Document results only carry a doc_id, element results an element_id as well. Results with neither
+        # cannot be told apart, so they are all kept.
+        if result.get("doc_id") is None:
+            return None
+        return result["doc_id"], result.get("element_id")
+
+    def search_docsets(
+        self,
+        docset_ids: list[str],
+        query_or_properties_filter: Literal["query", "properties_filter"],
+        query: str | None,
+        query_type: Literal["keyword", "vector", "lexical", "hybrid"] | None,
+        properties_filter: PropertiesFilter | None,
+        page_size: int,
+        return_type: Literal["doc", "element"],
+        timeout_seconds: float,
+    ) -> dict:
+        docset_ids = list(dict.fromkeys(docset_ids))
+
+        executor = ThreadPoolExecutor(max_workers=min(len(docset_ids), self.max_fan_out_workers))
+        try:
+            futures = {
+                executor.submit(
+                    propagate_cancellation(self.search),
+                    docset_id=docset_id,
+                    query_or_properties_filter=query_or_properties_filter,
+                    query=query,
+                    query_type=query_type,
+                    properties_filter=properties_filter,
+                    page_size=page_size,
+                    return_type=return_type,
+                    page_token=None,
+                ): docset_id
+                for docset_id in docset_ids
+            }
+            done, not_done = wait(futures, timeout=timeout_seconds)
+        finally:
+            # Searches that missed the deadline are abandoned rather than waited on
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        timed_out_docset_ids = {futures[future] for future in not_done}
+        search_results = {}
+        errors = {}
+        for future in done:
+            docset_id = futures[future]
+            try:
+                search_results[docset_id] = future.result()
+            except Exception as e:
+                errors[docset_id] = str(e)
+
+        if not search_results and errors:
+            raise Exception(f"Failed to search docsets: {errors}")
+
+        return {
+            "results": self._merge_search_results(docset_ids, search_results),
+            "next_page_tokens": {
+                docset_id: search_results[docset_id]["next_page_token"]
+                for docset_id in docset_ids
+                if docset_id in search_results
+            },
+            "timed_out_docset_ids": [docset_id for docset_id in docset_ids if docset_id in timed_out_docset_ids],
+            "errors": errors,
+        }
 
+    def query(
+        self,
+        docset_id: str,
+        query: str,
+        summarize_result: bool,
+        on_event: Callable[[str, str], None] | None = None,
+        max_docs: int | None = None,
+        max_summary_chars: int | None = None,
+        cancellation: CancellationToken | None = None,
+        max_staleness_seconds: float | None = None,
+    ):
+
+        # A cached result holds the last document of the full query, which is not what max_docs asks for
+        if max_docs is None:
+            cached_query_result = self.query_cache.get(docset_id, query, summarize_result, max_staleness_seconds)
+            if cached_query_result is not None:
+                if on_event is not None:
+                    for event_type, key in (("trace_doc", "doc_id"), ("result_summary", "summary")):
+                        if key in cached_query_result:
+                            on_event(event_type, cached_query_result[key])
+                if "summary" in cached_query_result:
+                    cached_query_result["summary"] = cached_query_result["summary"][:max_summary_chars]
+                return cached_query_result
+
+        cancellation = cancellation or current_cancellation()
         try:
             query_result = self.client.query(
                 query=Query(
@@ -203,16 +704,109 @@ class ArynDocSetManager:
                 )
             )
 
-            query_result_data = defaultdict(str)
-            for event in query_result:
-                if event.event_type == "trace_doc":
-                    query_result_data["doc_id"] = event.data.doc["doc_id"]
-                elif event.event_type == "result_summary":
-                    query_result_data["summary"] += event.data
-                elif event.event_type == "complete" and event.data[-9:] == "0 results":
-                    query_result_data["summary"] = "No results found"
-                    query_result_data["doc_id"] = "No results found"
-
-            return dict(query_result_data)
+            query_result_builder = QueryResultBuilder()
+            # The stream is lazy: the request is sent and every event read while iterating it
+            with use_cancellation(cancellation), phase(f"waiting for query results from docset {docset_id}"):
+                try:
+                    for event in query_result:
+                        event_data = query_result_builder.add_event(event)
+                        if on_event is not None and event_data is not None:
+                            on_event(event.event_type.value, event_data)
+                        if query_result_builder.check_limits(max_docs, max_summary_chars, cancellation):
+                            break
+                except httpx.TransportError:
+                    # The stream's reads time out when the deadline passes, and its connection is shut down when the
+                    # query is cancelled, which ends the query with what it found
+                    if not query_result_builder.check_limits(cancellation=cancellation):
+                        raise
+                finally:
+                    # Closing the generator closes the underlying event stream, so an abandoned query stops
+                    # holding a connection
+                    query_result.close()
+
+            query_result_data = query_result_builder.result(max_summary_chars)
+            if query_result_builder.stop_reason is None:
+                self.query_cache.put(docset_id, query, summarize_result, query_result_data)
+
+            return query_result_data
         except Exception as e:
             raise Exception(f"Failed to query docset {docset_id}: {str(e)}") from e
+
+    def query_docsets(
+        self,
+        docset_ids: list[str],
+        query: str,
+        summarize_result: bool,
+        cancellation: CancellationToken,
+        on_event: Callable[[str, str, str], None] | None = None,
+    ) -> dict:
+        docset_ids = list(dict.fromkeys(docset_ids))
+
+        # Documents from all DocSets are merged in the order their trace events arrive
+        doc_ids: list[dict] = []
+        doc_ids_lock = threading.Lock()
+
+        def on_docset_event(docset_id: str, event_type: str, data: str):
+            if event_type == "trace_doc":
+                with doc_ids_lock:
+                    doc_ids.append({"docset_id": docset_id, "doc_id": data})
+            if on_event is not None:
+                on_event(docset_id, event_type, data)
+
+        executor = ThreadPoolExecutor(max_workers=min(len(docset_ids), self.max_fan_out_workers))
+        futures: dict[Future, str] = {}
+        stop_reason = "stopped because another query could not be started"
+        try:
+            futures = {
+                executor.submit(
+                    propagate_cancellation(self.query),
+                    docset_id=docset_id,
+                    query=query,
+                    summarize_result=summarize_result,
+                    on_event=partial(on_docset_event, docset_id),
+                    cancellation=cancellation,
+                ): docset_id
+                for docset_id in docset_ids
+            }
+            done, not_done = wait(futures, timeout=cancellation.remaining())
+            stop_reason = "deadline exceeded"
+        finally:
+            if not all(future.done() for future in futures):
+                # Queries still running see the cancelled token at their next event and close their streams. A
+                # token the client already cancelled keeps its own reason.
+                cancellation.cancel(stop_reason)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not_done:
+            # Cancelled queries stop at their next event, or at once if they are waiting for one, and return what
+            # they found so far
+            stopped, not_done = wait(not_done, timeout=self.stopped_query_grace_seconds)
+            done |= stopped
+
+        timed_out_docset_ids = {futures[future] for future in not_done}
+        query_results = {}
+        errors = {}
+        for future in done:
+            docset_id = futures[future]
+            try:
+                query_results[docset_id] = future.result()
+            except Exception as e:
+                errors[docset_id] = str(e)
+
+        if not query_results and errors:
+            raise Exception(f"Failed to query docsets: {errors}")
+
+        with doc_ids_lock:
+            merged_doc_ids = list({(d["docset_id"], d["doc_id"]): d for d in doc_ids}.values())
+
+        return {
+            "results": {docset_id: query_results[docset_id] for docset_id in docset_ids if docset_id in query_results},
+            "doc_ids": merged_doc_ids,
+            "partial_docset_ids": [
+                docset_id
+                for docset_id in docset_ids
+                if docset_id in query_results and "stopped_early" in query_results[docset_id]
+            ],
+            "timed_out_docset_ids": [docset_id for docset_id in docset_ids if docset_id in timed_out_docset_ids],
+            "errors": errors,
+        }
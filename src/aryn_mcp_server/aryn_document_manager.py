@@ -1,15 +1,77 @@
+import json
+import time
+import httpx
+import shutil
+import tempfile
+
 from os import PathLike
+from pathlib import Path
+from functools import partial
+from itertools import islice
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterator, Literal
+from concurrent.futures import ThreadPoolExecutor
 from .models import PartitionModel
+from .utils.cancellation import (
+    CancellableFile,
+    CancellationFlag,
+    check_cancellation,
+    current_cancellation,
+    phase,
+    propagate_cancellation,
+)
+from .utils.cache import notify_docset_changed, on_docset_changed, on_docset_properties_changed
+from .utils.export import (
+    CSVPropertiesWriter,
+    ParquetPropertiesWriter,
+    PropertiesWriter,
+    get_listed_document_properties,
+    require_pyarrow,
+)
+from .utils.hedging import get_hedger
+from .utils.mirror import DocSetMirror
+from .utils.progress import partition_status
+from .utils.rate_limit import GovernedTransport, get_governor
+from .utils.resilience import get_resilience, get_retry_after, get_status_code, use_resilient_transport
+from .utils.single_flight import SingleFlight, hash_file
+from .utils.text_index import ElementTextIndex
+from .utils.utils import get_account_cache_dir, get_env_bool, get_env_float
 
 from aryn_sdk.client import Client
+from aryn_sdk.partition import partition_file
+
+# Receives a progress message, and optionally how far along the work is out of a total
+ProgressCallback = Callable[[str, float | None, float | None], None]
 
 
 class ArynDocumentManager:
+    max_export_workers = 8
+    max_sync_workers = 8
+
     def __init__(self, aryn_api_key: str | None = None, aryn_url: str = "https://api.aryn.ai"):
         if aryn_api_key and aryn_url:
             self.client = Client(aryn_api_key=aryn_api_key, aryn_url=aryn_url)
         else:
             self.client = Client()
+        cache_dir = get_account_cache_dir(self.client.config.api_key(), self.client.config.aryn_url())
+
+        self.governor = get_governor()
+        self.resilience = get_resilience("Aryn API")
+        use_resilient_transport(self.client, self.resilience, GovernedTransport(self.governor, httpx.HTTPTransport()))
+        self.partition_resilience = get_resilience("Aryn partitioning service")
+
+        self.single_flight = SingleFlight()
+        on_docset_changed(self.single_flight.forget_docset)
+        self.hedger = get_hedger()
+
+        self.text_index: ElementTextIndex | None = None
+        if get_env_bool("ARYN_MCP_LOCAL_INDEX", False):
+            self.text_index = ElementTextIndex(cache_dir / "element_text_index.sqlite3")
+
+        self.mirror = DocSetMirror(
+            cache_dir / "docset_mirror.sqlite3", get_env_float("ARYN_MCP_MIRROR_MAX_STALENESS", 3600)
+        )
+        on_docset_properties_changed(self.mirror.mark_properties_changed)
 
     def _create_doc_info(self, doc, listing: bool = False) -> dict:
         doc_params = doc
@@ -67,54 +129,191 @@ class ArynDocumentManager:
         }
         return partition_options
 
-    def add_document(self, file: str | PathLike, docset_id: str, options: PartitionModel):
+    @contextmanager
+    def _open_upload(self, file, on_progress: ProgressCallback | None = None) -> Iterator:
+        """Opens a local file to upload so that the upload stops once the tool call is cancelled, reporting every 5%
+        sent. Anything else, e.g. a URL, is passed to the SDK as is."""
+        if not (isinstance(file, (str, PathLike)) and Path(file).is_file()):
+            yield file
+            return
+
+        on_read = None
+        if on_progress is not None:
+            on_read = self._upload_progress(file, Path(file).stat().st_size, on_progress)
+
+        with open(file, "rb") as f:
+            yield CancellableFile(f, current_cancellation(), on_read)
+
+    @staticmethod
+    def _upload_progress(file, size: int, on_progress: ProgressCallback) -> Callable[[int], None]:
+        """Returns a callback for the positions read from an upload that reports every 5% sent"""
+        step = max(size // 20, 1)
+        last_step = -1
+
+        def on_read(position: int) -> None:
+            nonlocal last_step
+            # Retries read the file again from the start
+            if position // step != last_step:
+                last_step = position // step
+                on_progress(f"Uploaded {position / 2**20:.1f} of {size / 2**20:.1f} MiB of {file}", position, size)
+
+        return on_read
+
+    def _report_partition_status(self, on_progress: ProgressCallback | None):
+        if on_progress is None:
+            return nullcontext()
+        return partition_status.listen(lambda status: on_progress(f"Partitioning: {status}", None, None))
+
+    def partition_file(self, file, options: PartitionModel, on_progress: ProgressCallback | None = None) -> dict:
+        """Partitions a file, retrying transient failures. A partition that also adds the file to a DocSet is only
+        retried when the service did not receive it and never shares a call, so the document is added exactly once.
+
+        The SDK polls the current tool call's token between the chunks of the response, so a partition stops when the
+        call runs out of time. It cannot shorten the SDK's own 500 second read timeout. on_progress is told how much
+        of the file was uploaded and gets the status lines, e.g. pages completed, that the service streams."""
+
+        def partition():
+            if hasattr(file, "seek"):
+                file.seek(0)
+            with (
+                self.governor.slot("partition"),
+                self._open_upload(file, on_progress) as upload,
+                self._report_partition_status(on_progress),
+            ):
+                try:
+                    result = partition_file(
+                        upload,
+                        **self._create_partition_options(options),
+                        output_format=options.output_format,
+                        add_to_docset_id=options.add_to_docset_id,
+                        cancel_flag=CancellationFlag(current_cancellation()),
+                    )
+                except Exception as e:
+                    # A partition stopped by the token fails to decode its partial response, which is not retryable
+                    check_cancellation()
+                    if get_status_code(e) == 429:
+                        self.governor.record_throttled(get_retry_after(e))
+                    raise
+            self.governor.record_success()
+            return result
+
+        with phase(f"partitioning {file}"):
+            if options.add_to_docset_id:
+                try:
+                    return self.partition_resilience.call(partition, idempotent=False)
+                finally:
+                    notify_docset_changed(options.add_to_docset_id)
+
+            # Identical partitions of the same content share one call to the service
+            partition_options = json.dumps(self._create_partition_options(options), sort_keys=True)
+            key = ("partition", None, hash_file(file) or str(file), options.output_format, partition_options)
+            result, _ = self.single_flight.do(key, partial(self.partition_resilience.call, partition))
+            return result
+
+    def add_document(
+        self,
+        file: str | PathLike,
+        docset_id: str,
+        options: PartitionModel,
+        on_progress: ProgressCallback | None = None,
+    ):
         try:
             partition_options = self._create_partition_options(options)
-            doc = self.client.add_doc(file=file, docset_id=docset_id, options=partition_options)
+            try:
+                with phase(f"uploading {file} to docset {docset_id}"), self._open_upload(file, on_progress) as upload:
+                    doc = self.client.add_doc(file=upload, docset_id=docset_id, options=partition_options)
+            finally:
+                notify_docset_changed(docset_id)
             doc_info = self._create_doc_info(doc)
+
+            if self.text_index is not None:
+                try:
+                    added_doc = self.client.get_doc(
+                        docset_id=docset_id, doc_id=doc_info["doc_id"], include_elements=True
+                    )
+                    self._index_document(self.text_index, docset_id, added_doc.value)
+                except Exception:
+                    # Documents that could not be indexed now are indexed the next time they are fetched
+                    pass
+
             return doc_info
         except Exception as e:
             raise Exception(f"Failed to add document to docset {docset_id}: {str(e)}") from e
 
+    @staticmethod
+    def _index_document(text_index: ElementTextIndex, docset_id: str, doc) -> None:
+        try:
+            text_index.add_document(
+                docset_id, doc.id, ((element.id, element.type, element.text_representation) for element in doc.elements)
+            )
+        except Exception:
+            # The index is only a shortcut for searches; failing to update it must not fail the read or write
+            pass
+
     def list_documents(self, docset_id: str, page_size: int, page_token: str | None):
         try:
-            docs = self.client.list_docs(docset_id=docset_id, page_size=page_size, page_token=page_token)
-            docs_info = [self._create_doc_info(doc, listing=True) for doc in docs]
+            with phase(f"listing the documents of docset {docset_id}"):
+                docs = self.client.list_docs(docset_id=docset_id, page_size=page_size, page_token=page_token)
+                docs_info = [self._create_doc_info(doc, listing=True) for doc in docs]
             return docs_info
         except Exception as e:
             raise Exception(f"Failed to list documents in docset {docset_id}: {str(e)}") from e
 
+    def _create_document_dict(self, doc, include_elements: bool) -> dict:
+        element_dict = {}
+        if include_elements:
+            for element in doc.elements:
+                element_dict[element.id] = {
+                    "id": element.id,
+                    "type": element.type,
+                    "text_representation": element.text_representation,
+                    "properties": element.properties,
+                    "bbox": element.bbox,
+                }
+
+        properties = self._extract_properties(doc.properties)
+
+        doc_info = {
+            "doc_id": doc.id,
+            "elements": element_dict,
+            "properties": properties,
+            "binary_data": doc.binary_data,
+            "original_elements": doc.properties["_original_elements"],
+        }
+        return doc_info
+
+    def _get_doc(self, docset_id: str, doc_id: str, include_elements: bool, include_binary: bool = False):
+        """Fetches a document, sharing the download with identical fetches in flight and hedging it if enabled.
+        Also returns whether it was shared."""
+        read = partial(
+            self.client.get_doc,
+            docset_id=docset_id,
+            doc_id=doc_id,
+            include_elements=include_elements,
+            include_binary=include_binary,
+        )
+        if self.hedger is not None and not include_binary:
+            # Binaries are too large to download twice
+            read = partial(self.hedger.call, "get_doc", read)
+        return self.single_flight.do(("get_doc", docset_id, doc_id, include_elements, include_binary), read)
+
     def get_document(self, docset_id: str, doc_id: str, include_elements: bool, include_binary: bool):
+        if not include_binary:
+            mirrored = self.mirror.get_document(docset_id, doc_id)
+            if mirrored is not None:
+                if not include_elements:
+                    mirrored["elements"] = {}
+                return mirrored
+
         try:
-            doc = self.client.get_doc(
-                docset_id=docset_id,
-                doc_id=doc_id,
-                include_elements=include_elements,
-                include_binary=include_binary,
-            )
+            with phase(f"downloading document {doc_id}"):
+                doc, shared = self._get_doc(docset_id, doc_id, include_elements, include_binary)
             doc = doc.value
 
-            element_dict = {}
-            if include_elements:
-                for element in doc.elements:
-                    element_dict[element.id] = {
-                        "id": element.id,
-                        "type": element.type,
-                        "text_representation": element.text_representation,
-                        "properties": element.properties,
-                        "bbox": element.bbox,
-                    }
-
-            properties = self._extract_properties(doc.properties)
-
-            doc_info = {
-                "doc_id": doc.id,
-                "elements": element_dict,
-                "properties": properties,
-                "binary_data": doc.binary_data,
-                "original_elements": doc.properties["_original_elements"],
-            }
-            return doc_info
+            if include_elements and self.text_index is not None and not shared:
+                self._index_document(self.text_index, docset_id, doc)
+
+            return self._create_document_dict(doc, include_elements)
         except Exception as e:
             if "404" in str(e) or "not found" in str(e).lower():
                 return None
@@ -123,6 +322,10 @@ class ArynDocumentManager:
     def delete_document(self, docset_id: str, doc_id: str):
         try:
             doc = self.client.delete_doc(docset_id=docset_id, doc_id=doc_id)
+            notify_docset_changed(docset_id)
+            self.mirror.remove_documents(docset_id, [doc_id])
+            if self.text_index is not None:
+                self.text_index.remove_document(docset_id, doc_id)
             doc_info = self._create_doc_info(doc)
             return doc_info
         except Exception as e:
@@ -131,8 +334,184 @@ class ArynDocumentManager:
             raise Exception(f"Failed to delete document {doc_id} in docset {docset_id}: {str(e)}") from e
 
     def get_document_binary(self, docset_id: str, doc_id: str, file_path: str | PathLike):
+        def download() -> Path:
+            # The shared download gets a directory of its own, since any caller's file may be gone before the others
+            # have copied it
+            path = Path(tempfile.mkdtemp(prefix="aryn-download-")) / Path(file_path).name
+            try:
+                self.client.get_doc_binary(docset_id=docset_id, doc_id=doc_id, file=path)
+            except BaseException:
+                shutil.rmtree(path.parent, ignore_errors=True)
+                raise
+            return path
+
         try:
-            self.client.get_doc_binary(docset_id=docset_id, doc_id=doc_id, file=file_path)
+            # Concurrent downloads of the same binary share one, which every caller copies to the path it asked for
+            with (
+                phase(f"downloading the original file of document {doc_id}"),
+                self.single_flight.share(
+                    ("get_doc_binary", docset_id, doc_id),
+                    download,
+                    cleanup=lambda path: shutil.rmtree(path.parent, ignore_errors=True),
+                ) as (downloaded_path, _),
+            ):
+                shutil.copyfile(downloaded_path, file_path)
             return file_path
         except Exception as e:
+            # A download that failed or was cancelled part way must not leave a truncated file behind
+            Path(file_path).unlink(missing_ok=True)
             raise Exception(f"Failed to get document binary for {doc_id} in docset {docset_id}: {str(e)}") from e
+
+    def _get_listed_document_properties(self, docset_id: str, doc) -> dict:
+        return get_listed_document_properties(
+            doc, lambda doc_id: self._get_doc(docset_id, doc_id, include_elements=False)[0].value.properties
+        )
+
+    def export_properties(
+        self,
+        docset_id: str,
+        path: Path,
+        output_format: Literal["csv", "parquet"],
+        fields: dict[str, str] | None,
+        page_size: int = 100,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """Writes the extracted properties of every document in a DocSet to path, one row per document
+
+        The columns are doc_id, name and then the given fields in order, typically the DocSet schema's. Without
+        fields, the properties found in the first page of documents are used. Documents are listed one page at a
+        time and the properties of a page are fetched concurrently, so rows are written in listing order while
+        the export runs. Returns the number of documents exported.
+        """
+        writer_class: Callable[[Path, dict[str, str]], PropertiesWriter] = CSVPropertiesWriter
+        if output_format == "parquet":
+            # Fail before any document is fetched rather than after the first page
+            require_pyarrow()
+            writer_class = ParquetPropertiesWriter
+        writer: PropertiesWriter | None = None
+        exported = 0
+        try:
+            try:
+                documents = iter(self.client.list_docs(docset_id=docset_id, page_size=page_size))
+                with phase(f"fetching the properties of docset {docset_id}"):
+                    get_properties = propagate_cancellation(partial(self._get_listed_document_properties, docset_id))
+                with ThreadPoolExecutor(max_workers=self.max_export_workers) as executor:
+                    while page := list(islice(documents, page_size)):
+                        page_properties = executor.map(get_properties, page)
+                        rows = [
+                            {**properties, "doc_id": doc.doc_id, "name": doc.name}
+                            for doc, properties in zip(page, page_properties)
+                        ]
+
+                        if writer is None:
+                            if not fields:
+                                fields = {
+                                    key: "str"
+                                    for row in rows
+                                    for key in row
+                                    if key not in ("doc_id", "name") and not key.startswith("_")
+                                }
+                            writer = writer_class(path, {"doc_id": "str", "name": "str", **fields})
+
+                        writer.write_rows(rows)
+                        exported += len(rows)
+                        if on_progress is not None:
+                            on_progress(exported)
+
+                if writer is None:
+                    writer = writer_class(path, {"doc_id": "str", "name": "str", **(fields or {})})
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            return exported
+        except Exception as e:
+            Path(path).unlink(missing_ok=True)
+            raise Exception(f"Failed to export properties of docset {docset_id}: {str(e)}") from e
+
+    def forget_docset(self, docset_id: str) -> None:
+        """Drops everything kept locally about a deleted DocSet"""
+        self.mirror.remove_docset(docset_id)
+        if self.text_index is not None:
+            self.text_index.remove_docset(docset_id)
+
+    def _fetch_mirrored_document(self, docset_id: str, listed_doc) -> tuple[str, dict]:
+        doc, shared = self._get_doc(docset_id, listed_doc.doc_id, include_elements=True)
+        doc = doc.value
+        if self.text_index is not None and not shared:
+            self._index_document(self.text_index, docset_id, doc)
+        return listed_doc.doc_id, self._create_document_dict(doc, True)
+
+    def sync_docset(
+        self,
+        docset_id: str,
+        full_refresh: bool = False,
+        page_size: int = 100,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> dict:
+        """Mirrors the properties and elements of every document in a DocSet into the local mirror
+
+        The first sync, and the first one after this process extracted or deleted the DocSet's properties, fetches
+        every document. Later ones diff the listing against the mirror and only fetch added documents and drop
+        removed ones. Documents are fetched concurrently and stored a page at a time, so an interrupted sync keeps
+        what it fetched, but the DocSet is only served from the mirror once a sync completes.
+        """
+        start = time.perf_counter()
+        try:
+            needs_full_sync, properties_changes = self.mirror.sync_state(docset_id)
+            full_refresh = full_refresh or needs_full_sync
+            with phase(f"listing the documents of docset {docset_id}"):
+                listed = {doc.doc_id: doc for doc in self.client.list_docs(docset_id=docset_id)}
+            mirrored = self.mirror.doc_ids(docset_id)
+
+            removed = [doc_id for doc_id in mirrored if doc_id not in listed]
+            to_fetch = [doc for doc_id, doc in listed.items() if full_refresh or doc_id not in mirrored]
+
+            fetched = 0
+            if on_progress is not None:
+                on_progress(fetched, len(to_fetch))
+            documents = iter(to_fetch)
+            with phase(f"fetching the documents of docset {docset_id}"):
+                fetch = propagate_cancellation(partial(self._fetch_mirrored_document, docset_id))
+            with ThreadPoolExecutor(max_workers=self.max_sync_workers) as executor:
+                while page := list(islice(documents, page_size)):
+                    self.mirror.put_documents(docset_id, list(executor.map(fetch, page)))
+                    fetched += len(page)
+                    if on_progress is not None:
+                        on_progress(fetched, len(to_fetch))
+
+            self.mirror.remove_documents(docset_id, removed)
+            if self.text_index is not None:
+                for doc_id in removed:
+                    self.text_index.remove_document(docset_id, doc_id)
+            self.mirror.mark_synced(docset_id, properties_changes)
+
+            return {
+                "docset_id": docset_id,
+                "full_refresh": full_refresh,
+                "documents": len(listed),
+                "fetched_documents": fetched,
+                "removed_documents": len(removed),
+                "sync_ms": (time.perf_counter() - start) * 1000,
+            }
+        except Exception as e:
+            raise Exception(f"Failed to sync docset {docset_id}: {str(e)}") from e
+
+    def search_local(
+        self,
+        docset_id: str,
+        query: str,
+        query_type: Literal["keyword", "lexical"],
+        return_type: Literal["doc", "element"],
+        page_size: int,
+    ) -> dict | None:
+        """Searches the local index of fetched documents. Returns None when the index is disabled or has no match."""
+        if self.text_index is None:
+            return None
+        try:
+            results = self.text_index.search(docset_id, query, query_type, return_type, page_size)
+        except Exception as e:
+            raise Exception(f"Failed to search the local index of docset {docset_id}: {str(e)}") from e
+        if not results:
+            return None
+        return {"results": results, "indexed_documents": self.text_index.indexed_documents(docset_id)}
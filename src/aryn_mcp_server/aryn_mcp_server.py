@@ -1,12 +1,21 @@
-import json
+import os
+import time
+import asyncio
+import argparse
 import tempfile
 from pathlib import Path
+from functools import partial
 
-from aryn_sdk.partition import draw_with_boxes, tables_to_pandas, partition_file
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context
 from .aryn_docset_manager import ArynDocSetManager
 from .aryn_document_manager import ArynDocumentManager
-from .utils.utils import save_file, get_output_dir, create_zip_from_dataframes
+from .utils.utils import save_file, get_env_int, get_output_dir, ensure_unique_filename
+from .utils.progress import ProgressReporter
+from .utils.cancellation import current_cancellation, with_deadline
+from .utils.batch import run_batch
+from .utils.rendering import draw_boxes, remove_files, save_tables
+from .utils.export import schema_column_types
+from .utils.workers import ArynFastMCP, run_in_process
 
 from .models import (
     PartitionModel,
@@ -22,11 +31,22 @@ from .models import (
     DeleteArynDocumentModel,
     ExtractArynDocumentPropertiesModel,
     DeleteArynDocSetPropertiesModel,
+    ExportArynDocSetPropertiesModel,
+    SyncArynDocSetModel,
+    SyncArynDocSetPropertiesModel,
+    FilterArynDocSetPropertiesModel,
+    AggregateArynDocSetPropertiesModel,
     SearchArynDocSetModel,
+    SearchArynDocSetsModel,
+    SearchArynDocSetLocalModel,
     QueryArynDocSetModel,
+    QueryArynDocSetsModel,
+    GetJobStatusModel,
+    WaitForJobModel,
+    ExecuteBatchModel,
 )
 
-mcp = FastMCP(
+mcp = ArynFastMCP(
     name="ArynMCPServer",
 )
 
@@ -35,8 +55,10 @@ ADM = ArynDocumentManager()
 
 
 @mcp.tool()
-def partition_pdf(args: PartitionModel) -> str:
-    """Converts a document in PDF format to either JSON or Markdown using Aryn's partitioning service
+@with_deadline
+async def partition_pdf(args: PartitionModel, ctx: Context) -> str | dict:
+    """Converts a document in PDF format to either JSON or Markdown using Aryn's partitioning service. The upload,
+    the pages the service has completed and saving the result are sent as progress notifications.
 
     Args:
         args: The input arguments defined in the PartitionModel schema. These include:
@@ -68,48 +90,20 @@ def partition_pdf(args: PartitionModel) -> str:
         A string describing where the result is stored and the name of the file
     """
     try:
-        partition_result = partition_file(
-            args.file,
-            threshold=args.threshold,
-            text_mode=args.text_mode,
-            table_mode=args.table_mode,
-            text_extraction_options={"remove_line_breaks": args.remove_line_breaks},
-            table_extraction_options={
-                "include_additional_text": args.include_additional_text,
-            },
-            extract_images=args.extract_images,
-            extract_image_format=args.extract_image_format,
-            summarize_images=args.summarize_images,
-            selected_pages=args.selected_pages,
-            chunking_options={
-                "strategy": args.strategy,
-                "max_tokens": args.max_tokens,
-                "tokenizer": args.tokenizer,
-                "merge_across_pages": args.merge_across_pages,
-            },
-            output_format=args.output_format,
-            output_label_options={
-                "promote_title": args.promote_title,
-                "title_candidate_elements": args.title_candidate_elements,
-                "orientation_correction": args.orientation_correction,
-            },
-            markdown_options={
-                "include_pagenum": args.include_pagenum,
-                "include_headers": args.include_headers,
-                "include_footers": args.include_footers,
-            },
-            add_to_docset_id=args.add_to_docset_id,
-        )
+        progress = ProgressReporter(ctx)
+        partition_result = await asyncio.to_thread(ADM.partition_file, args.file, args, progress.report)
 
-        save_file(partition_result, args.filename, args.output_format)
+        progress.report(f"Saving the result as {args.filename}.{args.output_format}")
+        await asyncio.to_thread(save_file, partition_result, args.filename, args.output_format)
 
         return f"File saved in {get_output_dir()} as {args.filename}.{args.output_format}"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
-def get_boxes_drawn_on_pdf(args: DrawBoxesModel) -> dict:
+@with_deadline
+async def get_boxes_drawn_on_pdf(args: DrawBoxesModel) -> dict:
     """Saves a list of images from the partitioned pdf, one for each page, with bounding boxes detected by the partitioner drawn on.
 
     Args:
@@ -124,47 +118,54 @@ def get_boxes_drawn_on_pdf(args: DrawBoxesModel) -> dict:
     """
 
     try:
+        return await asyncio.to_thread(_draw_boxes_on_pdf, args)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _draw_boxes_on_pdf(args: DrawBoxesModel) -> dict:
+    # The original file is only needed while drawing, and is removed even if the call fails or is cancelled
+    with tempfile.TemporaryDirectory() as download_dir:
+        # Workers read a partition result that is already in a file themselves instead of being sent it
+        partition_result: dict | str
         if args.path_to_partitioned_json and args.path_to_original_pdf:
-            with open(args.path_to_partitioned_json, "r") as f:
-                partition_result = json.load(f)
+            partition_result = args.path_to_partitioned_json
             original_pdf_path = args.path_to_original_pdf
         else:
             assert args.docset_id and args.doc_id, "docset_id and doc_id are required"
-            partition_result = ADM.get_document(
+            document_dict = ADM.get_document(
                 docset_id=args.docset_id,
                 doc_id=args.doc_id,
                 include_elements=True,
                 include_binary=False,
             )
-            partition_result = {"elements": partition_result["original_elements"]}
+            partition_result = {"elements": document_dict["original_elements"]}
             original_pdf_path = ADM.get_document_binary(
                 docset_id=args.docset_id,
                 doc_id=args.doc_id,
-                file_path=Path(tempfile.gettempdir()) / f"{args.doc_id}.pdf",
+                file_path=Path(download_dir) / f"{args.doc_id}.pdf",
             )
 
-        pages = draw_with_boxes(original_pdf_path, partition_result)
-
-        saved_images = []
-        for page_range in args.pages_to_draw_boxes_on:
-            if page_range.start < 1 or page_range.end > len(pages):
-                raise ValueError(f"Page range {page_range} is out of bounds for the document")
-            for page_index in range(page_range.start - 1, page_range.end):
-                saved_path = save_file(pages[page_index], f"{args.doc_id}_page_image_{page_index+1}", "png")
-                saved_images.append(saved_path)
+        saved_images = run_in_process(
+            draw_boxes,
+            original_pdf_path,
+            partition_result,
+            [(page_range.start, page_range.end) for page_range in args.pages_to_draw_boxes_on],
+            args.doc_id,
+            discard=remove_files,
+        )
 
-        return {
-            "saved_image_paths": saved_images,
-            "saved_image_count": len(saved_images),
-        }
-    except Exception as e:
-        return {"error": str(e)}
+    return {
+        "saved_image_paths": saved_images,
+        "saved_image_count": len(saved_images),
+    }
 
 
 # =============================================================================
 # Group: DocSet Managment Functions
 # =============================================================================
 @mcp.tool()
+@with_deadline
 def create_aryn_docset(args: CreateArynDocSetModel) -> dict:
     """Creates a new Aryn DocSet to store documents
 
@@ -184,6 +185,7 @@ def create_aryn_docset(args: CreateArynDocSetModel) -> dict:
 
 
 @mcp.tool()
+@with_deadline
 def get_aryn_docset_metadata(args: GetArynDocSetModel) -> dict:
     """Gets an Aryn DocSet to store documents
 
@@ -204,7 +206,8 @@ def get_aryn_docset_metadata(args: GetArynDocSetModel) -> dict:
 
 
 @mcp.tool()
-def get_aryn_docset_schema(args: GetArynDocSetModel) -> str:
+@with_deadline
+def get_aryn_docset_schema(args: GetArynDocSetModel) -> str | dict:
     """Gets the properties of an Aryn DocSet
 
     Args:
@@ -222,10 +225,11 @@ def get_aryn_docset_schema(args: GetArynDocSetModel) -> str:
 
         return f"File saved in {get_output_dir()} as {args.docset_id}_schema.json"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
 def list_aryn_docsets(args: ListArynDocSetsModel) -> list[dict] | dict:
     """Lists all DocSets in the account
 
@@ -245,6 +249,7 @@ def list_aryn_docsets(args: ListArynDocSetsModel) -> list[dict] | dict:
 
 
 @mcp.tool()
+@with_deadline
 def delete_aryn_docset(args: DeleteArynDocSetModel) -> dict:
     """Deletes an Aryn DocSet
 
@@ -257,6 +262,7 @@ def delete_aryn_docset(args: DeleteArynDocSetModel) -> dict:
 
     try:
         docset_info = ADSM.delete_docset(docset_id=args.docset_id)
+        ADM.forget_docset(args.docset_id)
         return docset_info
     except Exception as e:
         return {"error": str(e)}
@@ -266,8 +272,9 @@ def delete_aryn_docset(args: DeleteArynDocSetModel) -> dict:
 # Group: Document Managment Functions
 # =============================================================================
 @mcp.tool()
-def add_aryn_document(args: AddArynDocumentModel, options: PartitionModel) -> dict:
-    """Adds a document to an Aryn DocSet
+@with_deadline
+async def add_aryn_document(args: AddArynDocumentModel, options: PartitionModel, ctx: Context) -> dict:
+    """Adds a document to an Aryn DocSet. How much of the file has been uploaded is sent as progress notifications.
 
     Args:
         args: The input arguments defined in the AddArynDocumentModel schema. These include:
@@ -298,13 +305,17 @@ def add_aryn_document(args: AddArynDocumentModel, options: PartitionModel) -> di
     """
 
     try:
-        document_info = ADM.add_document(file=args.file, docset_id=args.docset_id, options=options)
+        progress = ProgressReporter(ctx)
+        document_info = await asyncio.to_thread(
+            ADM.add_document, file=args.file, docset_id=args.docset_id, options=options, on_progress=progress.report
+        )
         return document_info
     except Exception as e:
         return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
 def list_aryn_documents(args: ListArynDocumentsModel) -> dict:
     """Lists all documents in an Aryn DocSet
 
@@ -329,7 +340,8 @@ def list_aryn_documents(args: ListArynDocumentsModel) -> dict:
 
 
 @mcp.tool()
-def get_aryn_document_elements(args: GetArynDocumentComponentsModel) -> str:
+@with_deadline
+def get_aryn_document_elements(args: GetArynDocumentComponentsModel) -> str | dict:
     """Gets a document's elements from an Aryn DocSet document
 
     Args:
@@ -358,13 +370,14 @@ def get_aryn_document_elements(args: GetArynDocumentComponentsModel) -> str:
 
         return f"File saved in {get_output_dir()} as {args.doc_id}.json"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
 def get_aryn_document_extracted_properties(
     args: GetArynDocumentExtractedPropertiesModel,
-) -> str:
+) -> str | dict:
     """Gets the extracted properties of a document from an Aryn DocSet document
 
     Args:
@@ -388,11 +401,12 @@ def get_aryn_document_extracted_properties(
 
         return f"File saved in {get_output_dir()} as {args.doc_id}.{args.output_format}"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
-def get_aryn_document_tables(args: GetArynDocumentComponentsModel) -> str:
+@with_deadline
+def get_aryn_document_tables(args: GetArynDocumentComponentsModel) -> str | dict:
     """Gets the tables of a document from an Aryn DocSet document
 
     Args:
@@ -409,22 +423,16 @@ def get_aryn_document_tables(args: GetArynDocumentComponentsModel) -> str:
             include_elements=True,
             include_binary=False,
         )
-        elements = document_dict["original_elements"]
-
-        tables = tables_to_pandas({"elements": elements})
-        tables = [table for _, table in tables if table is not None]
-
-        zip_data = create_zip_from_dataframes(tables)
-
-        save_file(zip_data, args.doc_id, "zip")
+        save_tables(document_dict["original_elements"], args.doc_id)
 
         return f"File saved in {get_output_dir()} as {args.doc_id}.zip"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
-def get_aryn_document_original_file(args: GetArynDocumentComponentsModel) -> str:
+@with_deadline
+def get_aryn_document_original_file(args: GetArynDocumentComponentsModel) -> str | dict:
     """Gets the raw data of a document from an Aryn DocSet document
 
     Args:
@@ -444,10 +452,11 @@ def get_aryn_document_original_file(args: GetArynDocumentComponentsModel) -> str
 
         return f"File saved in {get_output_dir()} as {args.doc_id}.pdf"
     except Exception as e:
-        return str(e)
+        return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
 def delete_aryn_document(args: DeleteArynDocumentModel) -> dict:
     """Deletes document from an Aryn DocSet
 
@@ -467,47 +476,232 @@ def delete_aryn_document(args: DeleteArynDocumentModel) -> dict:
 
 
 @mcp.tool()
+@with_deadline
 def extract_aryn_docset_properties(args: ExtractArynDocumentPropertiesModel) -> dict:
-    """Extracts properties from all documents in an Aryn DocSet
+    """Starts extracting properties from all documents in an Aryn DocSet. Extraction runs in the background;
+    use wait_for_job or get_job_status with the returned job_id to find out when it is done.
 
     Args:
         args: The input arguments defined in the ExtractArynDocumentPropertiesModel schema. These include:
         docset_id
         schema
+        incremental
     Returns:
-        result: A job status of the job
+        result: The status of the submitted job
     """
 
     try:
-        extraction_status = ADSM.extract_properties(
-            docset_id=args.docset_id, properties_to_extract=args.document_schema
+        job = ADSM.submit_extract_properties(
+            docset_id=args.docset_id, properties_to_extract=args.document_schema, incremental=args.incremental
         )
-        return extraction_status
+        return job.as_dict()
     except Exception as e:
         return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
 def delete_aryn_docset_properties(args: DeleteArynDocSetPropertiesModel) -> dict:
-    """Deletes properties from all documents in an Aryn DocSet
+    """Starts deleting properties from all documents in an Aryn DocSet. Deletion runs in the background;
+    use wait_for_job or get_job_status with the returned job_id to find out when it is done.
 
     Args:
         args: The input arguments defined in the DeleteArynDocSetPropertiesModel schema. These include:
         docset_id
-        schema
+        properties_to_delete
+    Returns:
+        result: The status of the submitted job
+    """
+    try:
+        job = ADSM.submit_delete_properties(docset_id=args.docset_id, properties_to_delete=args.properties_to_delete)
+        return job.as_dict()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+def get_job_status(args: GetJobStatusModel) -> dict:
+    """Gets the current status of a job submitted by extract_aryn_docset_properties or delete_aryn_docset_properties
+
+    Args:
+        args: The input arguments defined in the GetJobStatusModel schema. These include:
+        job_id
+    Returns:
+        result: The status of the job, with its result or error once it has finished
+    """
+    try:
+        return ADSM.jobs.poll(args.job_id).as_dict()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def wait_for_job(args: WaitForJobModel, ctx: Context) -> dict:
+    """Waits for a job submitted by extract_aryn_docset_properties or delete_aryn_docset_properties to finish.
+    The job is polled often at first and less often the longer it runs.
+
+    Args:
+        args: The input arguments defined in the WaitForJobModel schema. These include:
+        job_id
+        timeout_seconds
+    Returns:
+        result: The status of the job, with its result or error once it has finished
+    """
+    deadline = time.monotonic() + args.timeout_seconds
+    try:
+        progress = ProgressReporter(ctx)
+        while True:
+            job = await asyncio.to_thread(ADSM.jobs.poll, args.job_id)
+            if job.finished or time.monotonic() >= deadline:
+                return job.as_dict()
+
+            progress.report(f"{job.kind} job {job.job_id} is {job.status}")
+            await asyncio.sleep(min(ADSM.jobs.next_poll_delay(args.job_id), deadline - time.monotonic()))
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+async def export_aryn_docset_properties(args: ExportArynDocSetPropertiesModel, ctx: Context) -> str | dict:
+    """Exports the extracted properties of every document in an Aryn DocSet to a single CSV or Parquet file,
+    one row per document. The columns are doc_id, name and the properties of the DocSet schema in schema order.
+
+    Args:
+        args: The input arguments defined in the ExportArynDocSetPropertiesModel schema. These include:
+        docset_id
+        output_format
+        page_size
     Returns:
-        result: A job status of the job
+        result: a string describing where the exported properties are saved
     """
     try:
-        deletion_status = ADSM.delete_properties(
-            docset_id=args.docset_id, properties_to_delete=args.properties_to_delete
+        docset_info = ADSM.get_docset(docset_id=args.docset_id)
+        assert docset_info, "Docset not found"
+        fields = schema_column_types(docset_info["schema"])
+
+        path = ensure_unique_filename(get_output_dir() / f"{args.docset_id}_properties", f".{args.output_format}")
+        progress = ProgressReporter(ctx)
+        exported = await asyncio.to_thread(
+            partial(
+                ADM.export_properties,
+                docset_id=args.docset_id,
+                path=path,
+                output_format=args.output_format,
+                fields=fields,
+                page_size=args.page_size,
+                on_progress=lambda exported: progress.report(f"Exported {exported} documents", exported),
+            )
         )
-        return deletion_status
+
+        return f"Properties of {exported} documents saved in {get_output_dir()} as {path.name}"
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+async def sync_aryn_docset(args: SyncArynDocSetModel, ctx: Context) -> dict:
+    """Mirrors the properties and elements of every document in an Aryn DocSet locally. Later syncs only
+    fetch documents added since the previous one and drop removed ones. Until the mirror is older than
+    ARYN_MCP_MIRROR_MAX_STALENESS, get_aryn_document_elements, get_aryn_document_tables and
+    get_aryn_document_extracted_properties read the DocSet's documents from it instead of calling the Aryn API.
+
+    Args:
+        args: The input arguments defined in the SyncArynDocSetModel schema. These include:
+        docset_id
+        full_refresh
+    Returns:
+        result: A dictionary with the number of documents in the DocSet and the number fetched and removed
+    """
+    try:
+        progress = ProgressReporter(ctx)
+        return await asyncio.to_thread(
+            partial(
+                ADM.sync_docset,
+                docset_id=args.docset_id,
+                full_refresh=args.full_refresh,
+                on_progress=lambda fetched, total: progress.report(
+                    f"Fetched {fetched} of {total} documents", fetched, total
+                ),
+            )
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+async def sync_aryn_docset_properties(args: SyncArynDocSetPropertiesModel) -> dict:
+    """Copies the extracted properties of every document in an Aryn DocSet into a local columnar store, typed after
+    the DocSet schema. Later syncs only fetch documents added since the previous one. The local copy is what
+    filter_aryn_docset_properties and aggregate_aryn_docset_properties answer from.
+
+    Args:
+        args: The input arguments defined in the SyncArynDocSetPropertiesModel schema. These include:
+        docset_id
+        full_refresh
+    Returns:
+        result: A dictionary with the number of documents synced, added and removed
+    """
+    try:
+        return await asyncio.to_thread(ADSM.sync_properties, args.docset_id, args.full_refresh)
     except Exception as e:
         return {"error": str(e)}
 
 
 @mcp.tool()
+@with_deadline
+def filter_aryn_docset_properties(args: FilterArynDocSetPropertiesModel) -> dict:
+    """Finds the documents of an Aryn DocSet whose properties match a filter, using the local copy of the
+    properties made by sync_aryn_docset_properties and without calling the Aryn API
+
+    Args:
+        args: The input arguments defined in the FilterArynDocSetPropertiesModel schema. These include:
+        docset_id
+        properties_filter
+        limit
+    Returns:
+        result: A dictionary with the number of matching documents and their doc_ids. stale is true if this
+        server changed the DocSet since the last sync
+    """
+    try:
+        return ADSM.filter_properties(args.docset_id, args.properties_filter, args.limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+def aggregate_aryn_docset_properties(args: AggregateArynDocSetPropertiesModel) -> dict:
+    """Counts, sums, averages or finds the min/max of document properties in an Aryn DocSet, optionally per group
+    of property values, using the local copy of the properties made by sync_aryn_docset_properties and without
+    calling the Aryn API. For example: the number of contracts with a value over 1M per state.
+
+    Args:
+        args: The input arguments defined in the AggregateArynDocSetPropertiesModel schema. These include:
+        docset_id
+        properties_filter
+        group_by
+        aggregations
+    Returns:
+        result: A dictionary with one row per group. stale is true if this server changed the DocSet since the
+        last sync
+    """
+    try:
+        return ADSM.aggregate_properties(
+            docset_id=args.docset_id,
+            properties_filter=args.properties_filter,
+            group_by=args.group_by,
+            aggregations=[(aggregation.function, aggregation.property) for aggregation in args.aggregations],
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
 def search_aryn_docset(args: SearchArynDocSetModel) -> dict:
     """Search over a docset and get back documents or elements that match your search criteria
 
@@ -542,20 +736,118 @@ def search_aryn_docset(args: SearchArynDocSetModel) -> dict:
 
 
 @mcp.tool()
-def query_aryn_docset(args: QueryArynDocSetModel) -> dict:
-    """Queries an Aryn DocSet
+@with_deadline
+def search_aryn_docset_local(args: SearchArynDocSetLocalModel) -> dict:
+    """Searches the text of the documents of an Aryn DocSet that this server has already fetched or added, using a
+    local full-text index ranked with BM25. Falls back to searching the DocSet with the Aryn API when nothing matches
+    locally. The local index is enabled with the ARYN_MCP_LOCAL_INDEX environment variable.
 
     Args:
-        args: The input arguments defined in the QueryArynDocSetModel schema. These include:
+        args: The input arguments defined in the SearchArynDocSetLocalModel schema. These include:
         docset_id
         query
-        summarize_result
+        query_type
+        return_type
+        page_size
+        fallback_to_remote
+    Returns:
+        result: A dictionary with the results and their source, either "local" or "remote"
     """
     try:
-        query_result = ADSM.query(
+        local_result = ADM.search_local(
+            docset_id=args.docset_id,
+            query=args.query,
+            query_type=args.query_type,
+            return_type=args.return_type,
+            page_size=args.page_size,
+        )
+        if local_result is not None:
+            return {**local_result, "source": "local"}
+        if not args.fallback_to_remote:
+            return {"results": [], "source": "local"}
+
+        remote_result = ADSM.search(
             docset_id=args.docset_id,
+            query_or_properties_filter="query",
+            query=args.query,
+            query_type=args.query_type,
+            properties_filter=None,
+            page_size=args.page_size,
+            return_type=args.return_type,
+            page_token=None,
+        )
+        return {**remote_result, "source": "remote"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+def search_aryn_docsets(args: SearchArynDocSetsModel) -> dict:
+    """Search over several docsets at once and get back one merged, de-duplicated list of documents or elements
+
+    Args:
+        args: The input arguments defined in the SearchArynDocSetsModel schema. These include:
+        docset_ids
+        query_or_properties_filter
+        query
+        query_type
+        properties_filter
+        page_size
+        return_type
+        timeout_seconds
+    Returns:
+        result: A dict with the merged results, the next page token of each docset and the docsets that timed out
+        or failed
+    """
+    try:
+        search_result = ADSM.search_docsets(
+            docset_ids=args.docset_ids,
+            query_or_properties_filter=args.query_or_properties_filter,
             query=args.query,
-            summarize_result=args.summarize_result,
+            query_type=args.query_type,
+            properties_filter=args.properties_filter,
+            page_size=args.page_size,
+            return_type=args.return_type,
+            timeout_seconds=args.timeout_seconds,
+        )
+
+        return search_result
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+@with_deadline
+async def query_aryn_docset(args: QueryArynDocSetModel, ctx: Context) -> dict:
+    """Queries an Aryn DocSet. Documents found and chunks of the summary are sent as progress notifications
+    while the query runs. The query can be stopped early once enough documents or summary text have been found.
+
+    Args:
+        args: The input arguments defined in the QueryArynDocSetModel schema. These include:
+        docset_id
+        query
+        summarize_result
+        max_docs
+        max_summary_chars
+        deadline_seconds
+        max_staleness_seconds
+    """
+    cancellation = current_cancellation()
+    try:
+        progress = ProgressReporter(ctx)
+        query_result = await asyncio.to_thread(
+            partial(
+                ADSM.query,
+                docset_id=args.docset_id,
+                query=args.query,
+                summarize_result=args.summarize_result,
+                on_event=lambda event_type, data: progress.report(f"{event_type}: {data}"),
+                max_docs=args.max_docs,
+                max_summary_chars=args.max_summary_chars,
+                cancellation=cancellation,
+                max_staleness_seconds=args.max_staleness_seconds,
+            )
         )
 
         return query_result
@@ -563,8 +855,110 @@ def query_aryn_docset(args: QueryArynDocSetModel) -> dict:
         return {"error": str(e)}
 
 
+@mcp.tool()
+@with_deadline
+async def query_aryn_docsets(args: QueryArynDocSetsModel, ctx: Context) -> dict:
+    """Queries several Aryn DocSets concurrently. Documents found and chunks of each summary are sent as progress
+    notifications, tagged with their docset_id, while the queries run.
+
+    Args:
+        args: The input arguments defined in the QueryArynDocSetsModel schema. These include:
+        docset_ids
+        query
+        summarize_result
+        deadline_seconds
+    Returns:
+        result: A dict with the result of each docset, the documents found across all docsets in the order they
+        were found, the docsets that were stopped at the deadline with partial results, and those that timed out
+        or failed
+    """
+    cancellation = current_cancellation()
+    try:
+        progress = ProgressReporter(ctx)
+        query_result = await asyncio.to_thread(
+            partial(
+                ADSM.query_docsets,
+                docset_ids=args.docset_ids,
+                query=args.query,
+                summarize_result=args.summarize_result,
+                cancellation=cancellation,
+                on_event=lambda docset_id, event_type, data: progress.report(f"{docset_id} {event_type}: {data}"),
+            )
+        )
+
+        return query_result
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+def get_aryn_cache_stats() -> dict:
+    """Gets hit/miss statistics of the server's local caches and retry statistics of its Aryn API clients
+
+    Returns:
+        result: A dictionary with the statistics of each cache
+    """
+    return {
+        "search": ADSM.search_cache.stats(),
+        "query": ADSM.query_cache.stats(),
+        "docset": ADSM.docset_cache.stats(),
+        "text_index": ADM.text_index.stats() if ADM.text_index is not None else None,
+        "mirror": ADM.mirror.stats(),
+        "resilience": {
+            resilience.name: resilience.stats() for resilience in (ADM.resilience, ADM.partition_resilience)
+        },
+        "rate_limit": ADM.governor.stats(),
+        "single_flight": {"documents": ADM.single_flight.stats(), "docsets": ADSM.single_flight.stats()},
+        "hedging": ADM.hedger.stats() if ADM.hedger is not None else None,
+    }
+
+
+@mcp.tool()
+@with_deadline
+async def execute_batch(args: ExecuteBatchModel, ctx: Context) -> dict:
+    """Makes many calls of the other tools in one request, e.g. get_aryn_document_extracted_properties for every
+    document list_aryn_documents returned. Calls run at the same time unless they depend on earlier calls, and each
+    has the deadline it would have on its own, cut short by the batch's deadline. Calls still running or queued
+    stop when the batch is cancelled or runs out of time. Each finished call is sent as a progress notification.
+
+    Args:
+        args: The input arguments defined in the ExecuteBatchModel schema. These include:
+        calls
+        max_concurrency
+    Returns:
+        result: A dictionary whose results hold the tool and the result or error of each call, in the order given
+    """
+    try:
+        progress = ProgressReporter(ctx)
+        # The calls get a context of their own, since the progress of many calls on one token would be meaningless
+        call_tool = partial(mcp.run_tool, context=Context(fastmcp=mcp))
+        return {"results": await run_batch(args.calls, call_tool, args.max_concurrency, progress.report)}
+    except Exception as e:
+        return {"error": str(e)}
+
+
 def main():
-    mcp.run(transport="stdio")
+    parser = argparse.ArgumentParser(description="Serves Aryn DocParse and DocSets over MCP")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "sse", "streamable-http"],
+        default=os.environ.get("ARYN_MCP_TRANSPORT", "stdio"),
+        help="stdio serves the one client that started the server, sse and streamable-http serve any number over HTTP",
+    )
+    parser.add_argument("--host", default=os.environ.get("ARYN_MCP_HOST", mcp.settings.host))
+    parser.add_argument("--port", type=int, default=get_env_int("ARYN_MCP_PORT", mcp.settings.port))
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=mcp.max_workers,
+        help="Tool calls that may do blocking work at once, across all clients",
+    )
+    args = parser.parse_args()
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.max_workers = args.max_workers
+    mcp.run(transport=args.transport)
 
 
 if __name__ == "__main__":
@@ -12,12 +12,23 @@ from .get_aryn_document_extracted_properties_model import (
 from .delete_aryn_document_model import DeleteArynDocumentModel
 from .extract_aryn_document_properties_model import ExtractArynDocumentPropertiesModel
 from .delete_aryn_docset_properties_model import DeleteArynDocSetPropertiesModel
-from .properties_filter_model import PropertiesFilterModel
+from .export_aryn_docset_properties_model import ExportArynDocSetPropertiesModel
+from .sync_aryn_docset_model import SyncArynDocSetModel
+from .sync_aryn_docset_properties_model import SyncArynDocSetPropertiesModel
+from .filter_aryn_docset_properties_model import FilterArynDocSetPropertiesModel
+from .aggregate_aryn_docset_properties_model import AggregateArynDocSetPropertiesModel, PropertyAggregationModel
+from .properties_filter_model import PropertiesFilterModel, PropertiesFilterGroupModel
 from .search_aryn_docset_model import SearchArynDocSetModel
+from .search_aryn_docsets_model import SearchArynDocSetsModel
+from .search_aryn_docset_local_model import SearchArynDocSetLocalModel
 from .query_aryn_docset_model import QueryArynDocSetModel
+from .query_aryn_docsets_model import QueryArynDocSetsModel
 from .document_schema import Schema
 from .get_aryn_document_components_model import GetArynDocumentComponentsModel
 from .draw_boxes_model import PageRange
+from .get_job_status_model import GetJobStatusModel
+from .wait_for_job_model import WaitForJobModel
+from .execute_batch_model import ExecuteBatchModel, ToolCallModel
 
 __all__ = [
     "CreateArynDocSetModel",
@@ -33,9 +44,23 @@ __all__ = [
     "DeleteArynDocumentModel",
     "ExtractArynDocumentPropertiesModel",
     "DeleteArynDocSetPropertiesModel",
+    "ExportArynDocSetPropertiesModel",
+    "SyncArynDocSetModel",
+    "SyncArynDocSetPropertiesModel",
+    "FilterArynDocSetPropertiesModel",
+    "AggregateArynDocSetPropertiesModel",
+    "PropertyAggregationModel",
     "PropertiesFilterModel",
+    "PropertiesFilterGroupModel",
     "SearchArynDocSetModel",
+    "SearchArynDocSetsModel",
+    "SearchArynDocSetLocalModel",
     "Schema",
     "QueryArynDocSetModel",
+    "QueryArynDocSetsModel",
     "PageRange",
+    "GetJobStatusModel",
+    "WaitForJobModel",
+    "ExecuteBatchModel",
+    "ToolCallModel",
 ]
@@ -0,0 +1,82 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal
+from .properties_filter_model import PropertiesFilterModel, PropertiesFilterGroupModel
+
+
+class PropertyAggregationModel(BaseModel):
+    """
+    Schema for an aggregation over the documents of each group
+
+    Attributes:
+        function
+        property
+    """
+
+    function: Literal["count", "sum", "avg", "min", "max"] = Field(
+        ...,
+        description="""
+            function (str, required)
+            The aggregation to compute. There are 5 possible values:
+            count:  The number of documents, or of documents that have the property if one is given
+            sum:    The sum of a numeric property
+            avg:    The average of a numeric property
+            min:    The minimum of a numeric property
+            max:    The maximum of a numeric property""",
+    )
+
+    property: str | None = Field(
+        None,
+        description="""
+            property (str | None, optional)
+            The property to aggregate. Required for every function but count""",
+    )
+
+    @model_validator(mode="after")
+    def validate_property(self) -> "PropertyAggregationModel":
+        if self.function != "count" and not self.property:
+            raise ValueError(f"The '{self.function}' aggregation requires a property")
+        return self
+
+
+class AggregateArynDocSetPropertiesModel(BaseModel):
+    """
+    Input schema for aggregate_aryn_docset_properties()
+
+    Attributes:
+        docset_id
+        properties_filter
+        group_by
+        aggregations
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet to aggregate. Its properties must have been synced with
+            sync_aryn_docset_properties""",
+    )
+
+    properties_filter: list[PropertiesFilterModel | PropertiesFilterGroupModel] | None = Field(
+        None,
+        description="""
+            properties_filter (list[PropertiesFilterModel | PropertiesFilterGroupModel] | None, optional)
+            A list of filters that documents must match to be aggregated. The filters in the list are ANDed
+            together. Default value is None""",
+    )
+
+    group_by: list[str] = Field(
+        [],
+        description="""
+            group_by (list[str], optional)
+            The properties to group documents by. One result is returned per distinct combination of values.
+            Without group_by, all matching documents form a single group. Default value is []""",
+    )
+
+    aggregations: list[PropertyAggregationModel] = Field(
+        [PropertyAggregationModel(function="count", property=None)],
+        min_length=1,
+        description="""
+            aggregations (list[PropertyAggregationModel], optional)
+            The aggregations to compute for each group. Default value is a count of documents""",
+    )
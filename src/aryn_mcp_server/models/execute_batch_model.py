@@ -0,0 +1,76 @@
+from typing import Any
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class ToolCallModel(BaseModel):
+    """
+    Schema for one tool call of a batch
+
+    Attributes:
+        tool
+        arguments
+        depends_on
+    """
+
+    tool: str = Field(
+        ...,
+        description="""
+            tool (str, required)
+            The name of the tool to call, e.g. get_aryn_document_extracted_properties. execute_batch itself cannot
+            be called""",
+    )
+
+    arguments: dict[str, Any] = Field(
+        default_factory=dict,
+        description="""
+            arguments (dict, optional)
+            The arguments of the tool, exactly as they would be passed when calling it on its own, e.g.
+            {"args": {"docset_id": "...", "doc_id": "..."}}. They are validated against the tool's schema""",
+    )
+
+    depends_on: list[int] = Field(
+        default_factory=list,
+        description="""
+            depends_on (list[int], optional)
+            Positions in the batch, counting from 0, of earlier calls that must succeed before this one starts,
+            e.g. to delete properties only after an extraction. Calls without dependencies start right away""",
+    )
+
+
+class ExecuteBatchModel(BaseModel):
+    """
+    Input schema for execute_batch()
+
+    Attributes:
+        calls
+        max_concurrency
+    """
+
+    calls: list[ToolCallModel] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="""
+            calls (list[ToolCallModel], required)
+            The tool calls to make, at most 100. Their results are returned in the same order""",
+    )
+
+    max_concurrency: int = Field(
+        8,
+        ge=1,
+        le=32,
+        description="""
+            max_concurrency (int, optional)
+            The most calls that may run at once. Default value is 8""",
+    )
+
+    @model_validator(mode="after")
+    def validate_calls(self) -> "ExecuteBatchModel":
+        for position, call in enumerate(self.calls):
+            if call.tool == "execute_batch":
+                raise ValueError(f"Call {position} is an execute_batch call, which cannot be nested")
+            for dependency in call.depends_on:
+                if not 0 <= dependency < position:
+                    raise ValueError(f"Call {position} can only depend on earlier calls, not on call {dependency}")
+        return self
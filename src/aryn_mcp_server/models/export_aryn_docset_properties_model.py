@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+
+class ExportArynDocSetPropertiesModel(BaseModel):
+    """
+    Input schema for export_aryn_docset_properties()
+
+    Attributes:
+        docset_id
+        output_format
+        page_size
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet whose document properties are exported""",
+    )
+
+    output_format: Literal["csv", "parquet"] = Field(
+        "csv",
+        description="""
+            output_format (str, optional)
+            The format of the exported file. There are two possible values:
+            csv
+            parquet:  A columnar file whose columns are typed after the DocSet schema. Requires the parquet extra.
+            Default value is csv""",
+    )
+
+    page_size: int = Field(
+        100,
+        gt=0,
+        le=1000,
+        description="""
+            page_size (int, optional)
+            The number of documents listed and written at a time. Default value is 100""",
+    )
@@ -9,6 +9,7 @@ class ExtractArynDocumentPropertiesModel(BaseModel):
     Attributes:
         docset_id
         schema
+        incremental
     """
 
     docset_id: str = Field(
@@ -25,3 +26,13 @@ class ExtractArynDocumentPropertiesModel(BaseModel):
             A schema that defines properties to extract out of the document being parsed. For example,
             In a DocSet of quarterly reports, a property to extract would be the date, or the quarter.""",
     )
+
+    incremental: bool = Field(
+        False,
+        description="""
+            incremental (bool, optional)
+            Only extract the properties that are missing from some document, e.g. because the document was added or
+            replaced since the last extraction or the property's definition changed. If every document is up to
+            date, no extraction job is run. Extraction runs on whole DocSets, so a job that does run still extracts
+            those properties from every document, not just the ones missing them. Default value is False""",
+    )
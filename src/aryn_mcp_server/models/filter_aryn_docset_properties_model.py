@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from .properties_filter_model import PropertiesFilterModel, PropertiesFilterGroupModel
+
+
+class FilterArynDocSetPropertiesModel(BaseModel):
+    """
+    Input schema for filter_aryn_docset_properties()
+
+    Attributes:
+        docset_id
+        properties_filter
+        limit
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet to filter. Its properties must have been synced with
+            sync_aryn_docset_properties""",
+    )
+
+    properties_filter: list[PropertiesFilterModel | PropertiesFilterGroupModel] = Field(
+        ...,
+        min_length=1,
+        description="""
+            properties_filter (list[PropertiesFilterModel | PropertiesFilterGroupModel], required)
+            A list of filters that documents must match. The filters in the list are ANDed together;
+            use a PropertiesFilterGroupModel to combine filters with "or" or "not" instead""",
+    )
+
+    limit: int = Field(
+        100,
+        ge=0,
+        description="""
+            limit (int, optional)
+            The maximum number of matching doc_ids to return. All matches are counted. Default value is 100""",
+    )
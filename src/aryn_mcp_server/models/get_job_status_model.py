@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class GetJobStatusModel(BaseModel):
+    """
+    Input schema for get_job_status()
+
+    Attributes:
+        job_id
+    """
+
+    job_id: str = Field(
+        ...,
+        description="""
+            job_id (str, required)
+            The unique identifier of the job, as returned by the tool that submitted it""",
+    )
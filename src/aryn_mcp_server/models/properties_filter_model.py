@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Literal
 
 
@@ -19,34 +19,83 @@ class PropertiesFilterModel(BaseModel):
             The property to be filtering for in a DocSet""",
     )
 
-    value: str = Field(
+    value: str | list[str] = Field(
         ...,
         description="""
-            value (str, required)
-            The value of the property to be filtering for in a DocSet""",
+            value (str | list[str], required)
+            The value of the property to be filtering for in a DocSet. Must be a list of values when operator is
+            "in", and a list of exactly 2 values (the inclusive lower and upper bounds) when operator is "between".""",
     )
 
-    property_type: Literal["str", "int", "bool"] = Field(
+    property_type: Literal["str", "int", "float", "bool", "date"] = Field(
         ...,
         description="""
             property_type (str, required)
-            The type of the property specified in the DocSet. It MUST match the type of the property in the DocSet. There are 3 possible values:
-            str:  A string
-            int:  A number
-            bool: A boolean
+            The type of the property specified in the DocSet. It MUST match the type of the property in the DocSet. There are 5 possible values:
+            str:   A string
+            int:   A whole number
+            float: A decimal number
+            bool:  A boolean
+            date:  A date in ISO format, e.g. 2024-12-31
             """,
     )
 
-    operator: Literal["=", ">", "<", ">=", "<=", "<>", "like"] = Field(
+    operator: Literal["=", ">", "<", ">=", "<=", "<>", "like", "in", "between"] = Field(
         ...,
         description="""
             operator (str, required)
-            The comparison operator for the property being filtered. There are 7 possible values:
-            like:  Documents or elements where the property contains the value
-            =:     Documents or elements where the property is equal to the value
-            >:     Documents or elements where the property is greater than the value
-            <:     Documents or elements where the property is less than the value
-            >=:    Documents or elements where the property is greater than or equal to the value
-            <=:    Documents or elements where the property is less than or equal to the value
-            <>:    Documents or elements where the property is not the value""",
+            The comparison operator for the property being filtered. There are 9 possible values:
+            like:     Documents or elements where the property contains the value
+            =:        Documents or elements where the property is equal to the value
+            >:        Documents or elements where the property is greater than the value
+            <:        Documents or elements where the property is less than the value
+            >=:       Documents or elements where the property is greater than or equal to the value
+            <=:       Documents or elements where the property is less than or equal to the value
+            <>:       Documents or elements where the property is not the value
+            in:       Documents or elements where the property is equal to any of the values
+            between:  Documents or elements where the property is between the 2 values, inclusive""",
     )
+
+    @model_validator(mode="after")
+    def validate_value_shape(self) -> "PropertiesFilterModel":
+        if self.operator == "in" and (not isinstance(self.value, list) or not self.value):
+            raise ValueError("The 'in' operator requires a non-empty list of values")
+        if self.operator == "between" and (not isinstance(self.value, list) or len(self.value) != 2):
+            raise ValueError("The 'between' operator requires a list of exactly 2 values")
+        if self.operator not in ("in", "between") and isinstance(self.value, list):
+            raise ValueError(f"The '{self.operator}' operator requires a single value")
+        return self
+
+
+class PropertiesFilterGroupModel(BaseModel):
+    """
+    Schema for combining properties filters with a logical operator
+
+    Attributes:
+        logical_operator
+        filters
+    """
+
+    logical_operator: Literal["and", "or", "not"] = Field(
+        ...,
+        description="""
+            logical_operator (str, required)
+            How the filters of this group are combined. There are 3 possible values:
+            and:  Documents or elements that match every filter
+            or:   Documents or elements that match at least one filter
+            not:  Documents or elements that do not match the filter. Requires exactly 1 filter""",
+    )
+
+    filters: list["PropertiesFilterModel | PropertiesFilterGroupModel"] = Field(
+        ...,
+        min_length=1,
+        description="""
+            filters (list[PropertiesFilterModel | PropertiesFilterGroupModel], required)
+            The filters to combine. Groups can be nested to build expressions like (A OR B) AND NOT C""",
+    )
+
+    @model_validator(mode="after")
+    def validate_not_has_single_filter(self) -> "PropertiesFilterGroupModel":
+        if self.logical_operator == "not" and len(self.filters) != 1:
+            raise ValueError("The 'not' logical operator requires exactly 1 filter")
+        return self
@@ -9,6 +9,10 @@ class QueryArynDocSetModel(BaseModel):
         docset_id (str, required)
         query (str, required)
         summarize_result (bool, optional)
+        max_docs (int, optional)
+        max_summary_chars (int, optional)
+        deadline_seconds (float, optional)
+        max_staleness_seconds (float, optional)
     """
 
     docset_id: str = Field(
@@ -31,3 +35,39 @@ class QueryArynDocSetModel(BaseModel):
             summarize_result (bool, optional)
             Whether to summarize the result of the query.""",
     )
+
+    max_docs: int | None = Field(
+        None,
+        ge=1,
+        description="""
+            max_docs (int, optional)
+            Stop the query as soon as this many documents have been found. Default value is None, which waits for
+            the query to finish.""",
+    )
+
+    max_summary_chars: int | None = Field(
+        None,
+        ge=1,
+        description="""
+            max_summary_chars (int, optional)
+            Stop the query as soon as the summary is this many characters long. The summary is cut to this length.
+            Default value is None, which waits for the query to finish.""",
+    )
+
+    deadline_seconds: float | None = Field(
+        None,
+        gt=0,
+        description="""
+            deadline_seconds (float, optional)
+            Stop the query after this many seconds and return what has been found so far. Default value is None,
+            which uses the deadline configured for the tool.""",
+    )
+
+    max_staleness_seconds: float | None = Field(
+        None,
+        ge=0,
+        description="""
+            max_staleness_seconds (float, optional)
+            The oldest cached result, in seconds, that may be returned instead of running the query again.
+            Set it to 0 to always run the query. Default value is None, which uses the server's configured limit.""",
+    )
@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+
+
+class QueryArynDocSetsModel(BaseModel):
+    """
+    Input schema for query_aryn_docsets()
+
+    Attributes:
+        docset_ids (list[str], required)
+        query (str, required)
+        summarize_result (bool, optional)
+        deadline_seconds (float, optional)
+    """
+
+    docset_ids: list[str] = Field(
+        ...,
+        min_length=1,
+        description="""
+            docset_ids (list[str], required)
+            The ids of the docsets to query. All docsets are queried concurrently.""",
+    )
+
+    query: str = Field(
+        ...,
+        description="""
+            query (str, required)
+            The query to search for in the docsets.  """,
+    )
+
+    summarize_result: bool = Field(
+        False,
+        description="""
+            summarize_result (bool, optional)
+            Whether to summarize the result of the query in each docset.""",
+    )
+
+    deadline_seconds: float = Field(
+        300.0,
+        gt=0,
+        description="""
+            deadline_seconds (float, optional)
+            The deadline for the queries of all docsets. Docsets that have not finished by then are stopped and
+            return what they have found so far, marked with stopped_early and listed in partial_docset_ids. Docsets
+            that do not stop within a few seconds are reported in timed_out_docset_ids. Default value is 300""",
+    )
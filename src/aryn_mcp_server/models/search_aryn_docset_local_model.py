@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+
+class SearchArynDocSetLocalModel(BaseModel):
+    """
+    Input schema for search_aryn_docset_local()
+
+    Attributes:
+        docset_id
+        query
+        query_type
+        return_type
+        page_size
+        fallback_to_remote
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet you are searching over""",
+    )
+
+    query: str = Field(
+        ...,
+        min_length=1,
+        description="""
+            query (str, required)
+            The term you are searching for within the contents of your documents""",
+    )
+
+    query_type: Literal["keyword", "lexical"] = Field(
+        "lexical",
+        description="""
+            query_type (str, optional)
+            An enum that can be either 2 values:
+            keyword:  Results that contain the query as a substring
+            lexical:  Results that contain every word of the query as a standalone word
+            Default value is lexical""",
+    )
+
+    return_type: Literal["doc", "element"] = Field(
+        "doc",
+        description="""
+            return_type (str, optional)
+            An enum that an be either 2 values:
+            doc:      Documents are returned, ranked by their best matching element
+            element:  The matching elements are returned with their text
+            Default value is doc""",
+    )
+
+    page_size: int = Field(
+        10,
+        gt=0,
+        description="""
+            page_size (int, optional)
+            The number of results to return. Default value is 10""",
+    )
+
+    fallback_to_remote: bool = Field(
+        True,
+        description="""
+            fallback_to_remote (bool, optional)
+            Search the DocSet with the Aryn API when nothing matches locally. Default value is True""",
+    )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, model_validator
 from typing import Literal
-from .properties_filter_model import PropertiesFilterModel
+from .properties_filter_model import PropertiesFilterModel, PropertiesFilterGroupModel
 
 
 class SearchArynDocSetModel(BaseModel):
@@ -57,12 +57,14 @@ class SearchArynDocSetModel(BaseModel):
             hybrid:   A mix of vector and lexical""",
     )
 
-    properties_filter: list[PropertiesFilterModel] | None = Field(
+    properties_filter: list[PropertiesFilterModel | PropertiesFilterGroupModel] | None = Field(
         None,
         description="""
-            properties_filter (str | None, optional)
-            A list of schemas that help create an expression that specifies the condition to use when extract
-            extracting documents or elements from the docset. Default value is None""",
+            properties_filter (list[PropertiesFilterModel | PropertiesFilterGroupModel] | None, optional)
+            A list of filters that help create an expression that specifies the condition to use when
+            extracting documents or elements from the docset. The filters in the list are ANDed together;
+            use a PropertiesFilterGroupModel to combine filters with "or" or "not" instead, e.g. to match
+            documents whose state is CA or NY in a single search. Default value is None""",
     )
 
     page_size: int = Field(
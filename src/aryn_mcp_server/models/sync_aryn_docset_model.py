@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+
+
+class SyncArynDocSetModel(BaseModel):
+    """
+    Input schema for sync_aryn_docset()
+
+    Attributes:
+        docset_id
+        full_refresh
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet whose documents are mirrored locally""",
+    )
+
+    full_refresh: bool = Field(
+        False,
+        description="""
+            full_refresh (bool, optional)
+            Fetch every document again instead of only documents added since the last sync. Needed when documents
+            or their properties were changed by another client. Default value is False""",
+    )
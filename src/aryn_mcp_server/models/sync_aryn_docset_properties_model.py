@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+
+
+class SyncArynDocSetPropertiesModel(BaseModel):
+    """
+    Input schema for sync_aryn_docset_properties()
+
+    Attributes:
+        docset_id
+        full_refresh
+    """
+
+    docset_id: str = Field(
+        ...,
+        description="""
+            docset_id (str, required)
+            The unique identifier of the DocSet whose document properties are copied locally""",
+    )
+
+    full_refresh: bool = Field(
+        False,
+        description="""
+            full_refresh (bool, optional)
+            Fetch the properties of every document again instead of only those of documents added since the
+            last sync. Needed when properties were extracted or deleted by another client. Default value is False""",
+    )
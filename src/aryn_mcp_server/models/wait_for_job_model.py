@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+
+
+class WaitForJobModel(BaseModel):
+    """
+    Input schema for wait_for_job()
+
+    Attributes:
+        job_id
+        timeout_seconds
+    """
+
+    job_id: str = Field(
+        ...,
+        description="""
+            job_id (str, required)
+            The unique identifier of the job, as returned by the tool that submitted it""",
+    )
+
+    timeout_seconds: float = Field(
+        600.0,
+        gt=0,
+        description="""
+            timeout_seconds (float, optional)
+            How long to wait for the job to finish. If it is still running by then, its current status is
+            returned and the job keeps running. Default value is 600""",
+    )
@@ -0,0 +1,46 @@
+import asyncio
+
+from typing import Any, Awaitable, Callable
+
+from ..models import ToolCallModel
+
+
+def _failed(result: dict) -> bool:
+    # Tools report most failures by returning an error rather than raising
+    return "error" in result or (isinstance(result["result"], dict) and "error" in result["result"])
+
+
+async def run_batch(
+    calls: list[ToolCallModel],
+    call_tool: Callable[[str, dict[str, Any]], Awaitable[Any]],
+    max_concurrency: int,
+    on_progress: Callable[[str, float | None, float | None], None] | None = None,
+) -> list[dict]:
+    """Makes each call as soon as the calls it depends on have succeeded, at most max_concurrency at a time, and
+    returns the result or error of each call in order. A call whose dependency failed is skipped."""
+    slots = asyncio.Semaphore(max_concurrency)
+    finished = 0
+    tasks: list[asyncio.Task] = []
+
+    async def call(tool_call: ToolCallModel) -> dict:
+        for dependency in tool_call.depends_on:
+            if _failed(await tasks[dependency]):
+                return {"tool": tool_call.tool, "error": f"Skipped because call {dependency} failed"}
+
+        async with slots:
+            try:
+                return {"tool": tool_call.tool, "result": await call_tool(tool_call.tool, tool_call.arguments)}
+            except Exception as e:
+                return {"tool": tool_call.tool, "error": str(e)}
+
+    async def run(position: int, tool_call: ToolCallModel) -> dict:
+        nonlocal finished
+        result = await call(tool_call)
+        finished += 1
+        if on_progress is not None:
+            on_progress(f"Call {position} ({tool_call.tool}) finished", finished, len(calls))
+        return result
+
+    # Every task exists before any of them runs, so calls can wait for the calls they depend on
+    tasks.extend(asyncio.create_task(run(position, tool_call)) for position, tool_call in enumerate(calls))
+    return await asyncio.gather(*tasks)
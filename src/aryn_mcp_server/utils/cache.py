@@ -0,0 +1,356 @@
+import json
+import time
+import inspect
+import sqlite3
+import weakref
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+
+class _Listeners:
+    """Callbacks for one kind of DocSet change
+
+    Bound methods are held weakly, so registering the caches of a manager does not keep them alive after the manager
+    is gone. Other callables are held until they are unregistered.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listeners: list[weakref.WeakMethod | Callable[[str], None]] = []
+
+    def add(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Registers listener and returns a function that unregisters it"""
+        entry: weakref.WeakMethod | Callable[[str], None] = listener
+        if inspect.ismethod(listener):
+            entry = weakref.WeakMethod(listener)
+        with self._lock:
+            self._listeners.append(entry)
+
+        def remove() -> None:
+            with self._lock:
+                if entry in self._listeners:
+                    self._listeners.remove(entry)
+
+        return remove
+
+    def notify(self, docset_id: str) -> None:
+        with self._lock:
+            # Drop the methods of objects that no longer exist
+            self._listeners = [entry for entry in self._listeners if _resolve(entry) is not None]
+            listeners = [_resolve(entry) for entry in self._listeners]
+        for listener in listeners:
+            if listener is not None:
+                listener(docset_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(_resolve(entry) is not None for entry in self._listeners)
+
+
+def _resolve(entry: weakref.WeakMethod | Callable[[str], None]) -> Callable[[str], None] | None:
+    return entry() if isinstance(entry, weakref.WeakMethod) else entry
+
+
+_docset_change_listeners = _Listeners()
+
+
+def on_docset_changed(listener: Callable[[str], None]) -> Callable[[], None]:
+    """Registers a callback that is called with the docset_id of every DocSet this process modifies. Returns a
+    function that unregisters it."""
+    return _docset_change_listeners.add(listener)
+
+
+def notify_docset_changed(docset_id: str) -> None:
+    _docset_change_listeners.notify(docset_id)
+
+
+_docset_properties_change_listeners = _Listeners()
+
+
+def on_docset_properties_changed(listener: Callable[[str], None]) -> Callable[[], None]:
+    """Registers a callback that is called with the docset_id of every DocSet whose properties this process
+    extracted or deleted, i.e. changed for potentially every document at once. Returns a function that unregisters
+    it."""
+    return _docset_properties_change_listeners.add(listener)
+
+
+def notify_docset_properties_changed(docset_id: str) -> None:
+    notify_docset_changed(docset_id)
+    _docset_properties_change_listeners.notify(docset_id)
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries expire after ttl_seconds and can be dropped per DocSet"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, tuple[float, str | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Any, docset_id: str | None = None) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), docset_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_docset(self, docset_id: str) -> None:
+        with self._lock:
+            stale_keys = [key for key, (_, entry_docset_id, _) in self._entries.items() if entry_docset_id == docset_id]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+class QueryResultCache:
+    """A SQLite-backed cache of DocSet query results that survives server restarts
+
+    Results older than max_staleness_seconds are ignored, and a DocSet's results are deleted whenever this
+    process modifies the DocSet. Other processes sharing the same file see those deletions too.
+    """
+
+    def __init__(self, path: Path, max_staleness_seconds: float):
+        self.path = path
+        self.max_staleness_seconds = max_staleness_seconds
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_results (
+                docset_id TEXT NOT NULL,
+                query TEXT NOT NULL,
+                summarize_result INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                cached_at REAL NOT NULL,
+                PRIMARY KEY (docset_id, query, summarize_result)
+            )
+            """
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_staleness_seconds > 0
+
+    def get(
+        self, docset_id: str, query: str, summarize_result: bool, max_staleness_seconds: float | None = None
+    ) -> dict | None:
+        if max_staleness_seconds is None:
+            max_staleness_seconds = self.max_staleness_seconds
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result, cached_at FROM query_results WHERE docset_id = ? AND query = ? AND summarize_result = ?",
+                (docset_id, query.strip(), int(summarize_result)),
+            ).fetchone()
+            if row is None or time.time() - row[1] > max_staleness_seconds:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {**json.loads(row[0]), "cached_at": datetime.fromtimestamp(row[1], timezone.utc).isoformat()}
+
+    def put(self, docset_id: str, query: str, summarize_result: bool, result: dict) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO query_results VALUES (?, ?, ?, ?, ?)",
+                (docset_id, query.strip(), int(summarize_result), json.dumps(result), time.time()),
+            )
+
+    def invalidate_docset(self, docset_id: str) -> None:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM query_results WHERE docset_id = ?", (docset_id,))
+            self.invalidations += cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._connection.execute("SELECT COUNT(*) FROM query_results").fetchone()[0],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "max_staleness_seconds": self.max_staleness_seconds,
+                "path": str(self.path),
+            }
+
+
+class RefreshingCache:
+    """A thread-safe cache that keeps serving an entry while reloading it in the background once it is stale
+
+    Entries younger than fresh_seconds are returned as is. Entries between fresh_seconds and max_stale_seconds old
+    are returned immediately while a background reload replaces them. Older entries are reloaded synchronously.
+    """
+
+    _refresh_executor: ThreadPoolExecutor | None = None
+
+    def __init__(self, fresh_seconds: float, max_stale_seconds: float, max_entries: int = 1024):
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max(max_stale_seconds, fresh_seconds)
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # Bumped when a key is invalidated while it loads, so a load that started earlier cannot put outdated data
+        # back. Only keys with loads in flight are tracked.
+        self._generations: dict[Hashable, int] = {}
+        self._loads: dict[Hashable, int] = {}
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.fresh_seconds > 0 and self.max_entries > 0
+
+    @classmethod
+    def _get_refresh_executor(cls) -> ThreadPoolExecutor:
+        if cls._refresh_executor is None:
+            cls._refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        return cls._refresh_executor
+
+    def _start_load(self, key: Hashable) -> int:
+        # Called with the lock held
+        self._loads[key] = self._loads.get(key, 0) + 1
+        return self._generations.get(key, 0)
+
+    def _finish_load(self, key: Hashable, value: Any, generation: int) -> None:
+        with self._lock:
+            if value is not None and self._generations.get(key, 0) == generation:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+            self._loads[key] -= 1
+            if not self._loads[key]:
+                del self._loads[key]
+                self._generations.pop(key, None)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], generation: int) -> None:
+        value = None
+        try:
+            value = loader()
+        except Exception:
+            # The stale entry keeps being served until it expires; the next synchronous load reports the error
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            self._finish_load(key, value, generation)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for key, calling loader to fill or refresh it. None values are not cached."""
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= self.fresh_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+
+                if age <= self.max_stale_seconds:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self.refreshes += 1
+                        self._get_refresh_executor().submit(self._refresh, key, loader, self._start_load(key))
+                    return entry[1]
+
+            self.misses += 1
+            generation = self._start_load(key)
+
+        value = None
+        try:
+            value = loader()
+            return value
+        finally:
+            self._finish_load(key, value, generation)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._loads:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "background_refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "fresh_seconds": self.fresh_seconds,
+                "max_stale_seconds": self.max_stale_seconds,
+            }
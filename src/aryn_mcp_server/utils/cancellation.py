@@ -0,0 +1,231 @@
+import time
+import asyncio
+import functools
+import threading
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import BinaryIO, Callable, Iterator, TypeVar
+
+from .utils import get_env_float
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a tool call runs out of time, naming what it was doing"""
+
+
+class CancellationToken:
+    """Lets a tool call tell the worker thread doing its blocking work to stop
+
+    A token is cancelled either explicitly, e.g. when the MCP client cancels the request, or implicitly once its
+    deadline passes. Workers poll it between units of work.
+    """
+
+    def __init__(self, deadline_seconds: float | None = None, tool: str | None = None):
+        self.deadline_seconds = deadline_seconds
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+        self.tool = tool
+        self.reason: str | None = None
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Calls callback once the token is cancelled, or right away if it already was, e.g. to stop a blocking read
+        that does not poll the token. A passed deadline only counts once something checks the token. Returns a
+        function that unregisters the callback."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def remove() -> None:
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+
+                return remove
+        callback()
+        return lambda: None
+
+    def follow(self, parent: "CancellationToken") -> Callable[[], None]:
+        """Makes this token stop no later than parent, e.g. a call made by a batch once the batch is cancelled or
+        runs out of time. Returns a function that unlinks them."""
+        if parent.deadline is not None and (self.deadline is None or parent.deadline < self.deadline):
+            self.deadline, self.deadline_seconds = parent.deadline, parent.remaining()
+        return parent.on_cancel(lambda: self.cancel(parent.reason or "cancelled"))
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def error(self) -> DeadlineExceeded:
+        """The error to raise for work stopped by this token, saying which phase was running"""
+        tool = self.tool or "The request"
+        if self.reason == "deadline exceeded":
+            return DeadlineExceeded(f"{tool} ran out of time after {self.deadline_seconds:g}s while {current_phase()}")
+        return DeadlineExceeded(f"{tool} was {self.reason or 'cancelled'} while {current_phase()}")
+
+
+# The token of the tool call running in this context, so that the HTTP layer can see its deadline
+_current_cancellation: ContextVar[CancellationToken | None] = ContextVar("current_cancellation", default=None)
+_current_phase: ContextVar[str] = ContextVar("current_phase", default="calling the Aryn API")
+
+
+def current_cancellation() -> CancellationToken | None:
+    return _current_cancellation.get()
+
+
+def current_phase() -> str:
+    return _current_phase.get()
+
+
+@contextmanager
+def use_cancellation(cancellation: CancellationToken | None) -> Iterator[CancellationToken | None]:
+    reset_token = _current_cancellation.set(cancellation)
+    try:
+        yield cancellation
+    finally:
+        _current_cancellation.reset(reset_token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Names what the current tool call is doing, for the error raised if it runs out of time meanwhile"""
+    reset_token = _current_phase.set(name)
+    try:
+        yield
+    finally:
+        _current_phase.reset(reset_token)
+
+
+def wait_for(event: threading.Event) -> None:
+    """Waits for event, but no longer than the current tool call may run"""
+    cancellation = _current_cancellation.get()
+    while not event.wait(cancellation.remaining() if cancellation is not None else None):
+        check_cancellation()
+
+
+def check_cancellation() -> None:
+    """Raises the current tool call's DeadlineExceeded if it was cancelled or ran out of time"""
+    cancellation = _current_cancellation.get()
+    if cancellation is not None and cancellation.cancelled:
+        raise cancellation.error()
+
+
+def propagate_cancellation(function: Callable[..., T]) -> Callable[..., T]:
+    """Makes function see the calling context's tool call token and phase when an executor runs it on another
+    thread, which unlike asyncio.to_thread does not copy context variables"""
+    cancellation = _current_cancellation.get()
+    phase_name = _current_phase.get()
+
+    @functools.wraps(function)
+    def run(*args, **kwargs) -> T:
+        with use_cancellation(cancellation), phase(phase_name):
+            # Work still queued when its tool call is cancelled is skipped
+            check_cancellation()
+            return function(*args, **kwargs)
+
+    return run
+
+
+def get_tool_deadline(tool: str) -> float | None:
+    """Returns the seconds a tool may run, from ARYN_MCP_TOOL_DEADLINE_<TOOL> or else ARYN_MCP_TOOL_DEADLINE"""
+    deadline_seconds = get_env_float(
+        f"ARYN_MCP_TOOL_DEADLINE_{tool.upper()}", get_env_float("ARYN_MCP_TOOL_DEADLINE", 900.0)
+    )
+    return deadline_seconds if deadline_seconds > 0 else None
+
+
+class CancellationFlag:
+    """Adapts a CancellationToken to the cancel_flag that the Aryn SDK's partition_file polls between chunks"""
+
+    def __init__(self, cancellation: CancellationToken | None):
+        self.cancellation = cancellation
+
+    def get(self) -> bool:
+        return self.cancellation is not None and self.cancellation.cancelled
+
+
+class CancellableFile:
+    """Wraps a file being uploaded so that the upload stops at its next chunk once the tool call is cancelled, and
+    optionally reports the position read up to after every chunk"""
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        cancellation: CancellationToken | None,
+        on_read: Callable[[int], None] | None = None,
+    ):
+        self.file = file
+        self.cancellation = cancellation
+        self.on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        if self.cancellation is not None and self.cancellation.cancelled:
+            raise self.cancellation.error()
+        chunk = self.file.read(size)
+        if self.on_read is not None:
+            self.on_read(self.file.tell())
+        return chunk
+
+    def __getattr__(self, name: str):
+        return getattr(self.file, name)
+
+
+def with_deadline(tool: Callable[..., T]) -> Callable[..., T]:
+    """Runs a tool under a CancellationToken whose deadline is the tool's deadline_seconds argument if it has one,
+    and otherwise the configured deadline of the tool. Its HTTP calls are given at most the time left. A tool called
+    under another token, e.g. by execute_batch, also stops when that token does."""
+
+    @contextmanager
+    def tool_cancellation(args: tuple, kwargs: dict) -> Iterator[CancellationToken]:
+        tool_args = kwargs.get("args", args[0] if args else None)
+        deadline_seconds = getattr(tool_args, "deadline_seconds", None) or get_tool_deadline(tool.__name__)
+        cancellation = CancellationToken(deadline_seconds, tool=tool.__name__)
+        parent = _current_cancellation.get()
+        unlink = cancellation.follow(parent) if parent is not None else None
+        try:
+            with use_cancellation(cancellation):
+                yield cancellation
+        finally:
+            if unlink is not None:
+                unlink()
+
+    if asyncio.iscoroutinefunction(tool):
+
+        @functools.wraps(tool)
+        async def run_async(*args, **kwargs):
+            with tool_cancellation(args, kwargs) as cancellation:
+                try:
+                    return await tool(*args, **kwargs)
+                except asyncio.CancelledError:
+                    cancellation.cancel("cancelled by the client")
+                    raise
+
+        return run_async
+
+    @functools.wraps(tool)
+    def run(*args, **kwargs):
+        with tool_cancellation(args, kwargs):
+            return tool(*args, **kwargs)
+
+    return run
@@ -0,0 +1,138 @@
+import csv
+import json
+
+from pathlib import Path
+from typing import Any, Callable, Protocol
+
+
+def flatten_properties(properties: dict, prefix: str = "") -> dict:
+    """Flattens nested properties into a single level whose keys are joined with dots"""
+    flat = {}
+    for key, value in properties.items():
+        if isinstance(value, dict):
+            flat.update(flatten_properties(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def column_type(field_type: str | None) -> str:
+    """Maps a DocSet schema field type to the type of the column its values are stored or exported in"""
+    if field_type in ("int", "float", "bool"):
+        return field_type
+    if field_type in ("date", "datetime"):
+        return "date"
+    return "str"
+
+
+def schema_column_types(schema: list[dict] | None) -> dict[str, str]:
+    """Returns the column type of each property of a DocSet schema, in schema order"""
+    return {field["name"]: column_type(field.get("property_type")) for field in schema or []}
+
+
+class PropertiesWriter(Protocol):
+    path: Path
+
+    def write_rows(self, rows: list[dict]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def require_pyarrow() -> None:
+    """Raises a clear error if pyarrow, which Parquet exports need, is not installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise Exception(
+            "Exporting to Parquet requires pyarrow, install the server with its parquet extra, e.g. "
+            "`pip install 'aryn-mcp-server[parquet]'`"
+        ) from e
+
+
+def unwrap_entity(properties: Any) -> Any:
+    """Returns the extracted properties that Aryn nests under "entity" keys"""
+    while isinstance(properties, dict) and "entity" in properties:
+        properties = properties["entity"]
+    return properties
+
+
+def get_listed_document_properties(doc: Any, fetch_properties: Callable[[str], dict | None]) -> dict:
+    """Returns the extracted properties of a listed document, fetching them with fetch_properties(doc_id) when the
+    listing does not include them"""
+    properties = doc.properties
+    if properties is None:
+        # Listings don't always include properties, in which case the document has to be fetched
+        properties = fetch_properties(doc.doc_id)
+    properties = unwrap_entity(properties or {})
+    return properties if isinstance(properties, dict) else {}
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class CSVPropertiesWriter:
+    """Writes rows of document properties to a CSV file as they arrive"""
+
+    def __init__(self, path: Path, columns: dict[str, str]):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(columns), extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write_rows(self, rows: list[dict]) -> None:
+        self._writer.writerows({column: _csv_value(value) for column, value in row.items()} for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetPropertiesWriter:
+    """Writes rows of document properties to a Parquet file, one row group per batch
+
+    Columns get the Arrow type matching their schema field type. Values that cannot be converted to it, e.g. an
+    extracted "unknown" in an int field, are written as nulls.
+    """
+
+    def __init__(self, path: Path, columns: dict[str, str]):
+        require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+        self.path = path
+        self.columns = columns
+        self._pa = pa
+        self._schema = pa.schema(
+            [(column, arrow_types.get(field_type, pa.string())) for column, field_type in columns.items()]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    @staticmethod
+    def _convert(value: Any, field_type: str) -> Any:
+        if value is None:
+            return None
+        try:
+            if field_type == "int":
+                return int(value) if not isinstance(value, bool) else None
+            if field_type == "float":
+                return float(value) if not isinstance(value, bool) else None
+            if field_type == "bool":
+                if isinstance(value, bool):
+                    return value
+                return {"true": True, "false": False}.get(str(value).lower())
+        except (TypeError, ValueError):
+            return None
+        return value if isinstance(value, str) else json.dumps(value, default=str)
+
+    def write_rows(self, rows: list[dict]) -> None:
+        converted_rows = [
+            {column: self._convert(row.get(column), field_type) for column, field_type in self.columns.items()}
+            for row in rows
+        ]
+        self._writer.write_table(self._pa.Table.from_pylist(converted_rows, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
@@ -0,0 +1,167 @@
+import math
+import time
+import threading
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, TypeVar
+
+from .cancellation import propagate_cancellation
+from .resilience import RetryBudget
+from .utils import get_env_bool, get_env_float
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Keeps the latencies of the last max_samples calls of an operation"""
+
+    def __init__(self, max_samples: int = 256):
+        self._lock = threading.Lock()
+        self._samples: deque[float] = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(math.ceil(len(samples) * percentile / 100) - 1, len(samples) - 1)]
+
+
+class Hedger:
+    """Sends a second copy of a slow idempotent read and returns whichever copy answers first
+
+    The copy is sent once the read has taken longer than the given percentile of the operation's recent
+    latencies, so only the slowest reads are hedged. Hedges are capped by a budget of a fraction of recent reads,
+    which keeps them from doubling the load when the service is slow for everyone. Reads are not hedged until
+    min_samples latencies are known, and run on the caller's thread until then. The losing copy runs to completion
+    in the background and is discarded.
+
+    The caller has to stay free to return whichever copy answers first, so a read that may be hedged starts on a
+    thread of its own rather than in a pool, where it could queue behind other reads and delay its hedge. Only
+    hedges, which the budget keeps rare, go through the pool of max_workers threads.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        budget: RetryBudget,
+        min_delay_seconds: float = 0.05,
+        min_samples: int = 20,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay_seconds = min_delay_seconds
+        self.min_samples = min_samples
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._trackers: dict[str, LatencyTracker] = {}
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_denied = 0
+        self.hedge_wins = 0
+
+    def _tracker(self, operation: str) -> LatencyTracker:
+        with self._lock:
+            if operation not in self._trackers:
+                self._trackers[operation] = LatencyTracker()
+            return self._trackers[operation]
+
+    def hedge_delay(self, operation: str) -> float | None:
+        tracker = self._tracker(operation)
+        latency = tracker.percentile(self.percentile) if len(tracker) >= self.min_samples else None
+        if latency is None:
+            return None
+        return max(latency, self.min_delay_seconds)
+
+    def _timed(self, operation: str, function: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = function()
+        self._tracker(operation).record(time.perf_counter() - start)
+        return result
+
+    def call(self, operation: str, function: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+        self.budget.record_request()
+
+        delay = self.hedge_delay(operation)
+        if delay is None:
+            return self._timed(operation, function)
+
+        function = propagate_cancellation(function)
+        primary: Future = Future()
+        threading.Thread(
+            target=self._run, args=(primary, operation, function), name="hedge-primary", daemon=True
+        ).start()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not self.budget.try_spend():
+            with self._lock:
+                self.hedges_denied += 1
+            return primary.result()
+
+        with self._lock:
+            self.hedges += 1
+        hedge = self._executor.submit(self._timed, operation, function)
+
+        pending: set[Future] = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # A copy that failed only loses if the other one can still answer
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded or not pending:
+                winner = succeeded[0] if succeeded else primary
+                if winner is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return winner.result()
+
+    def _run(self, future: Future, operation: str, function: Callable[[], T]) -> None:
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(self._timed(operation, function))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            operations = list(self._trackers)
+            stats: dict[str, Any] = {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedges_denied": self.hedges_denied,
+                "hedge_wins": self.hedge_wins,
+            }
+        stats["delays_ms"] = {operation: (self.hedge_delay(operation) or 0.0) * 1000 for operation in operations}
+        return stats
+
+
+_hedger: Hedger | None = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger | None:
+    """Returns the Hedger shared by every read of the Aryn API, or None if hedging is disabled"""
+    global _hedger
+    if not get_env_bool("ARYN_MCP_HEDGE", False):
+        return None
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger(
+                percentile=get_env_float("ARYN_MCP_HEDGE_PERCENTILE", 95.0),
+                budget=RetryBudget(ratio=get_env_float("ARYN_MCP_HEDGE_BUDGET_RATIO", 0.1), min_retries_per_second=0.0),
+            )
+        return _hedger
@@ -0,0 +1,170 @@
+import time
+import threading
+
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+
+class Job:
+    """A long-running Aryn task submitted by this server"""
+
+    __slots__ = (
+        "job_id",
+        "kind",
+        "docset_id",
+        "status",
+        "submitted_at",
+        "finished_at",
+        "result",
+        "error",
+        "polls",
+        "_check",
+        "_on_finished",
+        "_next_poll_at",
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        kind: str,
+        docset_id: str,
+        check: Callable[[], Any | None],
+        on_finished: Callable[["Job"], None] | None = None,
+    ):
+        self.job_id = job_id
+        self.kind = kind
+        self.docset_id = docset_id
+        self.status = "running"
+        self.submitted_at = datetime.now(timezone.utc)
+        self.finished_at: datetime | None = None
+        self.result: Any | None = None
+        self.error: str | None = None
+        self.polls = 0
+        self._check = check
+        self._on_finished = on_finished
+        self._next_poll_at = time.monotonic()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def as_dict(self) -> dict:
+        job_info = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "docset_id": self.docset_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.result is not None:
+            job_info["result"] = self.result
+        if self.error is not None:
+            job_info["error"] = self.error
+        return job_info
+
+
+class JobRegistry:
+    """Tracks the jobs submitted by this server and polls them with a backoff that grows while they run
+
+    A poll is a single non-blocking status request. Callers that want to wait sleep for next_poll_delay() between
+    polls, so short jobs are noticed quickly and long ones are not polled more than every max_poll_interval seconds.
+    A background thread polls running jobs on the same schedule, so that jobs finish, and the caches they made stale
+    are invalidated, even when no client asks about them. It stops once no job is running.
+    """
+
+    def __init__(
+        self,
+        initial_poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        poll_backoff: float = 1.5,
+        max_finished_jobs: int = 1000,
+        poll_in_background: bool = True,
+    ):
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.max_finished_jobs = max_finished_jobs
+        self.poll_in_background = poll_in_background
+
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._poller: threading.Thread | None = None
+        self._poller_wake = threading.Event()
+
+    def submit(self, job: Job) -> Job:
+        with self._lock:
+            job._next_poll_at = time.monotonic() + self.initial_poll_interval
+            self._jobs[job.job_id] = job
+            if self.poll_in_background:
+                self._poller_wake.set()
+                if self._poller is None:
+                    self._poller = threading.Thread(target=self._poll_running_jobs, name="job-poller", daemon=True)
+                    self._poller.start()
+
+            finished_jobs = [j for j in self._jobs.values() if j.finished]
+            for finished_job in finished_jobs[: max(len(finished_jobs) - self.max_finished_jobs, 0)]:
+                del self._jobs[finished_job.job_id]
+
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise Exception(f"Unknown job {job_id}. Jobs are only tracked by the server that submitted them")
+        return job
+
+    def poll(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job.finished:
+            return job
+
+        job.polls += 1
+        job._next_poll_at = time.monotonic() + self._poll_delay(job)
+        try:
+            result = job._check()
+            if result is None:
+                return job
+            status, error = "succeeded", None
+        except Exception as e:
+            result, status, error = None, "failed", str(e)
+
+        with self._lock:
+            # Concurrent polls can both see the job finish; only the first one records it
+            if job.finished:
+                return job
+            job.result, job.status, job.error = result, status, error
+            job.finished_at = datetime.now(timezone.utc)
+
+        if job._on_finished is not None:
+            job._on_finished(job)
+        return job
+
+    def next_poll_delay(self, job_id: str) -> float:
+        return self._poll_delay(self.get(job_id))
+
+    def _poll_delay(self, job: Job) -> float:
+        return min(self.initial_poll_interval * self.poll_backoff ** max(job.polls - 1, 0), self.max_poll_interval)
+
+    def _poll_running_jobs(self) -> None:
+        while True:
+            with self._lock:
+                running = [job for job in self._jobs.values() if not job.finished]
+                if not running:
+                    self._poller = None
+                    return
+                self._poller_wake.clear()
+
+            for job in running:
+                if time.monotonic() >= job._next_poll_at:
+                    try:
+                        self.poll(job.job_id)
+                    except Exception:
+                        # Pruned jobs and failed on_finished callbacks must not stop the polling of the others
+                        pass
+
+            with self._lock:
+                next_poll_at = min((job._next_poll_at for job in self._jobs.values() if not job.finished), default=0)
+            # Submitting a job wakes the poller early, since the new job may be due before the others
+            self._poller_wake.wait(max(next_poll_at - time.monotonic(), 0))
@@ -0,0 +1,67 @@
+import json
+import hashlib
+import sqlite3
+import threading
+
+from pathlib import Path
+
+
+def hash_schema_field(field) -> str:
+    """Hashes everything about a schema field that changes what gets extracted for it"""
+    return hashlib.sha256(json.dumps(field.model_dump(), sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ExtractionLedger:
+    """A SQLite record of which documents had which schema fields extracted by this server
+
+    A field is recorded per document together with the hash of its definition and the document's created_at, so a
+    field whose description or type changed, or a document that was replaced, shows up as not extracted.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extracted_fields (
+                docset_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                field_name TEXT NOT NULL,
+                field_hash TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (docset_id, doc_id, field_name)
+            )
+            """
+        )
+
+    def get_docset(self, docset_id: str) -> dict[tuple[str, str], tuple[str, str]]:
+        """Returns (field_hash, created_at) keyed by (doc_id, field_name) for every field recorded in a DocSet"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT doc_id, field_name, field_hash, created_at FROM extracted_fields WHERE docset_id = ?",
+                (docset_id,),
+            ).fetchall()
+        return {(doc_id, field_name): (field_hash, created_at) for doc_id, field_name, field_hash, created_at in rows}
+
+    def record(self, docset_id: str, documents: list[tuple[str, str]], field_hashes: dict[str, str]) -> None:
+        """Records that the fields in field_hashes were extracted for each (doc_id, created_at) in documents"""
+        rows = [
+            (docset_id, doc_id, field_name, field_hash, created_at)
+            for doc_id, created_at in documents
+            for field_name, field_hash in field_hashes.items()
+        ]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO extracted_fields VALUES (?, ?, ?, ?, ?)", rows)
+
+    def forget_fields(self, docset_id: str, field_names: list[str]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM extracted_fields WHERE docset_id = ? AND field_name = ?",
+                [(docset_id, field_name) for field_name in field_names],
+            )
+
+    def forget_docset(self, docset_id: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM extracted_fields WHERE docset_id = ?", (docset_id,))
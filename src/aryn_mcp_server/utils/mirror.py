@@ -0,0 +1,181 @@
+import json
+import time
+import base64
+import sqlite3
+import threading
+
+from pathlib import Path
+from typing import Any
+
+# Marks the JSON objects that stand for values JSON has no type for
+_TYPE_KEY = "__mirror_type__"
+
+
+def _encode(value: Any) -> Any:
+    """Converts a document into JSON types, tagging tuples, bytes and dicts JSON cannot hold as they are"""
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and _TYPE_KEY not in value:
+            return {key: _encode(item) for key, item in value.items()}
+        return {_TYPE_KEY: "dict", "items": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {_TYPE_KEY: "tuple", "items": [_encode(item) for item in value]}
+    if isinstance(value, bytes):
+        return {_TYPE_KEY: "bytes", "base64": base64.b64encode(value).decode()}
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"Documents holding {type(value).__name__} values cannot be mirrored")
+
+
+def _decode(value: dict) -> Any:
+    # Called by json.loads for every object, innermost first
+    if _TYPE_KEY not in value:
+        return value
+    if value[_TYPE_KEY] == "dict":
+        return {key: item for key, item in value["items"]}
+    if value[_TYPE_KEY] == "tuple":
+        return tuple(value["items"])
+    return base64.b64decode(value["base64"])
+
+
+class DocSetMirror:
+    """A SQLite copy of the properties and elements of the documents of synced DocSets
+
+    A DocSet's copy is fresh for max_staleness_seconds after its last sync, unless this process extracted or deleted
+    its properties since, which changes every document at once. Documents this process adds are not in the copy
+    until the next sync and documents it deletes are removed from it right away. Documents are stored as JSON
+    with tuples and bytes tagged, so reads from the copy return the same types as reads from the API.
+    """
+
+    # Bumped whenever the stored format changes, which drops copies in an older format
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: Path, max_staleness_seconds: float):
+        self.path = path
+        self.max_staleness_seconds = max_staleness_seconds
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != self.FORMAT_VERSION:
+            self._connection.executescript(
+                f"""
+                DROP TABLE IF EXISTS mirrored_docsets;
+                DROP TABLE IF EXISTS mirrored_documents;
+                PRAGMA user_version = {self.FORMAT_VERSION};
+                """
+            )
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS mirrored_docsets (
+                docset_id TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL,
+                properties_changes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS mirrored_documents (
+                docset_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                document TEXT NOT NULL,
+                PRIMARY KEY (docset_id, doc_id)
+            );
+            """
+        )
+
+        self.hits = 0
+        self.misses = 0
+
+    def is_fresh(self, docset_id: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT synced_at, properties_changes FROM mirrored_docsets WHERE docset_id = ?", (docset_id,)
+            ).fetchone()
+        return row is not None and not row[1] and time.time() - row[0] <= self.max_staleness_seconds
+
+    def sync_state(self, docset_id: str) -> tuple[bool, int]:
+        """Returns whether the next sync must fetch every document and the number of property changes to pass to
+        mark_synced once it completes"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT synced_at, properties_changes FROM mirrored_docsets WHERE docset_id = ?", (docset_id,)
+            ).fetchone()
+        if row is None:
+            return True, 0
+        synced_at, properties_changes = row
+        return not synced_at or bool(properties_changes), properties_changes
+
+    def doc_ids(self, docset_id: str) -> set[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT doc_id FROM mirrored_documents WHERE docset_id = ?", (docset_id,)
+            ).fetchall()
+        return {doc_id for (doc_id,) in rows}
+
+    def get_document(self, docset_id: str, doc_id: str) -> dict | None:
+        """Returns the mirrored document if the DocSet's copy is fresh"""
+        if not self.is_fresh(docset_id):
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT document FROM mirrored_documents WHERE docset_id = ? AND doc_id = ?", (docset_id, doc_id)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0], object_hook=_decode)
+
+    def put_documents(self, docset_id: str, documents: list[tuple[str, dict]]) -> None:
+        """Stores (doc_id, document) tuples, replacing earlier copies"""
+        rows = [(docset_id, doc_id, json.dumps(_encode(document))) for doc_id, document in documents]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO mirrored_documents VALUES (?, ?, ?)", rows)
+
+    def remove_documents(self, docset_id: str, doc_ids: list[str]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM mirrored_documents WHERE docset_id = ? AND doc_id = ?",
+                [(docset_id, doc_id) for doc_id in doc_ids],
+            )
+
+    def mark_synced(self, docset_id: str, properties_changes: int) -> None:
+        """Marks the DocSet's copy as fresh, unless its properties changed again since the sync read its state"""
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO mirrored_docsets VALUES (?, ?, 0) ON CONFLICT (docset_id) DO UPDATE SET
+                    synced_at = excluded.synced_at,
+                    properties_changes = CASE WHEN properties_changes = ? THEN 0 ELSE properties_changes END
+                """,
+                (docset_id, time.time(), properties_changes),
+            )
+
+    def mark_properties_changed(self, docset_id: str) -> None:
+        # DocSets that were never synced get a row too, so a change during their first sync is not lost
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO mirrored_docsets VALUES (?, 0, 1) ON CONFLICT (docset_id) DO UPDATE SET
+                    properties_changes = properties_changes + 1
+                """,
+                (docset_id,),
+            )
+
+    def remove_docset(self, docset_id: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM mirrored_documents WHERE docset_id = ?", (docset_id,))
+            self._connection.execute("DELETE FROM mirrored_docsets WHERE docset_id = ?", (docset_id,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "docsets": self._connection.execute(
+                    "SELECT COUNT(*) FROM mirrored_docsets WHERE synced_at > 0"
+                ).fetchone()[0],
+                "documents": self._connection.execute("SELECT COUNT(*) FROM mirrored_documents").fetchone()[0],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "max_staleness_seconds": self.max_staleness_seconds,
+                "path": str(self.path),
+            }
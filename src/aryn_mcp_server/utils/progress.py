@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import threading
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from mcp.server.fastmcp import Context
+
+
+class ProgressReporter:
+    """Sends MCP progress notifications for a tool call from any thread
+
+    Tools do their blocking work in worker threads, so notifications are handed back to the event loop the
+    tool is running on. Reporting is a no-op when the client did not ask for progress, which is also the case
+    when a tool is called directly instead of through an MCP session.
+    """
+
+    def __init__(self, ctx: Context):
+        self.ctx = ctx
+        self.progress = 0.0
+
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        try:
+            meta = ctx.request_context.meta
+            self.enabled = meta is not None and meta.progressToken is not None
+        except ValueError:
+            self.enabled = False
+
+    def report(self, message: str, progress: float | None = None, total: float | None = None) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            # Progress must increase with every notification
+            self.progress = max(self.progress + 1, progress or 0.0)
+            coroutine = self.ctx.report_progress(self.progress, total, message)
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+
+            if running_loop is self._loop:
+                self._loop.create_task(coroutine)
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+            except RuntimeError:
+                # The tool call already finished and its event loop is gone
+                coroutine.close()
+
+
+class PartitionStatusListener(logging.Filter):
+    """Hands the status lines the partitioning service streams ahead of its result, such as "T+   3.29: completed
+    page 3", to the partition running on the same thread
+
+    The Aryn SDK only logs these lines, at INFO level, so its logger is lowered to INFO while anyone listens. Records
+    the logger would not have let through before are dropped after being handed over, so nothing new gets logged.
+    """
+
+    prefix = "ArynPartitioner: "
+
+    def __init__(self, logger_name: str = "aryn_sdk.client.partition"):
+        super().__init__()
+        self._logger = logging.getLogger(logger_name)
+        self._lock = threading.Lock()
+        self._listeners: dict[int, Callable[[str], None]] = {}
+        self._original_level = logging.NOTSET
+        self._passed_level = logging.NOTSET
+
+    @contextmanager
+    def listen(self, on_status: Callable[[str], None]) -> Iterator[None]:
+        thread_id = threading.get_ident()
+        with self._lock:
+            if not self._listeners:
+                self._original_level = self._logger.level
+                self._passed_level = self._logger.getEffectiveLevel()
+                self._logger.addFilter(self)
+                if self._passed_level > logging.INFO:
+                    self._logger.setLevel(logging.INFO)
+            self._listeners[thread_id] = on_status
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._listeners[thread_id]
+                if not self._listeners:
+                    self._logger.removeFilter(self)
+                    self._logger.setLevel(self._original_level)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if message.startswith(self.prefix):
+            on_status = self._listeners.get(threading.get_ident())
+            if on_status is not None:
+                on_status(message.removeprefix(self.prefix))
+        return record.levelno >= self._passed_level
+
+
+partition_status = PartitionStatusListener()
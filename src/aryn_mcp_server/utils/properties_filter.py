@@ -0,0 +1,79 @@
+import json
+import math
+import datetime
+
+from functools import lru_cache
+
+from ..models import PropertiesFilterModel, PropertiesFilterGroupModel
+
+
+PropertiesFilter = list[PropertiesFilterModel | PropertiesFilterGroupModel]
+
+
+def _quote(value: str) -> str:
+    escaped_value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped_value}"'
+
+
+def _compile_literal(value: str, property_type: str) -> str:
+    if property_type == "int":
+        try:
+            return str(int(value))
+        except ValueError as e:
+            raise ValueError(f"{value!r} is not a valid int") from e
+    elif property_type == "float":
+        try:
+            number = float(value)
+        except ValueError as e:
+            raise ValueError(f"{value!r} is not a valid float") from e
+        if not math.isfinite(number):
+            raise ValueError(f"{value!r} is not a finite float")
+        return repr(number)
+    elif property_type == "date":
+        try:
+            return _quote(datetime.date.fromisoformat(value).isoformat())
+        except ValueError as e:
+            raise ValueError(f"{value!r} is not a valid ISO date") from e
+    # str and bool values have always been sent to the server quoted
+    return _quote(value)
+
+
+def _compile_comparison(filter: dict) -> str:
+    property_name = f"properties.entity.{_quote(filter['property'])}"
+    operator = filter["operator"]
+    value = filter["value"]
+
+    if operator == "in":
+        literals = [_compile_literal(v, filter["property_type"]) for v in value]
+        return "(" + " OR ".join(f"{property_name}={literal}" for literal in literals) + ")"
+    elif operator == "between":
+        lower, upper = (_compile_literal(v, filter["property_type"]) for v in value)
+        return f"({property_name}>={lower} AND {property_name}<={upper})"
+
+    return f"({property_name}{operator}{_compile_literal(value, filter['property_type'])})"
+
+
+def _compile_expression(filter: dict) -> str:
+    if "logical_operator" not in filter:
+        return _compile_comparison(filter)
+
+    operands = [_compile_expression(f) for f in filter["filters"]]
+    if filter["logical_operator"] == "not":
+        return f"NOT {operands[0]}"
+
+    return "(" + f" {filter['logical_operator'].upper()} ".join(operands) + ")"
+
+
+@lru_cache(maxsize=1024)
+def _compile_properties_filter_json(properties_filter_json: str) -> str:
+    return " AND ".join(_compile_expression(f) for f in json.loads(properties_filter_json))
+
+
+def compile_properties_filter(properties_filter: PropertiesFilter) -> str:
+    """Compiles a list of filters, which are ANDed together, into an Aryn properties filter string
+
+    Compilation is memoized on the canonical JSON form of the filters, so repeated searches with the same filters
+    only pay for a dump and a dictionary lookup.
+    """
+    properties_filter_json = json.dumps([f.model_dump() for f in properties_filter], sort_keys=True)
+    return _compile_properties_filter_json(properties_filter_json)
@@ -0,0 +1,457 @@
+import json
+import math
+import time
+import datetime
+import threading
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timezone
+from typing import Any, Callable, Iterable, Iterator
+
+from .cancellation import propagate_cancellation
+from .properties_filter import PropertiesFilter
+
+
+def _to_number(value: Any, field_type: str) -> float:
+    if value is None:
+        return math.nan
+    if field_type == "bool":
+        if isinstance(value, bool):
+            return float(value)
+        return {"true": 1.0, "false": 0.0}.get(str(value).lower(), math.nan)
+    if isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_category(value: Any, field_type: str) -> str | None:
+    if value is None:
+        return None
+    if field_type == "date":
+        try:
+            return datetime.date.fromisoformat(str(value)[:10]).isoformat()
+        except ValueError:
+            return None
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+class NumericColumn:
+    """An int, float or bool property stored as float64, with NaN for documents that don't have it"""
+
+    __slots__ = ("field_type", "values")
+
+    def __init__(self, field_type: str, values: np.ndarray):
+        self.field_type = field_type
+        self.values = values
+
+    @classmethod
+    def from_values(cls, field_type: str, values: list) -> "NumericColumn":
+        return cls(field_type, np.fromiter((_to_number(v, field_type) for v in values), np.float64, len(values)))
+
+    def take(self, index: np.ndarray) -> "NumericColumn":
+        return NumericColumn(self.field_type, self.values[index])
+
+    def concat(self, other: "Column") -> "NumericColumn":
+        assert isinstance(other, NumericColumn)
+        return NumericColumn(self.field_type, np.concatenate([self.values, other.values]))
+
+    def compare(self, operator: str, value: str | list[str]) -> np.ndarray:
+        if operator == "in":
+            return np.isin(self.values, [self._parse(v) for v in value])
+        if operator == "between":
+            lower, upper = (self._parse(v) for v in value)
+            return (self.values >= lower) & (self.values <= upper)
+        if operator == "like":
+            raise ValueError(f"The 'like' operator cannot be used on {self.field_type} properties")
+        if isinstance(value, list):
+            raise ValueError(f"The '{operator}' operator takes a single value")
+
+        number = self._parse(value)
+        if operator == "<>":
+            return (self.values != number) & ~np.isnan(self.values)
+        return _COMPARISONS[operator](self.values, number)
+
+    def _parse(self, value: str) -> float:
+        number = _to_number(value, self.field_type)
+        if math.isnan(number):
+            raise ValueError(f"{value!r} is not a valid {self.field_type}")
+        return number
+
+    def group_codes(self, index: np.ndarray) -> tuple[np.ndarray, list]:
+        labels, codes = np.unique(self.values[index], return_inverse=True)
+        return codes.reshape(-1), [self.label(label) for label in labels]
+
+    def label(self, value: float) -> Any:
+        if math.isnan(value):
+            return None
+        if self.field_type == "int":
+            return int(value)
+        if self.field_type == "bool":
+            return bool(value)
+        return float(value)
+
+
+class CategoricalColumn:
+    """A str or date property stored as integer codes into a table of its distinct values, -1 meaning missing
+
+    Comparisons are evaluated once per distinct value and then spread to the documents through the codes, so a
+    filter on a property with few distinct values costs one array lookup per document.
+    """
+
+    __slots__ = ("field_type", "codes", "categories", "_index")
+
+    def __init__(self, field_type: str, codes: np.ndarray, categories: list[str]):
+        self.field_type = field_type
+        self.codes = codes
+        self.categories = categories
+        self._index = {category: i for i, category in enumerate(categories)}
+
+    @classmethod
+    def from_values(cls, field_type: str, values: list) -> "CategoricalColumn":
+        column = cls(field_type, np.empty(0, np.int32), [])
+        column.codes = column._encode(values)
+        return column
+
+    def _encode(self, values: list) -> np.ndarray:
+        codes = np.empty(len(values), np.int32)
+        for i, value in enumerate(values):
+            category = _to_category(value, self.field_type)
+            if category is None:
+                codes[i] = -1
+                continue
+            code = self._index.get(category)
+            if code is None:
+                code = self._index[category] = len(self.categories)
+                self.categories.append(category)
+            codes[i] = code
+        return codes
+
+    def take(self, index: np.ndarray) -> "CategoricalColumn":
+        return CategoricalColumn(self.field_type, self.codes[index], self.categories)
+
+    def concat(self, other: "Column") -> "CategoricalColumn":
+        assert isinstance(other, CategoricalColumn)
+        column = CategoricalColumn(self.field_type, self.codes, list(self.categories))
+        remap = column._encode(other.categories)
+        other_codes = np.where(other.codes >= 0, remap[other.codes], -1) if len(remap) else other.codes
+        column.codes = np.concatenate([self.codes, other_codes.astype(np.int32)])
+        return column
+
+    def compare(self, operator: str, value: str | list[str]) -> np.ndarray:
+        matches: list[bool]
+        if operator == "in":
+            targets = {self._parse(v) for v in value}
+            matches = [category in targets for category in self.categories]
+        elif operator == "between":
+            lower, upper = (self._parse(v) for v in value)
+            matches = [lower <= category <= upper for category in self.categories]
+        elif isinstance(value, list):
+            raise ValueError(f"The '{operator}' operator takes a single value")
+        elif operator == "like":
+            matches = [value in category for category in self.categories]
+        else:
+            target = self._parse(value)
+            matches = [_COMPARISONS[operator](category, target) for category in self.categories]
+
+        # Index len(categories), i.e. the extra False at the end, for documents that don't have the property
+        category_mask: np.ndarray = np.array(matches + [False], dtype=bool)
+        return category_mask[np.where(self.codes >= 0, self.codes, len(self.categories))]
+
+    def _parse(self, value: str) -> str:
+        category = _to_category(value, self.field_type)
+        if category is None:
+            raise ValueError(f"{value!r} is not a valid {self.field_type}")
+        return category
+
+    def group_codes(self, index: np.ndarray) -> tuple[np.ndarray, list]:
+        # The codes already number the groups; documents without the property are grouped last, like NaNs are
+        codes = self.codes[index]
+        return np.where(codes >= 0, codes, len(self.categories)), self.categories + [None]
+
+
+# Snapshots of a DocSet with the same schema have columns of the same types, so concat is only given its own type
+Column = NumericColumn | CategoricalColumn
+
+_COMPARISONS = {
+    "=": lambda a, b: a == b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    "<>": lambda a, b: a != b,
+}
+
+
+def _make_column(field_type: str, values: list) -> Column:
+    if field_type in ("int", "float", "bool"):
+        return NumericColumn.from_values(field_type, values)
+    return CategoricalColumn.from_values(field_type, values)
+
+
+class PropertySnapshot:
+    """The extracted properties of every document of a DocSet at one point in time, stored column by column
+
+    Snapshots are never modified; refreshing a DocSet builds a new snapshot and swaps it in, so readers never see
+    a half-applied refresh.
+    """
+
+    def __init__(
+        self,
+        docset_id: str,
+        field_types: dict[str, str],
+        doc_ids: np.ndarray,
+        columns: dict[str, Column],
+    ):
+        self.docset_id = docset_id
+        self.field_types = field_types
+        self.doc_ids = doc_ids
+        self.columns = columns
+        self.refreshed_at = datetime.datetime.now(timezone.utc)
+
+    @classmethod
+    def build(
+        cls, docset_id: str, field_types: dict[str, str], documents: list[tuple[str, dict]]
+    ) -> "PropertySnapshot":
+        doc_ids = np.array([doc_id for doc_id, _ in documents], dtype=object)
+        columns = {
+            name: _make_column(field_type, [properties.get(name) for _, properties in documents])
+            for name, field_type in field_types.items()
+        }
+        return cls(docset_id, field_types, doc_ids, columns)
+
+    def apply_delta(self, removed_doc_ids: set[str], added: list[tuple[str, dict]]) -> "PropertySnapshot":
+        keep = np.fromiter((doc_id not in removed_doc_ids for doc_id in self.doc_ids), bool, len(self.doc_ids))
+        added_snapshot = PropertySnapshot.build(self.docset_id, self.field_types, added)
+        return PropertySnapshot(
+            self.docset_id,
+            self.field_types,
+            np.concatenate([self.doc_ids[keep], added_snapshot.doc_ids]),
+            {name: column.take(keep).concat(added_snapshot.columns[name]) for name, column in self.columns.items()},
+        )
+
+    def _column(self, name: str) -> Column:
+        column = self.columns.get(name)
+        if column is None:
+            raise ValueError(f"Unknown property {name!r}, the DocSet schema has {list(self.columns)}")
+        return column
+
+    def _evaluate(self, filter) -> np.ndarray:
+        if hasattr(filter, "logical_operator"):
+            masks = [self._evaluate(f) for f in filter.filters]
+            if filter.logical_operator == "not":
+                return ~masks[0]
+            if filter.logical_operator == "and":
+                return np.logical_and.reduce(masks)
+            return np.logical_or.reduce(masks)
+        return self._column(filter.property).compare(filter.operator, filter.value)
+
+    def filter_mask(self, properties_filter: PropertiesFilter | None) -> np.ndarray:
+        mask = np.ones(len(self.doc_ids), dtype=bool)
+        for filter in properties_filter or []:
+            mask &= self._evaluate(filter)
+        return mask
+
+    def aggregate(
+        self,
+        properties_filter: PropertiesFilter | None,
+        group_by: list[str],
+        aggregations: list[tuple[str, str | None]],
+    ) -> list[dict]:
+        """Returns one row per group with the group's property values and the requested aggregations
+
+        aggregations are (function, property) pairs where function is one of count, sum, avg, min and max. count
+        without a property counts documents; with one, it counts documents that have the property.
+        """
+        mask = self.filter_mask(properties_filter)
+        matched = np.flatnonzero(mask)
+
+        group_labels: list[list] = []
+        if group_by:
+            per_column = [self._column(name).group_codes(matched) for name in group_by]
+            if math.prod(len(labels) for _, labels in per_column) < 2**62:
+                # Numbering every combination of group codes turns a multi-column group by into a 1-D unique
+                keys = np.zeros(len(matched), dtype=np.int64)
+                for codes, labels in per_column:
+                    keys = keys * len(labels) + codes
+                group_keys, group_index = np.unique(keys, return_inverse=True)
+                for codes, labels in reversed(per_column):
+                    group_labels.insert(0, [labels[code] for code in (group_keys % len(labels)).tolist()])
+                    group_keys = group_keys // len(labels)
+            else:
+                keys = np.stack([codes for codes, _ in per_column], axis=1)
+                group_keys, group_index = np.unique(keys, axis=0, return_inverse=True)
+                group_labels = [
+                    [labels[code] for code in group_keys[:, i].tolist()] for i, (_, labels) in enumerate(per_column)
+                ]
+            group_index = group_index.reshape(-1)
+            group_count = len(group_labels[0])
+        else:
+            group_index = np.zeros(len(matched), dtype=np.int64)
+            group_count = 1 if len(matched) else 0
+
+        rows = [{name: group_labels[i][group] for i, name in enumerate(group_by)} for group in range(group_count)]
+        for function, name in aggregations:
+            values = self._aggregate(function, name, matched, group_index, group_count)
+            for row, value in zip(rows, values):
+                row[f"{function}_{name}" if name else function] = value
+        return rows
+
+    def _aggregate(
+        self, function: str, name: str | None, matched: np.ndarray, group_index: np.ndarray, group_count: int
+    ) -> list:
+        if function == "count" and name is None:
+            return np.bincount(group_index, minlength=group_count).tolist()
+
+        if name is None:
+            raise ValueError(f"{function} needs a property")
+        column = self._column(name)
+        if function == "count":
+            if isinstance(column, NumericColumn):
+                present = ~np.isnan(column.values[matched])
+            else:
+                present = column.codes[matched] >= 0
+            return np.bincount(group_index, weights=present, minlength=group_count).astype(int).tolist()
+
+        if not isinstance(column, NumericColumn):
+            raise ValueError(f"{function} needs a numeric property, {name!r} is a {column.field_type} property")
+
+        values = column.values[matched]
+        present = ~np.isnan(values)
+        counts = np.bincount(group_index[present], minlength=group_count)
+        if function in ("sum", "avg"):
+            sums = np.bincount(group_index[present], weights=values[present], minlength=group_count)
+            results = (
+                sums if function == "sum" else np.divide(sums, counts, where=counts > 0, out=np.full_like(sums, np.nan))
+            )
+        elif function in ("min", "max"):
+            results = np.full(group_count, np.inf if function == "min" else -np.inf)
+            if function == "min":
+                np.minimum.at(results, group_index[present], values[present])
+            else:
+                np.maximum.at(results, group_index[present], values[present])
+        else:
+            raise ValueError(f"Unknown aggregation {function!r}")
+
+        return [None if count == 0 else float(result) for result, count in zip(results, counts)]
+
+
+class PropertyStore:
+    """Keeps columnar snapshots of the extracted properties of DocSets in memory
+
+    A refresh lists the DocSet and only fetches the properties of documents that were added since the last one,
+    unless the DocSet's properties were changed as a whole, e.g. by an extraction job, in which case everything is
+    fetched again.
+    """
+
+    def __init__(
+        self,
+        list_documents: Callable[[str], Iterable],
+        get_properties: Callable[[str, Any], dict],
+        max_workers: int = 16,
+    ):
+        self.list_documents = list_documents
+        self.get_properties = get_properties
+        self.max_workers = max_workers
+
+        self._snapshots: dict[str, PropertySnapshot] = {}
+        self._changed: set[str] = set()
+        self._properties_changed: set[str] = set()
+        self._lock = threading.Lock()
+        # The lock of each DocSet being refreshed and how many refreshes hold or wait for it
+        self._refresh_locks: dict[str, tuple[threading.Lock, int]] = {}
+
+    def get(self, docset_id: str) -> PropertySnapshot | None:
+        with self._lock:
+            return self._snapshots.get(docset_id)
+
+    def is_stale(self, docset_id: str) -> bool:
+        """Whether this server changed the DocSet since its snapshot was taken"""
+        with self._lock:
+            return docset_id in self._changed or docset_id in self._properties_changed
+
+    def mark_changed(self, docset_id: str) -> None:
+        with self._lock:
+            self._changed.add(docset_id)
+
+    def mark_properties_changed(self, docset_id: str) -> None:
+        with self._lock:
+            self._properties_changed.add(docset_id)
+
+    def _fetch(self, docset_id: str, documents: list) -> list[tuple[str, dict]]:
+        if not documents:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            properties = executor.map(
+                propagate_cancellation(lambda doc: self.get_properties(docset_id, doc)), documents
+            )
+            return [(doc.doc_id, doc_properties) for doc, doc_properties in zip(documents, properties)]
+
+    @contextmanager
+    def _refreshing(self, docset_id: str) -> Iterator[None]:
+        """Lets one refresh of a DocSet run at a time, keeping its lock only while refreshes use it"""
+        with self._lock:
+            refresh_lock, users = self._refresh_locks.get(docset_id, (threading.Lock(), 0))
+            self._refresh_locks[docset_id] = (refresh_lock, users + 1)
+        try:
+            with refresh_lock:
+                yield
+        finally:
+            with self._lock:
+                refresh_lock, users = self._refresh_locks[docset_id]
+                if users == 1:
+                    del self._refresh_locks[docset_id]
+                else:
+                    self._refresh_locks[docset_id] = (refresh_lock, users - 1)
+
+    def refresh(self, docset_id: str, field_types: dict[str, str], full: bool = False) -> dict:
+        with self._refreshing(docset_id):
+            start = time.monotonic()
+            with self._lock:
+                snapshot = self._snapshots.get(docset_id)
+                full = (
+                    full
+                    or snapshot is None
+                    or snapshot.field_types != field_types
+                    or docset_id in self._properties_changed
+                )
+                self._changed.discard(docset_id)
+                self._properties_changed.discard(docset_id)
+
+            try:
+                documents = list(self.list_documents(docset_id))
+                if full or snapshot is None:
+                    added = documents
+                    removed_doc_ids = set()
+                    snapshot = PropertySnapshot.build(docset_id, field_types, self._fetch(docset_id, documents))
+                else:
+                    known_doc_ids = set(snapshot.doc_ids)
+                    listed_doc_ids = {doc.doc_id for doc in documents}
+                    added = [doc for doc in documents if doc.doc_id not in known_doc_ids]
+                    removed_doc_ids = known_doc_ids - listed_doc_ids
+                    snapshot = snapshot.apply_delta(removed_doc_ids, self._fetch(docset_id, added))
+            except Exception:
+                # Changes that happened before this refresh still need to be picked up by the next one
+                if full:
+                    self.mark_properties_changed(docset_id)
+                else:
+                    self.mark_changed(docset_id)
+                raise
+
+            with self._lock:
+                self._snapshots[docset_id] = snapshot
+
+            return {
+                "docset_id": docset_id,
+                "documents": len(snapshot.doc_ids),
+                "properties": snapshot.field_types,
+                "full_refresh": full,
+                "added_documents": len(added),
+                "removed_documents": len(removed_doc_ids),
+                "refreshed_at": snapshot.refreshed_at.isoformat(),
+                "refresh_seconds": round(time.monotonic() - start, 3),
+            }
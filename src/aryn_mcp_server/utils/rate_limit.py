@@ -0,0 +1,263 @@
+import re
+import time
+import threading
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import httpx
+
+from .cancellation import check_cancellation, current_cancellation, phase
+from .resilience import parse_retry_after
+from .utils import get_env_float, get_env_int
+
+# Default number of calls to each endpoint that may be in flight at once
+DEFAULT_CONCURRENCY_LIMITS = {"partition": 4, "add_doc": 4, "search": 8, "query": 4, "get_doc": 16}
+
+_ADD_DOC_PATH = re.compile(r"/v1/(async/submit/)?storage/docsets/[^/]+/docs")
+_GET_DOC_PATH = re.compile(r"/v1/storage/docsets/[^/]+/docs/[^/]+(/binary)?")
+
+
+def classify_request(method: str, path: str) -> str | None:
+    """Returns the endpoint whose concurrency limit a request of the Aryn API counts against, if any"""
+    if path.startswith("/v1/query/search/"):
+        return "search"
+    if path.startswith("/v1/query"):
+        return "query"
+    if method == "POST" and _ADD_DOC_PATH.fullmatch(path):
+        return "add_doc"
+    if method == "GET" and _GET_DOC_PATH.fullmatch(path):
+        return "get_doc"
+    return None
+
+
+class TokenBucket:
+    """Spaces out requests to at most rate per second, with bursts of up to burst requests
+
+    When the service throttles a request, the rate is halved and requests are paused for as long as its Retry-After
+    asks. Each request that goes through afterwards raises the rate by a twentieth of max_rate, so the limiter
+    settles just under the rate the service accepts.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        min_rate_fraction: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = rate * min_rate_fraction
+        self.burst = max(burst, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self.tokens = self.burst
+        self.updated = clock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttles = 0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def acquire(self) -> float:
+        """Waits for a token and returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                # Refills are floating point, so a token may come back as 0.9999...
+                if now >= self.updated and self.tokens >= 1 - 1e-9:
+                    self.tokens -= 1
+                    if waited:
+                        self.waits += 1
+                        self.wait_seconds += waited
+                    return waited
+                # While paused, updated is the end of the pause
+                wait = max(self.updated - now, 0.0) + max(1 - self.tokens, 0.0) / self.rate
+            check_cancellation()
+            cancellation = current_cancellation()
+            remaining = cancellation.remaining() if cancellation is not None else None
+            if remaining is not None:
+                wait = min(wait, remaining)
+            self.sleep(wait)
+            waited += wait
+
+    def record_throttled(self, retry_after: float | None) -> None:
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.rate / 2, self.min_rate)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.updated = max(self.updated, self.clock() + retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.rate + self.max_rate / 20, self.max_rate)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "max_rate": self.max_rate,
+                "waits": self.waits,
+                "avg_wait_ms": self.wait_seconds / self.waits * 1000 if self.waits else 0.0,
+                "throttles": self.throttles,
+            }
+
+
+class RequestGovernor:
+    """Keeps the requests of every tool under the account's request rate and per-endpoint concurrency limits"""
+
+    def __init__(self, bucket: TokenBucket | None, concurrency_limits: dict[str, int]):
+        self.bucket = bucket
+        self.concurrency_limits = {endpoint: limit for endpoint, limit in concurrency_limits.items() if limit > 0}
+        self._semaphores = {
+            endpoint: threading.BoundedSemaphore(limit) for endpoint, limit in self.concurrency_limits.items()
+        }
+        self._lock = threading.Lock()
+        self.in_flight = {endpoint: 0 for endpoint in self.concurrency_limits}
+
+    def acquire(self, endpoint: str | None) -> Callable[[], None]:
+        """Waits for a free slot of the endpoint and a token, and returns the function that frees the slot"""
+        if endpoint is not None:
+            self._acquire_slot(endpoint)
+        try:
+            if self.bucket is not None:
+                with phase("waiting for the Aryn API rate limit"):
+                    self.bucket.acquire()
+        except BaseException:
+            self._release(endpoint)
+            raise
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self._release(endpoint)
+
+        return release
+
+    def _acquire_slot(self, endpoint: str) -> None:
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            return
+        with phase(f"waiting for a free {endpoint} slot"):
+            cancellation = current_cancellation()
+            while not semaphore.acquire(timeout=cancellation.remaining() if cancellation is not None else None):
+                check_cancellation()
+        with self._lock:
+            self.in_flight[endpoint] += 1
+
+    def _release(self, endpoint: str | None) -> None:
+        if endpoint is None:
+            return
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is not None:
+            with self._lock:
+                self.in_flight[endpoint] -= 1
+            semaphore.release()
+
+    @contextmanager
+    def slot(self, endpoint: str | None) -> Iterator[None]:
+        release = self.acquire(endpoint)
+        try:
+            yield
+        finally:
+            release()
+
+    def record_throttled(self, retry_after: float | None) -> None:
+        if self.bucket is not None:
+            self.bucket.record_throttled(retry_after)
+
+    def record_success(self) -> None:
+        if self.bucket is not None:
+            self.bucket.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = dict(self.in_flight)
+        return {
+            "rate_limit": self.bucket.stats() if self.bucket is not None else None,
+            "concurrency_limits": self.concurrency_limits,
+            "in_flight": in_flight,
+        }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Holds a governor slot until the response body has been read or closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self.stream
+        self.release()
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            self.release()
+
+
+class GovernedTransport(httpx.BaseTransport):
+    """An httpx transport that makes every request to the Aryn API wait for its turn in a RequestGovernor"""
+
+    def __init__(self, governor: RequestGovernor, transport: httpx.BaseTransport):
+        self.governor = governor
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        release = self.governor.acquire(classify_request(request.method, request.url.path))
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            release()
+            raise
+
+        if response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers):
+            self.governor.record_throttled(parse_retry_after(response))
+        elif response.status_code < 400:
+            self.governor.record_success()
+
+        if isinstance(response.stream, httpx.ByteStream) or not isinstance(response.stream, httpx.SyncByteStream):
+            # The body is already in memory, or is not one this transport reads, so the request is over
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+_governor: RequestGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> RequestGovernor:
+    """Returns the RequestGovernor shared by every call to Aryn, configured from the environment"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            rate = get_env_float("ARYN_MCP_RATE_LIMIT", 0.0)
+            _governor = RequestGovernor(
+                bucket=TokenBucket(rate, get_env_float("ARYN_MCP_RATE_LIMIT_BURST", 20.0)) if rate > 0 else None,
+                concurrency_limits={
+                    endpoint: get_env_int(f"ARYN_MCP_MAX_CONCURRENT_{endpoint.upper()}", limit)
+                    for endpoint, limit in DEFAULT_CONCURRENCY_LIMITS.items()
+                },
+            )
+        return _governor
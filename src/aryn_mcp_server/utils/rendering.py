@@ -0,0 +1,54 @@
+import json
+
+from os import PathLike
+from pathlib import Path
+
+from aryn_sdk.partition import draw_with_boxes, tables_to_pandas
+
+from .cancellation import check_cancellation
+from .utils import create_zip_from_dataframes, save_file
+
+
+# draw_boxes runs in a worker process when ARYN_MCP_CPU_WORKERS is set, so it takes paths and plain data and writes
+# its output to disk itself, and only paths travel back to the server. Saving results is bound by I/O rather than
+# CPU, and sending them to a process would cost as much as writing them, so that stays in the tool's thread.
+
+
+def draw_boxes(
+    pdf_path: str | PathLike,
+    partition_result: dict | str | PathLike,
+    page_ranges: list[tuple[int, int]],
+    name: str,
+) -> list[Path]:
+    """Saves an image of each page in page_ranges with the bounding boxes of its elements drawn on. The partition
+    result may be given as the path of its JSON file."""
+    if not isinstance(partition_result, dict):
+        with open(partition_result, "r") as f:
+            partition_result = json.load(f)
+
+    pages = draw_with_boxes(pdf_path, partition_result)
+
+    saved_images = []
+    try:
+        for start, end in page_ranges:
+            if start < 1 or end > len(pages):
+                raise ValueError(f"Page range start={start} end={end} is out of bounds for the document")
+            for page_index in range(start - 1, end):
+                check_cancellation()
+                saved_images.append(save_file(pages[page_index], f"{name}_page_image_{page_index+1}", "png"))
+    except BaseException:
+        # Images of a call that did not finish are never returned, so they are not kept either
+        remove_files(saved_images)
+        raise
+    return saved_images
+
+
+def save_tables(elements: list[dict], name: str) -> Path:
+    """Saves the tables among elements as CSV files in a ZIP archive"""
+    tables = [table for _, table in tables_to_pandas({"elements": elements}) if table is not None]
+    return save_file(create_zip_from_dataframes(tables), name, "zip")
+
+
+def remove_files(paths: list[Path]) -> None:
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
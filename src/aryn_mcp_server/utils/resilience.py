@@ -0,0 +1,376 @@
+import time
+import random
+import socket
+import threading
+
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, TypeVar
+
+import httpx
+
+from .cancellation import CancellationToken, DeadlineExceeded, check_cancellation, current_cancellation
+from .utils import get_env_float, get_env_int
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# POST endpoints of the Aryn API that only read, so retrying them after an ambiguous failure is safe
+IDEMPOTENT_POST_PATHS = ("/v1/query",)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service that has failed too many times in a row"""
+
+
+def get_status_code(error: BaseException) -> int | None:
+    """Returns the HTTP status code of an Aryn SDK, partitioning or httpx error, if it has one"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    status_code = getattr(error, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def parse_retry_after(response: httpx.Response) -> float | None:
+    """Returns the seconds a response's Retry-After header asks to wait, if it has one"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Returns the seconds the Retry-After header of an error's response asks to wait, if any"""
+    response = getattr(error, "response", None) or getattr(error, "raw_response", None)
+    return parse_retry_after(response) if isinstance(response, httpx.Response) else None
+
+
+def is_retryable(error: BaseException, idempotent: bool) -> bool:
+    """Whether a failed call may succeed when made again
+
+    Throttling and failures to connect are always retryable because the request was not processed. Server errors
+    and timeouts after the request was sent are only retryable for requests that can safely run twice.
+    """
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if isinstance(error, httpx.TransportError):
+        return idempotent
+    status_code = get_status_code(error)
+    if status_code == 429:
+        return True
+    return idempotent and status_code in RETRYABLE_STATUS_CODES
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """Whether an error says the service is unhealthy, as opposed to the request being wrong or throttled"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    status_code = get_status_code(error)
+    return status_code is not None and status_code >= 500
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent requests so that retries cannot multiply the load of an outage
+
+    Over a sliding window, retries may add ratio times the number of requests plus min_retries_per_second.
+    """
+
+    def __init__(self, ratio: float, min_retries_per_second: float = 1.0, window_seconds: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries_per_second * window_seconds
+        self.window_seconds = window_seconds
+
+        self._lock = threading.Lock()
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+
+    def _expire(self, now: float) -> None:
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] <= now - self.window_seconds:
+                timestamps.popleft()
+
+    def record_request(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """Takes one retry from the budget, or returns False if it is used up"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """Fails calls fast after failure_threshold consecutive service failures
+
+    After reset_seconds the circuit is half open and lets a single call through. Its success closes the circuit and
+    its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self.opened_at + self.reset_seconds - time.monotonic()
+            if self.state == "open" and retry_in <= 0:
+                self.state = "half_open"
+                return
+            self.short_circuited += 1
+        raise CircuitOpenError(
+            f"{self.name} is unavailable after {self.consecutive_failures} consecutive failures, "
+            f"retry in {max(retry_in, 0.0):.0f}s"
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Lets another call probe a half open circuit when this one neither succeeded nor failed"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic() - self.reset_seconds
+
+
+class Resilience:
+    """Retries failed calls to a service with jittered exponential backoff, under a retry budget and behind a
+    circuit breaker"""
+
+    base_delay = 0.5
+    max_delay = 20.0
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int,
+        budget: RetryBudget,
+        breaker: CircuitBreaker,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.max_attempts = max(max_attempts, 1)
+        self.budget = budget
+        self.breaker = breaker
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.retries_denied = 0
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> float | None:
+        """Returns how long to wait before the next attempt, or None if the wait would be too long"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            delay = max(delay, retry_after)
+        # Waiting past the tool call's deadline only to give up then would hide the error that caused the retry
+        cancellation = current_cancellation()
+        remaining = cancellation.remaining() if cancellation is not None else None
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def call(self, function: Callable[[], T], idempotent: bool = True) -> T:
+        with self._lock:
+            self.calls += 1
+        self.budget.record_request()
+
+        attempt = 0
+        while True:
+            check_cancellation()
+            self.breaker.before_call()
+            try:
+                result = function()
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded):
+                    # Running out of time says nothing about the health of the service
+                    self.breaker.release()
+                    raise
+                if is_service_failure(e):
+                    self.breaker.record_failure()
+                elif get_status_code(e) == 429:
+                    self.breaker.release()
+                else:
+                    self.breaker.record_success()
+
+                if attempt + 1 >= self.max_attempts or not is_retryable(e, idempotent):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                if not self.budget.try_spend():
+                    with self._lock:
+                        self.retries_denied += 1
+                    raise
+
+                with self._lock:
+                    self.retries += 1
+                self.sleep(delay)
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "retries_denied": self.retries_denied,
+                "circuit": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "short_circuited": self.breaker.short_circuited,
+            }
+
+
+class _AbortOnCancel(httpx.SyncByteStream):
+    """Shuts down the connection of a response body once its tool call is cancelled
+
+    A read waiting for a stalled stream, e.g. of query events, only wakes up when its socket is shut down. Closing
+    the response from the cancelling thread would leave it waiting until the read timed out.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream, cancellation: CancellationToken, connection: socket.socket):
+        self.stream = stream
+        self.connection = connection
+        self._stop_listening = cancellation.on_cancel(self._abort)
+
+    def _abort(self) -> None:
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            # The connection is already closed
+            pass
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self.stream
+        self._stop_listening()
+
+    def close(self) -> None:
+        self._stop_listening()
+        self.stream.close()
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """An httpx transport that sends every request through a Resilience
+
+    A response with a retryable status is read and retried like an error. If the retries run out, that response is
+    returned, so the caller sees the same response it would have seen without retries. Requests made during a tool
+    call get at most the time the call has left, and raise its DeadlineExceeded if they time out because of that.
+    """
+
+    def __init__(self, resilience: Resilience, transport: httpx.BaseTransport):
+        self.resilience = resilience
+        self.transport = transport
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        cancellation = current_cancellation()
+        remaining = cancellation.remaining() if cancellation is not None else None
+        if remaining is not None:
+            timeout = request.extensions.get("timeout", {})
+            request.extensions["timeout"] = {
+                key: remaining if timeout.get(key) is None else min(timeout[key], remaining)
+                for key in ("connect", "read", "write", "pool")
+            }
+        try:
+            response = self.transport.handle_request(request)
+        except httpx.TimeoutException as e:
+            if cancellation is not None and cancellation.cancelled:
+                raise cancellation.error() from e
+            raise
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            response.read()
+            response.close()
+            raise httpx.HTTPStatusError(
+                f"Error: status_code: {response.status_code}", request=request, response=response
+            )
+
+        network_stream = response.extensions.get("network_stream")
+        connection = network_stream.get_extra_info("socket") if network_stream is not None else None
+        if cancellation is not None and connection is not None and isinstance(response.stream, httpx.SyncByteStream):
+            response.stream = _AbortOnCancel(response.stream, cancellation, connection)
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE") or (
+            request.method == "POST" and request.url.path.startswith(IDEMPOTENT_POST_PATHS)
+        )
+        try:
+            return self.resilience.call(lambda: self._send(request), idempotent=idempotent)
+        except httpx.HTTPStatusError as e:
+            return e.response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def use_resilient_transport(client, resilience: Resilience, transport: httpx.BaseTransport | None = None) -> None:
+    """Makes an aryn_sdk Client send its requests through resilience, and through transport if given"""
+    http_client: httpx.Client = client.client
+    client.client = httpx.Client(
+        base_url=http_client.base_url,
+        headers=http_client.headers,
+        timeout=http_client.timeout,
+        transport=ResilientTransport(resilience, transport or httpx.HTTPTransport()),
+    )
+    http_client.close()
+
+
+_resiliences: dict[str, Resilience] = {}
+_resiliences_lock = threading.Lock()
+
+
+def get_resilience(name: str) -> Resilience:
+    """Returns the Resilience shared by every caller of the named service, configured from the environment"""
+    with _resiliences_lock:
+        if name not in _resiliences:
+            _resiliences[name] = Resilience(
+                name=name,
+                max_attempts=get_env_int("ARYN_MCP_RETRY_MAX_ATTEMPTS", 4),
+                budget=RetryBudget(ratio=get_env_float("ARYN_MCP_RETRY_BUDGET_RATIO", 0.2)),
+                breaker=CircuitBreaker(
+                    name=name,
+                    failure_threshold=get_env_int("ARYN_MCP_CIRCUIT_FAILURE_THRESHOLD", 5),
+                    reset_seconds=get_env_float("ARYN_MCP_CIRCUIT_RESET_SECONDS", 30.0),
+                ),
+            )
+        return _resiliences[name]
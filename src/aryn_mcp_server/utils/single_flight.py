@@ -0,0 +1,131 @@
+import hashlib
+import threading
+
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from .cancellation import DeadlineExceeded, wait_for
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "users")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        # Callers that have joined the call and not yet left share()
+        self.users = 1
+
+
+class SingleFlight:
+    """Makes concurrent calls with the same key share a single execution
+
+    The first caller of a key runs the function and every caller that arrives while it runs waits for and gets the
+    same result or exception, except when the leader ran out of time or was cancelled: that is the leader's own
+    deadline, so the callers still waiting try again and one of them leads a new call. Results are not kept once the
+    call ends, so this never serves anything older than the call in flight. Keys are tuples whose second item is a
+    docset_id, so that forget_docset can stop calls that started before a change of the DocSet from being joined.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[tuple, _Call] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: tuple, function: Callable[[], T]) -> tuple[T, bool]:
+        """Returns the result of function, and whether it came from a call another caller started"""
+        with self.share(key, function) as shared:
+            return shared
+
+    @contextmanager
+    def share(
+        self, key: tuple, function: Callable[[], T], cleanup: Callable[[T], None] | None = None
+    ) -> Iterator[tuple[T, bool]]:
+        """Like do, for results that are resources such as files: cleanup is called with the result once every
+        caller that got it has left the block"""
+        call, shared = self._join(key, function)
+        try:
+            yield call.result, shared
+        finally:
+            with self._lock:
+                call.users -= 1
+                last = call.users == 0
+            if last and cleanup is not None:
+                cleanup(call.result)
+
+    def _join(self, key: tuple, function: Callable[[], T]) -> tuple[_Call, bool]:
+        while True:
+            with self._lock:
+                existing = self._calls.get(key)
+                if existing is None:
+                    call = self._calls[key] = _Call()
+                    self.calls += 1
+                    break
+                existing.users += 1
+                self.coalesced += 1
+
+            try:
+                # A caller with less time left than the leader stops waiting when its own deadline passes
+                wait_for(existing.done)
+            except BaseException:
+                with self._lock:
+                    existing.users -= 1
+                raise
+            if existing.error is None:
+                return existing, True
+            with self._lock:
+                existing.users -= 1
+            if not _stopped_by_deadline(existing.error):
+                raise existing.error
+
+        try:
+            call.result = function()
+            return call, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget_docset(self, docset_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._calls if len(key) > 1 and key[1] == docset_id]:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+def _stopped_by_deadline(error: BaseException | None) -> bool:
+    """Whether error, or an error it was raised from, is a DeadlineExceeded"""
+    while error is not None:
+        if isinstance(error, DeadlineExceeded):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def hash_file(file: str | PathLike) -> str | None:
+    """Returns the sha256 of a local file's content, or None if file is not a local file"""
+    path = Path(file)
+    try:
+        if not path.is_file():
+            return None
+    except OSError:
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
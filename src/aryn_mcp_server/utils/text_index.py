@@ -0,0 +1,186 @@
+import re
+import time
+import sqlite3
+import threading
+
+from pathlib import Path
+from typing import Iterable, Literal
+
+
+class ElementTextIndex:
+    """A SQLite FTS5 full-text index of the text of document elements this server has fetched or added
+
+    Element text is stored once and indexed twice: with the unicode61 tokenizer for lexical (whole word) searches
+    and with the trigram tokenizer for keyword (substring) searches. Both are ranked with BM25. Only documents
+    that were indexed can be found, so an empty result means "not in the local index", not "not in the DocSet".
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS elements (
+                id INTEGER PRIMARY KEY,
+                docset_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                element_id TEXT NOT NULL,
+                type TEXT,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS elements_document ON elements (docset_id, doc_id);
+            CREATE TABLE IF NOT EXISTS indexed_documents (
+                docset_id TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                indexed_at REAL NOT NULL,
+                PRIMARY KEY (docset_id, doc_id)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS elements_words
+                USING fts5(text, content='elements', content_rowid='id');
+            CREATE VIRTUAL TABLE IF NOT EXISTS elements_trigrams
+                USING fts5(text, content='elements', content_rowid='id', tokenize='trigram');
+            """
+        )
+
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    def _remove_document(self, docset_id: str, doc_id: str) -> None:
+        rows = self._connection.execute(
+            "SELECT id, text FROM elements WHERE docset_id = ? AND doc_id = ?", (docset_id, doc_id)
+        ).fetchall()
+        for table in ("elements_words", "elements_trigrams"):
+            self._connection.executemany(f"INSERT INTO {table} ({table}, rowid, text) VALUES ('delete', ?, ?)", rows)
+        self._connection.execute("DELETE FROM elements WHERE docset_id = ? AND doc_id = ?", (docset_id, doc_id))
+        self._connection.execute(
+            "DELETE FROM indexed_documents WHERE docset_id = ? AND doc_id = ?", (docset_id, doc_id)
+        )
+
+    def add_document(self, docset_id: str, doc_id: str, elements: Iterable[tuple[str, str | None, str | None]]) -> None:
+        """Indexes the (element_id, type, text_representation) of a document's elements, replacing earlier ones"""
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._remove_document(docset_id, doc_id)
+                for element_id, element_type, text in elements:
+                    if not text:
+                        continue
+                    rowid = self._connection.execute(
+                        "INSERT INTO elements (docset_id, doc_id, element_id, type, text) VALUES (?, ?, ?, ?, ?)",
+                        (docset_id, doc_id, element_id, element_type, text),
+                    ).lastrowid
+                    for table in ("elements_words", "elements_trigrams"):
+                        self._connection.execute(f"INSERT INTO {table} (rowid, text) VALUES (?, ?)", (rowid, text))
+                self._connection.execute(
+                    "INSERT INTO indexed_documents VALUES (?, ?, ?)", (docset_id, doc_id, time.time())
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def remove_document(self, docset_id: str, doc_id: str) -> None:
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._remove_document(docset_id, doc_id)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def remove_docset(self, docset_id: str) -> None:
+        with self._lock:
+            doc_ids = self._connection.execute(
+                "SELECT doc_id FROM indexed_documents WHERE docset_id = ?", (docset_id,)
+            ).fetchall()
+            self._connection.execute("BEGIN")
+            try:
+                for (doc_id,) in doc_ids:
+                    self._remove_document(docset_id, doc_id)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def indexed_documents(self, docset_id: str) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM indexed_documents WHERE docset_id = ?", (docset_id,)
+            ).fetchone()[0]
+
+    @staticmethod
+    def _match_expression(query: str, query_type: Literal["keyword", "lexical"]) -> str | None:
+        if query_type == "lexical":
+            words = re.findall(r"\w+", query)
+            return " ".join(f'"{word}"' for word in words) if words else None
+        # The trigram tokenizer needs at least 3 characters to match anything
+        query = query.strip()
+        return '"' + query.replace('"', '""') + '"' if len(query) >= 3 else None
+
+    def search(
+        self,
+        docset_id: str,
+        query: str,
+        query_type: Literal["keyword", "lexical"],
+        return_type: Literal["doc", "element"],
+        limit: int,
+    ) -> list[dict]:
+        """Returns the best matching elements, or documents ranked by their best element, best first"""
+        start = time.perf_counter()
+        match_expression = self._match_expression(query, query_type)
+        table = "elements_words" if query_type == "lexical" else "elements_trigrams"
+
+        if match_expression is not None:
+            matches = f"""
+                SELECT e.doc_id, e.element_id, e.type, e.text, -bm25({table}) AS score
+                FROM {table} CROSS JOIN elements e ON e.id = {table}.rowid
+                WHERE {table} MATCH ? AND e.docset_id = ?
+            """
+            parameters: tuple = (match_expression, docset_id)
+        else:
+            escaped_query = query.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            matches = """
+                SELECT doc_id, element_id, type, text, 0.0 AS score FROM elements
+                WHERE docset_id = ? AND text LIKE ? ESCAPE '\\'
+            """
+            parameters = (docset_id, f"%{escaped_query}%")
+
+        # bm25() can only run in the query that does the MATCH, so the matches must not be flattened into the outer one
+        if return_type == "doc":
+            sql = f"""
+                WITH matches AS MATERIALIZED ({matches})
+                SELECT doc_id, MAX(score) AS score FROM matches GROUP BY doc_id ORDER BY score DESC LIMIT ?
+            """
+        else:
+            sql = f"WITH matches AS MATERIALIZED ({matches}) SELECT * FROM matches ORDER BY score DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._connection.execute(sql, (*parameters, limit)).fetchall()
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - start
+
+        if return_type == "doc":
+            return [{"doc_id": doc_id, "score": score} for doc_id, score in rows]
+        return [
+            {
+                "doc_id": doc_id,
+                "element_id": element_id,
+                "type": element_type,
+                "text_representation": text,
+                "score": score,
+            }
+            for doc_id, element_id, element_type, text, score in rows
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": self._connection.execute("SELECT COUNT(*) FROM indexed_documents").fetchone()[0],
+                "elements": self._connection.execute("SELECT COUNT(*) FROM elements").fetchone()[0],
+                "searches": self.searches,
+                "avg_search_ms": self.search_seconds / self.searches * 1000 if self.searches else 0.0,
+                "path": str(self.path),
+            }
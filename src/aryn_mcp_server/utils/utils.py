@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import time
+import hashlib
 import zipfile
 import pandas as pd
 
@@ -10,6 +11,7 @@ from pathlib import Path
 from functools import wraps
 from typing import Dict, Union, List
 from io import BytesIO, StringIO
+from .export import CSVPropertiesWriter, flatten_properties
 
 
 def get_output_dir() -> Path:
@@ -24,6 +26,50 @@ def get_output_dir() -> Path:
     return path.resolve()  # Return absolute path
 
 
+def get_cache_dir() -> Path:
+    cache_dir = os.environ.get("ARYN_MCP_CACHE_DIR")
+    if cache_dir:
+        path = Path(cache_dir).resolve()
+    else:
+        path = Path.home() / ".aryn" / "mcp_cache"
+
+    path.mkdir(parents=True, exist_ok=True)
+    return path.resolve()
+
+
+def get_account_cache_dir(aryn_api_key: str, aryn_url: str) -> Path:
+    """Returns the cache directory of one API key, so accounts sharing a cache directory never see each other's data"""
+    account = hashlib.sha256(f"{aryn_url}\n{aryn_api_key}".encode()).hexdigest()[:16]
+    path = get_cache_dir() / "accounts" / account
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError as e:
+        raise ValueError(f"Environment variable {name} must be a number, got {value!r}") from e
+
+
+def get_env_int(name: str, default: int) -> int:
+    return int(get_env_float(name, default))
+
+
+def get_env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    if value.strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.strip().lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"Environment variable {name} must be a boolean, got {value!r}")
+
+
 def save_file(
     data: Union[Dict, str, Image.Image, bytes],
     filename: str,
@@ -32,7 +78,12 @@ def save_file(
     try:
         base_dir = get_output_dir()  # This is now an absolute path
         path = ensure_unique_filename(base_dir / filename, f".{output_format}")
-        if isinstance(data, dict) or isinstance(data, list) and output_format == "json":
+        if isinstance(data, dict) and output_format == "csv":
+            row = flatten_properties(data)
+            writer = CSVPropertiesWriter(path, dict.fromkeys(row, "str"))
+            writer.write_rows([row])
+            writer.close()
+        elif isinstance(data, dict) or isinstance(data, list) and output_format == "json":
             with open(path, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=4)
         elif isinstance(data, str) and output_format == "markdown":
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import threading
+import multiprocessing
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, TypeVar
+
+from mcp.server.fastmcp import Context, FastMCP
+
+from .cancellation import current_cancellation, propagate_cancellation
+from .utils import get_env_int
+
+T = TypeVar("T")
+
+
+def run_in_worker(tool: Callable) -> Callable:
+    """Turns a blocking tool into one that runs in a worker thread, so that it does not hold up the event loop"""
+
+    @functools.wraps(tool)
+    async def run(*args, **kwargs):
+        # A call still queued for a thread when the batch that made it is cancelled is skipped
+        return await asyncio.to_thread(propagate_cancellation(tool), *args, **kwargs)
+
+    return run
+
+
+@asynccontextmanager
+async def use_worker_pool(server: "ArynFastMCP") -> AsyncIterator[None]:
+    """Makes asyncio.to_thread, which runs the blocking work of every tool, use the server's worker pool
+
+    Network transports enter this once per client session, all on the same event loop, so the pool is shared.
+    """
+    asyncio.get_running_loop().set_default_executor(server.worker_pool)
+    yield
+
+
+class ArynFastMCP(FastMCP):
+    """A FastMCP server whose blocking tools run in a pool of max_workers threads instead of on its event loop, so
+    that one server process can serve many clients at once. Tool functions stay synchronous for direct callers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, lifespan=use_worker_pool, **kwargs)
+        self.max_workers = get_env_int("ARYN_MCP_MAX_WORKERS", 32)
+        self._worker_pool: ThreadPoolExecutor | None = None
+
+    @property
+    def worker_pool(self) -> ThreadPoolExecutor:
+        if self._worker_pool is None:
+            self._worker_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool-worker")
+        return self._worker_pool
+
+    def add_tool(self, fn: Callable, *args, **kwargs) -> None:
+        if not asyncio.iscoroutinefunction(fn):
+            fn = run_in_worker(fn)
+        super().add_tool(fn, *args, **kwargs)
+
+    async def run_tool(self, name: str, arguments: dict[str, Any], context: Context | None = None) -> Any:
+        """Calls a tool with arguments validated against its schema and returns what the tool returned, rather than
+        the MCP content call_tool converts it to"""
+        return await self._tool_manager.call_tool(name, arguments, context=context)
+
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor | None:
+    """Returns the pool of ARYN_MCP_CPU_WORKERS processes that CPU bound work runs in, or None if it is 0"""
+    global _process_pool
+    max_workers = get_env_int("ARYN_MCP_CPU_WORKERS", 0)
+    if max_workers <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Forking a process that runs threads can deadlock the child, so workers are started fresh
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def run_in_process(function: Callable[..., T], *args, discard: Callable[[T], None] | None = None, **kwargs) -> T:
+    """Runs function in the worker process pool, or in this thread if there is none, and returns its result
+
+    The tool call stops waiting when it is cancelled or runs out of time. The worker cannot be interrupted, so
+    discard is then called with the result once the worker finishes, e.g. to remove the files it wrote.
+    """
+    process_pool = get_process_pool()
+    if process_pool is None:
+        return function(*args, **kwargs)
+
+    future = process_pool.submit(function, *args, **kwargs)
+    cancellation = current_cancellation()
+    while True:
+        try:
+            # Cancellation can come at any time, so it is polled
+            return future.result(timeout=None if cancellation is None else 0.5)
+        except TimeoutError:
+            if cancellation is None or not cancellation.cancelled:
+                continue
+            if not future.cancel() and discard is not None:
+                future.add_done_callback(functools.partial(_discard_result, discard))
+            raise cancellation.error()
+
+
+def _discard_result(discard: Callable, future: Future) -> None:
+    if future.exception() is None:
+        discard(future.result())
@@ -21,6 +21,7 @@ from aryn_mcp_server.aryn_mcp_server import (
     delete_aryn_docset_properties,
     search_aryn_docset,
     query_aryn_docset,
+    wait_for_job,
 )
 from aryn_mcp_server.models.document_schema import SchemaField
 from aryn_mcp_server.models import (
@@ -38,12 +39,14 @@ from aryn_mcp_server.models import (
     ExtractArynDocumentPropertiesModel,
     DeleteArynDocSetPropertiesModel,
     SearchArynDocSetModel,
+    WaitForJobModel,
     QueryArynDocSetModel,
     Schema,
     PageRange,
 )
 
 from aryn_sdk.client import Client
+from mcp.server.fastmcp import Context
 
 from dotenv import load_dotenv
 
@@ -128,7 +131,8 @@ def create_docset():
         print(f"Warning: Failed to clean up docset {docset_data['docset_id']}: {e}")
 
 
-def test_partition_pdf(sample_pdf_path):
+@pytest.mark.asyncio
+async def test_partition_pdf(sample_pdf_path):
     args = PartitionModel(
         filename="test_partition",
         file=sample_pdf_path,
@@ -140,7 +144,7 @@ def test_partition_pdf(sample_pdf_path):
         extract_images=False,
         output_format="json",
     )
-    result = partition_pdf(args)
+    result = await partition_pdf(args, Context())
     assert isinstance(result, str)
     assert "File saved" in result
 
@@ -148,13 +152,14 @@ def test_partition_pdf(sample_pdf_path):
     assert Path(file_path).exists()
 
 
-def test_draw_boxes_on_pdf(sample_pdf_path, sample_json_path, create_docset):
+@pytest.mark.asyncio
+async def test_draw_boxes_on_pdf(sample_pdf_path, sample_json_path, create_docset):
     args = DrawBoxesModel(
         docset_id=create_docset["docset_id"],
         doc_id=create_docset["test_doc_id"],
         pages_to_draw_boxes_on=[PageRange(start=1, end=2)],
     )
-    result = get_boxes_drawn_on_pdf(args)
+    result = await get_boxes_drawn_on_pdf(args)
     assert isinstance(result, dict)
     assert "saved_image_paths" in result
     assert "saved_image_count" in result
@@ -168,7 +173,7 @@ def test_draw_boxes_on_pdf(sample_pdf_path, sample_json_path, create_docset):
         path_to_original_pdf=sample_pdf_path,
         pages_to_draw_boxes_on=[PageRange(start=1, end=2)],
     )
-    result = get_boxes_drawn_on_pdf(args)
+    result = await get_boxes_drawn_on_pdf(args)
     assert isinstance(result, dict)
     assert "saved_image_paths" in result
     assert "saved_image_count" in result
@@ -228,16 +233,18 @@ def test_delete_aryn_docset():
     assert result["docset_id"] == docset_id
 
 
-def test_add_aryn_document(create_docset):
+@pytest.mark.asyncio
+async def test_add_aryn_document(create_docset):
     docset_id = create_docset["docset_id"]
 
     args = AddArynDocumentModel(file=Path("tests/data/test_2.pdf"), docset_id=docset_id)
-    result = add_aryn_document(args, options=PartitionModel(**partition_options))
+    result = await add_aryn_document(args, options=PartitionModel(**partition_options), ctx=Context())
     assert isinstance(result, dict)
     assert "doc_id" in result
 
 
-def test_list_aryn_documents(sample_pdf_path, create_docset):
+@pytest.mark.asyncio
+async def test_list_aryn_documents(sample_pdf_path, create_docset):
     docset_id = create_docset["docset_id"]
 
     args = AddArynDocumentModel(file=sample_pdf_path, docset_id=docset_id)
@@ -248,7 +255,7 @@ def test_list_aryn_documents(sample_pdf_path, create_docset):
         text_mode="inline_fallback_to_ocr",
         table_mode="standard",
     )
-    result = add_aryn_document(args, options=options)
+    result = await add_aryn_document(args, options=options, ctx=Context())
     assert isinstance(result, dict)
     assert "doc_id" in result
 
@@ -294,14 +301,15 @@ def test_get_document_original_file(create_docset):
     assert Path(extracted_file_path).exists()
 
 
-def test_delete_aryn_document(sample_pdf_path, create_docset):
+@pytest.mark.asyncio
+async def test_delete_aryn_document(sample_pdf_path, create_docset):
     docset_id = create_docset["docset_id"]
 
     args = AddArynDocumentModel(
         file=sample_pdf_path,
         docset_id=docset_id,
     )
-    result = add_aryn_document(args, options=PartitionModel(**partition_options))
+    result = await add_aryn_document(args, options=PartitionModel(**partition_options), ctx=Context())
     assert isinstance(result, dict)
     assert "doc_id" in result
     doc_id = result["doc_id"]
@@ -312,7 +320,8 @@ def test_delete_aryn_document(sample_pdf_path, create_docset):
     assert "doc_id" in result
 
 
-def test_extract_delete_aryn_docset_properties(sample_pdf_path, create_docset):
+@pytest.mark.asyncio
+async def test_extract_delete_aryn_docset_properties(sample_pdf_path, create_docset):
     docset_id = create_docset["docset_id"]
 
     schema = Schema(
@@ -326,14 +335,18 @@ def test_extract_delete_aryn_docset_properties(sample_pdf_path, create_docset):
         ]
     )
     args = ExtractArynDocumentPropertiesModel(docset_id=docset_id, schema=schema)
-    extract_aryn_docset_properties(args)
+    job = extract_aryn_docset_properties(args)
+    result = await wait_for_job(WaitForJobModel(job_id=job["job_id"]), Context())
+    assert result["status"] == "succeeded"
 
-    delete_aryn_docset_properties(
+    job = delete_aryn_docset_properties(
         DeleteArynDocSetPropertiesModel(
             docset_id=docset_id,
             properties_to_delete=["Accident Number", "Aircraft Make"],
         )
     )
+    result = await wait_for_job(WaitForJobModel(job_id=job["job_id"]), Context())
+    assert result["status"] == "succeeded"
 
     result = get_aryn_docset_schema(GetArynDocSetModel(docset_id=docset_id))
     extracted_file_path = extract_file_path_from_message(result)
@@ -359,7 +372,8 @@ def test_search_aryn_docset(create_docset):
     assert "results" in result
 
 
-def test_query_aryn_docset(create_docset):
+@pytest.mark.asyncio
+async def test_query_aryn_docset(create_docset):
     docset_id = create_docset["docset_id"]
 
     args = QueryArynDocSetModel(
@@ -367,7 +381,7 @@ def test_query_aryn_docset(create_docset):
         query="Where did the accident occur?",
         summarize_result=True,
     )
-    result = query_aryn_docset(args)
+    result = await query_aryn_docset(args, Context())
     assert isinstance(result, dict)
     assert "summary" in result
     assert "doc_id" in result
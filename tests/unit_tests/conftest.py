@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARYN_MCP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("ARYN_API_KEY", "test-key")
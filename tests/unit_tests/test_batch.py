@@ -0,0 +1,124 @@
+import time
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from aryn_mcp_server.models import ExecuteBatchModel
+from aryn_mcp_server.utils.batch import run_batch
+from aryn_mcp_server.utils.cancellation import CancellationToken, check_cancellation, use_cancellation, with_deadline
+from aryn_mcp_server.utils.workers import ArynFastMCP, use_worker_pool
+
+
+class GetDocModel(BaseModel):
+    doc_id: str
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently_within_the_limit_and_after_their_dependencies():
+    server = ArynFastMCP(name="test")
+    running, most_running, order = 0, 0, []
+
+    @server.tool()
+    def get_doc(args: GetDocModel) -> dict:
+        nonlocal running, most_running
+        running += 1
+        most_running = max(most_running, running)
+        time.sleep(0.1)
+        order.append(args.doc_id)
+        running -= 1
+        if args.doc_id == "missing":
+            return {"error": "Document missing not found"}
+        return {"doc_id": args.doc_id}
+
+    batch = ExecuteBatchModel(
+        max_concurrency=3,
+        calls=[{"tool": "get_doc", "arguments": {"args": {"doc_id": f"doc-{i}"}}} for i in range(6)]
+        + [
+            {"tool": "get_doc", "arguments": {"args": {"doc_id": "last"}}, "depends_on": [0, 5]},
+            {"tool": "get_doc", "arguments": {"args": {"doc_id": "missing"}}},
+            {"tool": "get_doc", "arguments": {"args": {"doc_id": "never"}}, "depends_on": [7]},
+            {"tool": "get_doc", "arguments": {"args": {}}},
+            {"tool": "no_such_tool"},
+        ],
+    )
+    progress = []
+
+    async with use_worker_pool(server):
+        start = time.perf_counter()
+        results = await run_batch(batch.calls, server.run_tool, batch.max_concurrency, lambda *p: progress.append(p))
+        elapsed = time.perf_counter() - start
+
+    assert [result["result"] for result in results[:7]] == [{"doc_id": f"doc-{i}"} for i in range(6)] + [
+        {"doc_id": "last"}
+    ]
+    assert results[7]["result"] == {"error": "Document missing not found"}
+    assert results[8] == {"tool": "get_doc", "error": "Skipped because call 7 failed"}
+    assert "doc_id" in results[9]["error"] and "Unknown tool: no_such_tool" in results[10]["error"]
+    assert most_running == 3 and order.index("last") > order.index("doc-5") and "never" not in order
+    assert elapsed < 0.7
+    assert [p[1:] for p in progress] == [(i, 11) for i in range(1, 12)]
+
+
+def test_batches_cannot_be_nested_or_depend_on_later_calls():
+    with pytest.raises(ValidationError, match="cannot be nested"):
+        ExecuteBatchModel(calls=[{"tool": "execute_batch", "arguments": {"args": {"calls": []}}}])
+    with pytest.raises(ValidationError, match="can only depend on earlier calls"):
+        ExecuteBatchModel(calls=[{"tool": "get_doc", "depends_on": [1]}, {"tool": "get_doc"}])
+
+
+@pytest.mark.asyncio
+async def test_calls_after_a_failed_file_tool_are_skipped(monkeypatch, tmp_path):
+    from mcp.server.fastmcp import Context
+
+    from aryn_mcp_server import aryn_mcp_server as server
+
+    def unreachable(**kwargs):
+        raise Exception("Failed to get document doc-1 in docset ds-1: connection refused")
+
+    monkeypatch.setenv("ARYN_MCP_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(server.ADM, "get_document", unreachable)
+    batch = ExecuteBatchModel(
+        calls=[
+            {
+                "tool": "get_aryn_document_elements",
+                "arguments": {"args": {"docset_id": "ds-1", "doc_id": "doc-1", "return_original_elements": False}},
+            },
+            {"tool": "get_aryn_cache_stats", "depends_on": [0]},
+        ]
+    )
+
+    async with use_worker_pool(server.mcp):
+        results = (await server.execute_batch(batch, Context()))["results"]
+
+    assert results[0]["result"] == {"error": "Failed to get document doc-1 in docset ds-1: connection refused"}
+    assert results[1] == {"tool": "get_aryn_cache_stats", "error": "Skipped because call 0 failed"}
+
+
+@pytest.mark.asyncio
+async def test_calls_stop_once_the_batch_runs_out_of_time():
+    server = ArynFastMCP(name="test")
+    started = []
+
+    @server.tool()
+    @with_deadline
+    def get_doc(args: GetDocModel) -> dict:
+        started.append(args.doc_id)
+        time.sleep(0.3)
+        check_cancellation()
+        return {"doc_id": args.doc_id}
+
+    batch = ExecuteBatchModel(
+        max_concurrency=1, calls=[{"tool": "get_doc", "arguments": {"args": {"doc_id": f"doc-{i}"}}} for i in range(4)]
+    )
+
+    async with use_worker_pool(server):
+        with use_cancellation(CancellationToken(0.2, tool="execute_batch")):
+            start = time.perf_counter()
+            results = await run_batch(batch.calls, server.run_tool, batch.max_concurrency)
+            elapsed = time.perf_counter() - start
+
+    # The running call stops at the batch's deadline rather than its own, and the queued calls never start
+    assert started == ["doc-0"]
+    assert "get_doc ran out of time" in results[0]["error"]
+    assert all("execute_batch ran out of time" in result["error"] for result in results[1:])
+    assert elapsed < 0.5
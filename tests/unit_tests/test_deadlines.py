@@ -0,0 +1,127 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.cancellation import (
+    CancellableFile,
+    CancellationToken,
+    DeadlineExceeded,
+    current_cancellation,
+    phase,
+    propagate_cancellation,
+    use_cancellation,
+    with_deadline,
+)
+from aryn_mcp_server.utils.rate_limit import RequestGovernor
+from aryn_mcp_server.utils.resilience import CircuitBreaker, Resilience, RetryBudget, use_resilient_transport
+
+
+class HungAPI:
+    """Never answers, so requests only end when their read timeout passes, like a real transport's would"""
+
+    def __init__(self):
+        self.timeouts: list[float] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        timeout = request.extensions["timeout"]["read"]
+        self.timeouts.append(timeout)
+        time.sleep(timeout)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+
+def test_requests_get_the_time_left_and_fail_naming_the_phase():
+    api = HungAPI()
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    resilience = Resilience("Aryn API", 4, RetryBudget(ratio=10.0), CircuitBreaker("Aryn API", 5, 30.0))
+    use_resilient_transport(manager.client, resilience, httpx.MockTransport(api))
+
+    start = time.perf_counter()
+    with use_cancellation(CancellationToken(0.1, tool="get_aryn_docset_metadata")):
+        with pytest.raises(Exception, match="get_aryn_docset_metadata ran out of time after 0.1s while getting docset"):
+            manager.get_docset("ds-1")
+
+    assert time.perf_counter() - start < 1.0
+    assert len(api.timeouts) == 1 and api.timeouts[0] <= 0.1
+    assert resilience.breaker.consecutive_failures == 0
+
+
+def test_waits_for_a_busy_endpoint_stop_at_the_deadline():
+    governor = RequestGovernor(None, {"partition": 1})
+    release = governor.acquire("partition")
+
+    with use_cancellation(CancellationToken(0.05, tool="partition_pdf")):
+        with pytest.raises(DeadlineExceeded, match="while waiting for a free partition slot"):
+            governor.acquire("partition")
+
+    release()
+    governor.acquire("partition")()
+
+
+def test_tool_deadlines_come_from_config_and_reach_executor_threads(monkeypatch):
+    monkeypatch.setenv("ARYN_MCP_TOOL_DEADLINE", "0")
+    monkeypatch.setenv("ARYN_MCP_TOOL_DEADLINE_SLOW_TOOL", "30")
+
+    @with_deadline
+    def slow_tool(args=None):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            unpropagated = executor.submit(current_cancellation).result()
+            propagated = executor.submit(propagate_cancellation(current_cancellation)).result()
+        return unpropagated, propagated
+
+    @with_deadline
+    def other_tool(args=None):
+        return current_cancellation()
+
+    unpropagated, propagated = slow_tool()
+    assert unpropagated is None
+    assert (propagated.tool, propagated.deadline_seconds) == ("slow_tool", 30.0)
+    assert other_tool().deadline is None
+
+
+class CancellingFile(io.BytesIO):
+    """A file whose reader cancels the tool call after the first chunk, like a client aborting mid-upload"""
+
+    def __init__(self, content: bytes, cancellation: CancellationToken):
+        super().__init__(content)
+        self.name = "report.pdf"
+        self.cancellation = cancellation
+
+    def read(self, size: int | None = -1) -> bytes:
+        chunk = super().read(size)
+        self.cancellation.cancel("cancelled by the client")
+        return chunk
+
+
+def test_cancelled_uploads_stop_at_the_next_chunk():
+    cancellation = CancellationToken(tool="add_aryn_document")
+    upload = CancellableFile(CancellingFile(b"x" * (1 << 20), cancellation), cancellation)
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client, phase("uploading report.pdf"):
+        with pytest.raises(DeadlineExceeded, match="add_aryn_document was cancelled by the client while uploading"):
+            client.post("https://api.aryn.ai/v1/storage/docsets/ds-1/docs", files={"file": upload})
+    assert not sent
+
+
+def test_failed_downloads_leave_no_partial_file(tmp_path):
+    class FailingDownloadClient:
+        def get_doc_binary(self, docset_id, doc_id, file):
+            with open(file, "wb") as f:
+                f.write(b"%PDF-1.7 trunc")
+            raise httpx.ReadError("connection reset")
+
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    manager.client = FailingDownloadClient()
+
+    with pytest.raises(Exception, match="connection reset"):
+        manager.get_document_binary("ds-1", "doc-1", tmp_path / "doc-1.pdf")
+    assert not (tmp_path / "doc-1.pdf").exists()
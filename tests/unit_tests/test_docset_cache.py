@@ -0,0 +1,101 @@
+import time
+import threading
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager, DocSetInfo
+from aryn_mcp_server.utils.cache import RefreshingCache
+
+
+def docset_metadata(docset_id: str, size: int):
+    return SimpleNamespace(docset_id=docset_id, name="docset", readonly=False, properties={}, schema_=None, size=size)
+
+
+class FakeDocSetClient:
+    def __init__(self):
+        self.get_calls = 0
+        self.size = 1
+
+    def get_docset(self, docset_id):
+        self.get_calls += 1
+        if docset_id == "missing":
+            raise Exception("ArynSDKException: status_code: 404")
+        return SimpleNamespace(value=docset_metadata(docset_id, self.size))
+
+    def delete_properties(self, docset_id, property_names):
+        return SimpleNamespace(value=SimpleNamespace(exit_status=0))
+
+
+def test_stale_entries_are_served_while_refreshing_in_the_background():
+    cache = RefreshingCache(fresh_seconds=0.05, max_stale_seconds=10)
+    reloaded = threading.Event()
+    values = iter(["first", "second"])
+
+    def loader():
+        value = next(values)
+        if value == "second":
+            reloaded.set()
+        return value
+
+    assert cache.get_or_load("key", loader) == "first"
+    time.sleep(0.1)
+    assert cache.get_or_load("key", loader) == "first"
+    assert reloaded.wait(1)
+    time.sleep(0.01)
+    assert cache.get_or_load("key", loader) == "second"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_invalidation_discards_reloads_that_started_before_it():
+    cache = RefreshingCache(fresh_seconds=60, max_stale_seconds=60)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load_outdated():
+        loading.set()
+        release.wait()
+        return "outdated"
+
+    loader = threading.Thread(target=cache.get_or_load, args=("key", load_outdated))
+    loader.start()
+    loading.wait()
+    cache.invalidate("key")
+    release.set()
+    loader.join()
+
+    assert cache.get_or_load("key", lambda: "new") == "new"
+
+
+def test_invalidations_are_only_tracked_while_loads_are_in_flight():
+    cache = RefreshingCache(fresh_seconds=60, max_stale_seconds=60)
+    for number in range(100):
+        cache.get_or_load(f"key-{number}", lambda: "value")
+        cache.invalidate(f"key-{number}")
+
+    assert (cache._generations, cache._loads) == ({}, {})
+
+
+def test_get_docset_is_cached_until_the_docset_changes():
+    client = FakeDocSetClient()
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    assert manager.get_docset("ds-1")["size"] == 1
+    assert "schema" not in manager.get_docset("ds-1", exclude_schema=True)
+    assert manager.get_docset("missing") is None
+    assert manager.get_docset("missing") is None
+    assert client.get_calls == 3
+
+    client.size = 2
+    manager.delete_properties("ds-1", ["Accident Number"])
+    assert manager.get_docset("ds-1")["size"] == 2
+    assert client.get_calls == 4
+
+
+def test_docset_info_builds_the_schema_only_when_asked():
+    docset_params = docset_metadata("ds-1", 1)
+    docset_params.schema_ = SimpleNamespace(properties=[SimpleNamespace(name="Accident Number", field_type="str")])
+    docset_info = DocSetInfo(docset_params)
+
+    assert list(docset_info.as_dict(include_schema=False)) == ["docset_id", "name", "readonly", "properties", "size"]
+    assert docset_info._schema is None
+    assert docset_info.as_dict()["schema"] == [{"name": "Accident Number", "field_type": "str"}]
@@ -0,0 +1,129 @@
+import json
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.cache import notify_docset_properties_changed
+from aryn_mcp_server.utils.mirror import DocSetMirror
+
+
+class FakeMirrorClient:
+    def __init__(self, doc_ids: list[str]):
+        self.doc_ids = list(doc_ids)
+        self.fetched: list[str] = []
+        self.on_fetch = None
+
+    def list_docs(self, docset_id):
+        return [
+            SimpleNamespace(
+                account_id="a", doc_id=doc_id, name=f"{doc_id}.pdf", size=1, content_type="pdf", properties=None
+            )
+            for doc_id in self.doc_ids
+        ]
+
+    def get_doc(self, docset_id, doc_id, include_elements, include_binary=False):
+        self.fetched.append(doc_id)
+        if self.on_fetch is not None:
+            self.on_fetch()
+        element = SimpleNamespace(
+            id="e-1", type="Table", text_representation=f"Table of {doc_id}", properties={}, bbox=(0, 0, 1, 1)
+        )
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                id=doc_id,
+                elements=[element] if include_elements else [],
+                properties={"entity": {"state": "CA"}, "_original_elements": [{"type": "table"}]},
+                binary_data=b"%PDF" if include_binary else None,
+            )
+        )
+
+    def delete_doc(self, docset_id, doc_id):
+        self.doc_ids.remove(doc_id)
+        return SimpleNamespace(
+            value=SimpleNamespace(account_id="a", doc_id=doc_id, name="doc", size=1, content_type="pdf", properties={})
+        )
+
+
+def make_manager(doc_ids: list[str]) -> tuple[ArynDocumentManager, FakeMirrorClient]:
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    client = FakeMirrorClient(doc_ids)
+    manager.client = client
+    return manager, client
+
+
+def test_synced_documents_are_read_from_the_mirror():
+    manager, client = make_manager(["doc-1", "doc-2"])
+    fetched = manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+
+    assert manager.sync_docset("ds-1")["fetched_documents"] == 2
+    client.fetched.clear()
+
+    assert manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False) == fetched
+    assert fetched["elements"]["e-1"]["bbox"] == (0, 0, 1, 1)
+    properties_only = manager.get_document("ds-1", "doc-2", include_elements=False, include_binary=False)
+    assert (properties_only["elements"], properties_only["properties"]) == ({}, {"state": "CA"})
+    assert client.fetched == []
+
+    # Binaries are not mirrored
+    assert manager.get_document("ds-1", "doc-1", include_elements=False, include_binary=True)["binary_data"] == b"%PDF"
+    assert client.fetched == ["doc-1"]
+
+
+def test_later_syncs_only_fetch_added_and_drop_removed_documents():
+    manager, client = make_manager(["doc-1", "doc-2", "doc-3"])
+    manager.sync_docset("ds-1")
+
+    client.fetched.clear()
+    client.doc_ids = ["doc-1", "doc-3", "doc-4"]
+    result = manager.sync_docset("ds-1")
+    assert (result["full_refresh"], result["fetched_documents"], result["removed_documents"]) == (False, 1, 1)
+    assert client.fetched == ["doc-4"]
+    assert manager.mirror.doc_ids("ds-1") == {"doc-1", "doc-3", "doc-4"}
+
+    manager.delete_document("ds-1", "doc-4")
+    assert manager.mirror.doc_ids("ds-1") == {"doc-1", "doc-3"}
+
+
+def test_property_changes_and_staleness_send_reads_to_the_api():
+    manager, client = make_manager(["doc-1"])
+    manager.sync_docset("ds-1")
+    client.fetched.clear()
+
+    notify_docset_properties_changed("ds-1")
+    manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+    assert client.fetched == ["doc-1"]
+
+    assert manager.sync_docset("ds-1")["full_refresh"] is True
+    client.fetched.clear()
+    manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+    assert client.fetched == []
+
+    manager.mirror.max_staleness_seconds = 0
+    manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+    assert client.fetched == ["doc-1"]
+
+
+def test_property_changes_during_a_sync_keep_the_mirror_stale():
+    manager, client = make_manager(["doc-1"])
+    client.on_fetch = lambda: notify_docset_properties_changed("ds-1")
+    manager.sync_docset("ds-1")
+
+    client.on_fetch = None
+    client.fetched.clear()
+    manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+    assert client.fetched == ["doc-1"]
+    assert manager.sync_docset("ds-1")["full_refresh"] is True
+
+
+def test_mirrored_documents_are_stored_as_json_without_losing_types(tmp_path):
+    mirror = DocSetMirror(tmp_path / "mirror.sqlite3", max_staleness_seconds=60)
+    document = {
+        "elements": {"e-1": {"bbox": (0, 0.5, 1, 1), "properties": {1: "page", "__mirror_type__": "x"}}},
+        "binary_data": b"%PDF",
+        "original_elements": [{"type": "table", "cells": [(1, 2)]}],
+    }
+    mirror.put_documents("ds-1", [("doc-1", document)])
+    mirror.mark_synced("ds-1", 0)
+
+    assert mirror.get_document("ds-1", "doc-1") == document
+    (stored,) = mirror._connection.execute("SELECT document FROM mirrored_documents").fetchone()
+    assert isinstance(json.loads(stored), dict)
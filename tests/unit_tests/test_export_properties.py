@@ -0,0 +1,105 @@
+import csv
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.export import schema_column_types
+from aryn_mcp_server.utils.utils import save_file
+
+
+class FakeDocumentClient:
+    def __init__(self, entities: dict[str, dict]):
+        self.entities = entities
+        self.get_doc_calls = 0
+
+    def list_docs(self, docset_id, page_size):
+        return [
+            SimpleNamespace(
+                doc_id=doc_id,
+                name=f"{doc_id}.pdf",
+                # Some listings carry the properties, the others have to be fetched
+                properties={"entity": entity} if i % 2 else None,
+            )
+            for i, (doc_id, entity) in enumerate(self.entities.items())
+        ]
+
+    def get_doc(self, docset_id, doc_id, include_elements, include_binary=False):
+        self.get_doc_calls += 1
+        return SimpleNamespace(value=SimpleNamespace(properties={"entity": self.entities[doc_id]}))
+
+
+def make_manager(entities: dict[str, dict]) -> ArynDocumentManager:
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    manager.client = FakeDocumentClient(entities)
+    return manager
+
+
+def test_export_writes_rows_in_listing_order_with_schema_columns(tmp_path):
+    entities = {f"doc-{i}": {"Aircraft Make": f"Make {i}", "Accident Number": i, "Other": "x"} for i in range(25)}
+    manager = make_manager(entities)
+    progress = []
+
+    path = tmp_path / "properties.csv"
+    exported = manager.export_properties(
+        "ds-1",
+        path,
+        "csv",
+        {"Accident Number": "int", "Aircraft Make": "str"},
+        page_size=10,
+        on_progress=progress.append,
+    )
+
+    assert exported == 25
+    assert progress == [10, 20, 25]
+    assert manager.client.get_doc_calls == 13
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["doc_id", "name", "Accident Number", "Aircraft Make"]
+    assert rows[1] == ["doc-0", "doc-0.pdf", "0", "Make 0"]
+    assert [row[0] for row in rows[1:]] == list(entities)
+
+
+def test_export_without_schema_uses_the_properties_of_the_first_page(tmp_path):
+    manager = make_manager({"doc-0": {"b": 1}, "doc-1": {"a": [1, 2]}})
+
+    path = tmp_path / "properties.csv"
+    manager.export_properties("ds-1", path, "csv", None)
+
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["doc_id", "name", "b", "a"], ["doc-0", "doc-0.pdf", "1", ""], ["doc-1", "doc-1.pdf", "", "[1, 2]"]]
+
+
+def test_export_to_parquet_types_columns_after_the_schema(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    manager = make_manager({"doc-0": {"Accident Number": "12"}, "doc-1": {"Accident Number": "unknown"}})
+
+    schema = [{"name": "Accident Number", "property_type": "int"}, {"name": "Date", "property_type": "datetime"}]
+    assert schema_column_types(schema) == {"Accident Number": "int", "Date": "date"}
+
+    path = tmp_path / "properties.parquet"
+    manager.export_properties("ds-1", path, "parquet", schema_column_types(schema))
+
+    table = pq.read_table(path)
+    assert table.column("Accident Number").to_pylist() == [12, None]
+
+
+def test_export_to_parquet_without_pyarrow_fails_before_fetching(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    manager = make_manager({"doc-0": {"Accident Number": "12"}})
+
+    with pytest.raises(Exception, match=r"aryn-mcp-server\[parquet\]"):
+        manager.export_properties("ds-1", tmp_path / "properties.parquet", "parquet", None)
+    assert manager.client.get_doc_calls == 0
+    assert not (tmp_path / "properties.parquet").exists()
+
+
+def test_save_file_writes_document_properties_as_csv(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARYN_MCP_OUTPUT_DIR", str(tmp_path))
+
+    path = save_file({"Aircraft Make": "Cessna", "location": {"state": "CA"}, "tags": ["a"]}, "doc-1", "csv")
+
+    with open(path, newline="") as f:
+        assert list(csv.reader(f)) == [["Aircraft Make", "location.state", "tags"], ["Cessna", "CA", '["a"]']]
@@ -0,0 +1,89 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aryn_mcp_server.utils.hedging import Hedger, LatencyTracker
+from aryn_mcp_server.utils.resilience import RetryBudget
+
+
+def make_hedger(ratio: float = 1.0, max_workers: int = 32) -> Hedger:
+    hedger = Hedger(
+        percentile=90,
+        budget=RetryBudget(ratio=ratio, min_retries_per_second=0.0),
+        min_delay_seconds=0.01,
+        max_workers=max_workers,
+    )
+    for _ in range(hedger.min_samples):
+        hedger._tracker("get_doc").record(0.01)
+    return hedger
+
+
+def test_percentiles_of_recent_latencies():
+    tracker = LatencyTracker(max_samples=100)
+    for latency in range(1, 101):
+        tracker.record(latency / 1000)
+    assert tracker.percentile(50) == 0.05
+    assert tracker.percentile(99) == 0.099
+    assert tracker.percentile(100) == 0.1
+
+
+def test_reads_are_not_hedged_until_latencies_are_known():
+    hedger = Hedger(percentile=90, budget=RetryBudget(ratio=1.0))
+    assert hedger.call("get_doc", lambda: "doc") == "doc"
+    assert hedger.hedge_delay("get_doc") is None
+    assert hedger.stats()["hedges"] == 0
+
+
+def test_slow_reads_are_hedged_and_the_first_answer_wins():
+    hedger = make_hedger()
+    attempts = itertools.count()
+
+    def read():
+        if next(attempts) == 0:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    start = time.perf_counter()
+    assert hedger.call("get_doc", read) == "fast"
+    assert time.perf_counter() - start < 0.3
+    assert (hedger.stats()["hedges"], hedger.stats()["hedge_wins"]) == (1, 1)
+
+
+def test_failed_copies_lose_to_answers_and_budget_limits_hedges():
+    hedger = make_hedger()
+    attempts = itertools.count()
+
+    def read():
+        if next(attempts) == 0:
+            time.sleep(0.05)
+            raise ConnectionError("reset")
+        time.sleep(0.1)
+        return "doc"
+
+    assert hedger.call("get_doc", read) == "doc"
+
+    def slow_failing_read():
+        time.sleep(0.05)
+        raise ConnectionError("reset")
+
+    hedger = make_hedger(ratio=0.0)
+    with pytest.raises(ConnectionError):
+        hedger.call("get_doc", slow_failing_read)
+    assert (hedger.stats()["hedges"], hedger.stats()["hedges_denied"]) == (0, 1)
+
+
+def test_reads_do_not_queue_behind_busy_hedges():
+    hedger = make_hedger(max_workers=1)
+    release = threading.Event()
+    hedger._executor.submit(release.wait)
+
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            reads = [executor.submit(hedger.call, "get_doc", lambda: "doc") for _ in range(4)]
+            assert [read.result(timeout=1.0) for read in reads] == ["doc"] * 4
+    finally:
+        release.set()
@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.models.document_schema import Schema, SchemaField
+from aryn_mcp_server.utils.cache import on_docset_properties_changed
+
+
+class FakeExtractionClient:
+    def __init__(self, entities: dict[str, dict]):
+        self.entities = entities
+        self.get_doc_calls: list[str] = []
+        self.extracted_schemas: list[list[str]] = []
+
+    def get_docset(self, docset_id):
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                docset_id=docset_id, name="docset", readonly=False, properties={}, schema_=None, size=len(self.entities)
+            )
+        )
+
+    def list_docs(self, docset_id):
+        return [SimpleNamespace(doc_id=doc_id, created_at="2025-01-01", properties=None) for doc_id in self.entities]
+
+    def get_doc(self, docset_id, doc_id, include_elements):
+        self.get_doc_calls.append(doc_id)
+        return SimpleNamespace(value=SimpleNamespace(properties={"entity": self.entities[doc_id]}))
+
+    def extract_properties_async(self, docset_id, schema):
+        self.extracted_schemas.append([field.name for field in schema.fields])
+        return SimpleNamespace(task_id=f"task-{len(self.extracted_schemas)}")
+
+    def get_async_result(self, task):
+        return SimpleNamespace(status_code=200, value={"exit_status": 0})
+
+    def delete_properties(self, docset_id, property_names):
+        return SimpleNamespace(value=SimpleNamespace(exit_status=0))
+
+
+def schema(description: str = "The make of the aircraft") -> Schema:
+    return Schema(
+        fields=[
+            SchemaField(name="Accident Number", field_type="str"),
+            SchemaField(name="Aircraft Make", field_type="str", description=description),
+        ]
+    )
+
+
+def extract(manager: ArynDocSetManager, properties_to_extract: Schema) -> dict:
+    job = manager.submit_extract_properties("ds-1", properties_to_extract, incremental=True)
+    return manager.jobs.poll(job.job_id).as_dict()
+
+
+def test_incremental_extraction_only_runs_for_missing_properties():
+    client = FakeExtractionClient({"doc-1": {"Accident Number": "A1"}, "doc-2": {}})
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    result = extract(manager, schema())["result"]
+    assert result["documents_missing_properties"] == 2
+    assert client.extracted_schemas == [["Accident Number", "Aircraft Make"]]
+
+    # Everything is recorded in the ledger now, so nothing is fetched or extracted
+    client.get_doc_calls.clear()
+    job_info = extract(manager, schema())
+    assert job_info["status"] == "succeeded"
+    assert job_info["result"]["documents_up_to_date"] == 2
+    assert client.get_doc_calls == []
+    assert len(client.extracted_schemas) == 1
+
+    # Only the new document is looked at
+    client.entities["doc-3"] = {}
+    assert extract(manager, schema())["result"]["documents_missing_properties"] == 1
+    assert client.get_doc_calls == ["doc-3"]
+
+
+def test_incremental_extraction_skips_properties_that_already_exist():
+    client = FakeExtractionClient({"doc-1": {"Accident Number": "A1"}, "doc-2": {"Accident Number": "A2"}})
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    extract(manager, schema())
+    assert client.extracted_schemas == [["Aircraft Make"]]
+
+
+def test_changed_field_definitions_are_extracted_again():
+    client = FakeExtractionClient({"doc-1": {}, "doc-2": {}})
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    extract(manager, schema())
+    extract(manager, schema(description="The manufacturer of the aircraft"))
+    assert client.extracted_schemas == [["Accident Number", "Aircraft Make"], ["Aircraft Make"]]
+
+
+def test_deleting_properties_directly_forgets_them_and_reports_the_change():
+    client = FakeExtractionClient({"doc-1": {"Accident Number": "A1", "Aircraft Make": "Cessna"}})
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+    extract(manager, schema())
+    changed: list[str] = []
+    stop_listening = on_docset_properties_changed(changed.append)
+
+    manager.delete_properties("ds-1", ["Aircraft Make"])
+    stop_listening()
+
+    assert changed == ["ds-1"]
+    assert [field_name for _, field_name in manager.extraction_ledger.get_docset("ds-1")] == ["Accident Number"]
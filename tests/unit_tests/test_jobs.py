@@ -0,0 +1,105 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.utils.cache import on_docset_changed
+from aryn_mcp_server.utils.jobs import Job, JobRegistry
+from aryn_sdk.types.schema import Schema, SchemaField
+
+
+class FakeJobClient:
+    def __init__(self, pending_polls: int, exit_status: int = 0):
+        self.pending_polls = pending_polls
+        self.exit_status = exit_status
+        self.result_calls = 0
+
+    def get_docset(self, docset_id):
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                docset_id=docset_id, name="docset", readonly=False, properties={}, schema_=None, size=1
+            )
+        )
+
+    def extract_properties_async(self, docset_id, schema):
+        return SimpleNamespace(task_id="extract-task")
+
+    def delete_properties_async(self, docset_id, property_names):
+        return SimpleNamespace(task_id="delete-task")
+
+    def get_async_result(self, task):
+        self.result_calls += 1
+        if self.result_calls <= self.pending_polls:
+            return SimpleNamespace(status_code=202)
+        return SimpleNamespace(status_code=200, value={"exit_status": self.exit_status})
+
+
+def test_extract_properties_job_finishes_after_polling():
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = FakeJobClient(pending_polls=2)
+    changed = []
+    stop_listening = on_docset_changed(changed.append)
+
+    schema = Schema(fields=[SchemaField(name="Accident Number", field_type="str")])
+    job = manager.submit_extract_properties("ds-1", schema)
+    assert job.as_dict()["status"] == "running"
+
+    assert manager.jobs.poll(job.job_id).status == "running"
+    assert manager.jobs.poll(job.job_id).status == "running"
+    assert changed == []
+
+    job_info = manager.jobs.poll(job.job_id).as_dict()
+    assert job_info["status"] == "succeeded"
+    assert job_info["result"] == {"docset_id": "ds-1", "extracted_properties": ["Accident Number"]}
+    assert changed == ["ds-1"]
+    stop_listening()
+
+    # Finished jobs are not polled again
+    manager.jobs.poll(job.job_id)
+    assert manager.client.result_calls == 3
+
+
+def test_failed_delete_properties_job_reports_its_error():
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = FakeJobClient(pending_polls=0, exit_status=1)
+
+    job = manager.submit_delete_properties("ds-1", ["Accident Number"])
+    job_info = manager.jobs.poll(job.job_id).as_dict()
+    assert job_info["status"] == "failed"
+    assert job_info["error"] == "Exit status: 1"
+
+
+def test_poll_delay_backs_off_up_to_the_maximum():
+    jobs = JobRegistry(initial_poll_interval=1.0, max_poll_interval=5.0, poll_backoff=2.0)
+    jobs.submit(Job("job-1", "extract_properties", "ds-1", lambda: None))
+
+    delays = []
+    for _ in range(5):
+        jobs.poll("job-1")
+        delays.append(jobs.next_poll_delay("job-1"))
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_old_finished_jobs_are_pruned():
+    jobs = JobRegistry(max_finished_jobs=1)
+    for i in range(3):
+        jobs.submit(Job(f"job-{i}", "delete_properties", "ds-1", lambda: {"done": True}))
+        jobs.poll(f"job-{i}")
+    jobs.submit(Job("job-3", "delete_properties", "ds-1", lambda: None))
+
+    assert [job_id for job_id in jobs._jobs] == ["job-2", "job-3"]
+
+
+def test_running_jobs_finish_without_being_asked_about():
+    jobs = JobRegistry(initial_poll_interval=0.01, max_poll_interval=0.02)
+    checks = iter([None, None, {"done": True}])
+    finished = threading.Event()
+    job = jobs.submit(Job("job-1", "extract_properties", "ds-1", lambda: next(checks), lambda _: finished.set()))
+
+    assert finished.wait(timeout=2.0)
+    assert (job.status, job.result, job.polls) == ("succeeded", {"done": True}, 3)
+
+    deadline = time.monotonic() + 2.0
+    while jobs._poller is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert jobs._poller is None
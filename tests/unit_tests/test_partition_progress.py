@@ -0,0 +1,41 @@
+import logging
+
+from aryn_mcp_server import aryn_document_manager
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.models import PartitionModel
+
+sdk_logger = logging.getLogger("aryn_sdk.client.partition")
+
+
+def fake_partition_file(file, **kwargs):
+    """Uploads the file in 64 KiB chunks like httpx, then logs the status lines the service streams like the SDK"""
+    while file.read(1 << 16):
+        pass
+    for status in ("T+   0.00: Waiting for scheduling", "T+   1.87: completed page 1", "T+   2.93: completed page 2"):
+        sdk_logger.info(f"ArynPartitioner: {status}")
+    return {"elements": []}
+
+
+def test_partitions_report_upload_and_page_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(aryn_document_manager, "partition_file", fake_partition_file)
+    file = tmp_path / "report.pdf"
+    file.write_bytes(b"x" * (2 << 20))
+    reports = []
+
+    logger_level = sdk_logger.level
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    manager.partition_file(
+        str(file),
+        PartitionModel(filename="report", file=str(file)),
+        on_progress=lambda message, progress, total: reports.append((message, progress, total)),
+    )
+
+    uploads = [report for report in reports if report[0].startswith("Uploaded")]
+    assert 1 < len(uploads) <= 21
+    assert uploads[-1] == (f"Uploaded 2.0 of 2.0 MiB of {file}", 2 << 20, 2 << 20)
+    assert [message for message, _, _ in reports[len(uploads) :]] == [
+        "Partitioning: T+   0.00: Waiting for scheduling",
+        "Partitioning: T+   1.87: completed page 1",
+        "Partitioning: T+   2.93: completed page 2",
+    ]
+    assert sdk_logger.level == logger_level and not sdk_logger.filters
@@ -0,0 +1,95 @@
+import pytest
+from pydantic import ValidationError
+
+from aryn_mcp_server.models import PropertiesFilterModel, PropertiesFilterGroupModel, SearchArynDocSetModel
+from aryn_mcp_server.utils.properties_filter import compile_properties_filter
+
+
+def test_single_comparisons_compile_like_before():
+    properties_filter = [
+        PropertiesFilterModel(property="Accident Number", property_type="str", value="DCA25MA108", operator="="),
+        PropertiesFilterModel(property="Injuries", property_type="int", value="3", operator=">"),
+    ]
+
+    assert compile_properties_filter(properties_filter) == (
+        '(properties.entity."Accident Number"="DCA25MA108") AND (properties.entity."Injuries">3)'
+    )
+
+
+def test_in_between_and_groups():
+    properties_filter = [
+        PropertiesFilterGroupModel(
+            logical_operator="or",
+            filters=[
+                PropertiesFilterModel(property="state", property_type="str", value=["CA", "NY"], operator="in"),
+                PropertiesFilterModel(
+                    property="value", property_type="float", value=["1e6", "2.5e6"], operator="between"
+                ),
+            ],
+        ),
+        PropertiesFilterGroupModel(
+            logical_operator="not",
+            filters=[PropertiesFilterModel(property="date", property_type="date", value="2024-01-31", operator="<")],
+        ),
+    ]
+
+    assert compile_properties_filter(properties_filter) == (
+        '((properties.entity."state"="CA" OR properties.entity."state"="NY") OR '
+        '(properties.entity."value">=1000000.0 AND properties.entity."value"<=2500000.0)) AND '
+        'NOT (properties.entity."date"<"2024-01-31")'
+    )
+
+
+def test_strings_are_escaped_and_numbers_validated():
+    quoted = [PropertiesFilterModel(property='a "b"', property_type="str", value='say "hi"\\', operator="=")]
+    assert compile_properties_filter(quoted) == '(properties.entity."a \\"b\\""="say \\"hi\\"\\\\")'
+
+    with pytest.raises(ValueError):
+        compile_properties_filter(
+            [PropertiesFilterModel(property="n", property_type="int", value="1 OR 1=1", operator="=")]
+        )
+
+    with pytest.raises(ValueError):
+        compile_properties_filter(
+            [PropertiesFilterModel(property="d", property_type="date", value="31/01/2024", operator="=")]
+        )
+
+
+def test_operator_value_shapes_are_validated():
+    with pytest.raises(ValidationError):
+        PropertiesFilterModel(property="state", property_type="str", value="CA", operator="in")
+    with pytest.raises(ValidationError):
+        PropertiesFilterModel(property="n", property_type="int", value=["1"], operator="between")
+    with pytest.raises(ValidationError):
+        PropertiesFilterGroupModel(
+            logical_operator="not",
+            filters=[
+                PropertiesFilterModel(property="a", property_type="str", value="x", operator="="),
+                PropertiesFilterModel(property="b", property_type="str", value="y", operator="="),
+            ],
+        )
+
+
+def test_search_model_accepts_nested_groups():
+    args = SearchArynDocSetModel.model_validate(
+        {
+            "docset_id": "ds-1",
+            "query_or_properties_filter": "properties_filter",
+            "properties_filter": [
+                {
+                    "logical_operator": "or",
+                    "filters": [
+                        {"property": "state", "property_type": "str", "value": "CA", "operator": "="},
+                        {"property": "state", "property_type": "str", "value": "TX", "operator": "="},
+                    ],
+                }
+            ],
+            "page_size": 10,
+            "return_type": "doc",
+        }
+    )
+
+    assert isinstance(args.properties_filter[0], PropertiesFilterGroupModel)
+    assert compile_properties_filter(args.properties_filter) == (
+        '((properties.entity."state"="CA") OR (properties.entity."state"="TX"))'
+    )
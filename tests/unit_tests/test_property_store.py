@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import pytest
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.models import PropertiesFilterGroupModel, PropertiesFilterModel
+from aryn_mcp_server.utils.cache import notify_docset_changed
+from aryn_mcp_server.utils.property_store import PropertySnapshot
+
+FIELD_TYPES = {"state": "str", "value": "float", "signed": "date", "active": "bool"}
+
+CONTRACTS = [
+    ("doc-0", {"state": "CA", "value": 2_000_000, "signed": "2024-03-01", "active": True}),
+    ("doc-1", {"state": "CA", "value": 500_000, "signed": "2024-07-15", "active": False}),
+    ("doc-2", {"state": "NY", "value": 3_000_000, "signed": "2023-11-30", "active": True}),
+    ("doc-3", {"state": "NY", "value": "unknown", "active": "true"}),
+    ("doc-4", {"value": 1_500_000}),
+]
+
+
+def filter(property: str, operator: str, value, property_type: str = "str") -> PropertiesFilterModel:
+    return PropertiesFilterModel(property=property, operator=operator, value=value, property_type=property_type)
+
+
+@pytest.fixture
+def snapshot() -> PropertySnapshot:
+    return PropertySnapshot.build("ds-1", FIELD_TYPES, CONTRACTS)
+
+
+def matching(snapshot: PropertySnapshot, properties_filter) -> list[str]:
+    return snapshot.doc_ids[snapshot.filter_mask(properties_filter)].tolist()
+
+
+def test_filters_are_evaluated_on_typed_columns(snapshot):
+    assert matching(snapshot, [filter("value", ">", "1000000", "float")]) == ["doc-0", "doc-2", "doc-4"]
+    assert matching(snapshot, [filter("state", "in", ["NY", "TX"])]) == ["doc-2", "doc-3"]
+    assert matching(snapshot, [filter("state", "<>", "CA")]) == ["doc-2", "doc-3"]
+    assert matching(snapshot, [filter("signed", "between", ["2024-01-01", "2024-12-31"], "date")]) == ["doc-0", "doc-1"]
+    assert matching(snapshot, [filter("active", "=", "true", "bool")]) == ["doc-0", "doc-2", "doc-3"]
+
+    either = PropertiesFilterGroupModel(
+        logical_operator="or", filters=[filter("state", "=", "CA"), filter("value", "<", "2000000", "float")]
+    )
+    not_ny = PropertiesFilterGroupModel(logical_operator="not", filters=[filter("state", "=", "NY")])
+    assert matching(snapshot, [either, not_ny]) == ["doc-0", "doc-1", "doc-4"]
+
+
+def test_unknown_properties_are_reported(snapshot):
+    with pytest.raises(ValueError, match="Unknown property"):
+        snapshot.filter_mask([filter("county", "=", "Marin")])
+
+
+def test_aggregations_per_group(snapshot):
+    groups = snapshot.aggregate(
+        [filter("value", ">", "1000000", "float")],
+        ["state"],
+        [("count", None), ("sum", "value"), ("max", "value")],
+    )
+    assert groups == [
+        {"state": "CA", "count": 1, "sum_value": 2_000_000.0, "max_value": 2_000_000.0},
+        {"state": "NY", "count": 1, "sum_value": 3_000_000.0, "max_value": 3_000_000.0},
+        {"state": None, "count": 1, "sum_value": 1_500_000.0, "max_value": 1_500_000.0},
+    ]
+
+    assert snapshot.aggregate(None, [], [("avg", "value"), ("count", "value")]) == [
+        {"avg_value": 1_750_000.0, "count_value": 4}
+    ]
+    with pytest.raises(ValueError, match="numeric property"):
+        snapshot.aggregate(None, [], [("sum", "state")])
+
+
+class FakePropertiesClient:
+    def __init__(self, documents: list[tuple[str, dict]]):
+        self.documents = dict(documents)
+        self.fetched: list[str] = []
+
+    def get_docset(self, docset_id):
+        schema = SimpleNamespace(
+            properties=[
+                SimpleNamespace(name=name, property_type=field_type) for name, field_type in FIELD_TYPES.items()
+            ]
+        )
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                docset_id=docset_id, name="docset", readonly=False, properties={}, schema_=schema, size=1
+            )
+        )
+
+    def list_docs(self, docset_id):
+        return [SimpleNamespace(doc_id=doc_id, properties=None) for doc_id in self.documents]
+
+    def get_doc(self, docset_id, doc_id, include_elements):
+        self.fetched.append(doc_id)
+        return SimpleNamespace(value=SimpleNamespace(properties={"entity": self.documents[doc_id]}))
+
+
+def test_sync_only_fetches_added_documents_until_properties_change():
+    client = FakePropertiesClient(CONTRACTS)
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    with pytest.raises(Exception, match="sync_aryn_docset_properties"):
+        manager.aggregate_properties("ds-1", None, [], [("count", None)])
+
+    assert manager.sync_properties("ds-1")["documents"] == 5
+    assert len(client.fetched) == 5
+
+    client.fetched.clear()
+    del client.documents["doc-1"]
+    client.documents["doc-5"] = {"state": "TX", "value": 10}
+    notify_docset_changed("ds-1")
+    assert manager.filter_properties("ds-1", [filter("state", "=", "TX")], 10)["stale"] is True
+
+    sync_result = manager.sync_properties("ds-1")
+    assert (sync_result["full_refresh"], sync_result["added_documents"], sync_result["removed_documents"]) == (
+        False,
+        1,
+        1,
+    )
+    assert client.fetched == ["doc-5"]
+
+    result = manager.filter_properties("ds-1", [filter("state", "=", "TX")], 10)
+    assert (result["doc_ids"], result["stale"]) == (["doc-5"], False)
+
+    client.fetched.clear()
+    manager.property_store.mark_properties_changed("ds-1")
+    assert manager.sync_properties("ds-1")["full_refresh"] is True
+    assert len(client.fetched) == 5
+    assert manager.property_store._refresh_locks == {}
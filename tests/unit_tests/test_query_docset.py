@@ -0,0 +1,273 @@
+import asyncio
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from aryn_sdk.types.query import QueryEvent, QueryTraceDoc
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.utils.cache import notify_docset_changed
+from aryn_mcp_server.utils.cancellation import CancellationToken, current_phase
+from aryn_mcp_server.utils.progress import ProgressReporter
+
+
+def query_events(doc_ids: list[str], summary_chunks: list[str]) -> list[QueryEvent]:
+    events = [QueryEvent(event_type="status", data="Starting")]
+    events += [
+        QueryEvent(event_type="trace_doc", data=QueryTraceDoc(node_id=1, doc={"doc_id": doc_id})) for doc_id in doc_ids
+    ]
+    events += [QueryEvent(event_type="result_summary", data=chunk) for chunk in summary_chunks]
+    events.append(QueryEvent(event_type="complete", data=f"Query complete with {len(doc_ids)} results"))
+    return events
+
+
+class FakeQueryClient:
+    def __init__(self, events: list[QueryEvent]):
+        self.events = events
+        self.events_sent = 0
+        self.stream_closed = False
+
+    def query(self, query):
+        try:
+            for event in self.events:
+                self.events_sent += 1
+                yield event
+        finally:
+            self.stream_closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.request_context = SimpleNamespace(meta=SimpleNamespace(progressToken="token"))
+        self.notifications = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.notifications.append((progress, message))
+
+
+def make_manager(events: list[QueryEvent]) -> ArynDocSetManager:
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = FakeQueryClient(events)
+    return manager
+
+
+def test_query_joins_summary_chunks_and_forwards_events():
+    manager = make_manager(query_events(["doc-1", "doc-2"], ["The accident ", "happened ", "in Alaska."]))
+    forwarded = []
+
+    result = manager.query(
+        "ds-1", "Where?", True, on_event=lambda event_type, data: forwarded.append((event_type, data))
+    )
+
+    assert result == {"doc_id": "doc-2", "summary": "The accident happened in Alaska."}
+    assert forwarded == [
+        ("trace_doc", "doc-1"),
+        ("trace_doc", "doc-2"),
+        ("result_summary", "The accident "),
+        ("result_summary", "happened "),
+        ("result_summary", "in Alaska."),
+    ]
+
+
+def test_query_without_results():
+    manager = make_manager(query_events([], []))
+
+    assert manager.query("ds-1", "Where?", True) == {"summary": "No results found", "doc_id": "No results found"}
+
+
+def test_query_stops_after_max_docs_and_closes_the_stream():
+    manager = make_manager(query_events(["doc-1", "doc-2", "doc-3"], ["Summary"]))
+
+    result = manager.query("ds-1", "Where?", True, max_docs=1)
+
+    assert result == {"doc_id": "doc-1", "stopped_early": "found 1 documents"}
+    assert manager.client.events_sent == 2
+    assert manager.client.stream_closed
+
+
+def test_query_summary_is_cut_at_max_summary_chars():
+    manager = make_manager(query_events(["doc-1"], ["The accident ", "happened ", "in Alaska."]))
+
+    result = manager.query("ds-1", "Where?", True, max_summary_chars=15)
+
+    assert result["summary"] == "The accident ha"
+    assert result["stopped_early"] == "summary reached 15 characters"
+    assert manager.client.stream_closed
+
+
+def test_cancelled_query_returns_what_it_has():
+    manager = make_manager(query_events(["doc-1", "doc-2"], ["Summary"]))
+    cancellation = CancellationToken()
+    cancellation.cancel("cancelled by the client")
+
+    result = manager.query("ds-1", "Where?", True, cancellation=cancellation)
+
+    assert result == {"stopped_early": "cancelled by the client"}
+    assert manager.client.events_sent == 1
+    assert manager.client.stream_closed
+
+
+def test_reading_the_query_stream_is_named_as_waiting_for_results():
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    phases = []
+
+    def query(query):
+        phases.append(current_phase())
+        yield from query_events(["doc-1"], ["Alaska."])
+
+    manager.client = SimpleNamespace(query=query)
+    manager.query("ds-1", "Where?", True)
+
+    assert phases == ["waiting for query results from docset ds-1"]
+
+
+def test_cancelling_a_query_closes_a_stalled_stream_right_away():
+    server = socket.create_server(("127.0.0.1", 0))
+    closed = threading.Event()
+
+    def stall_after_one_event():
+        connection, _ = server.accept()
+        connection.recv(65536)
+        connection.sendall(
+            b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ncontent-length: 1000\r\n\r\n"
+            b'event: trace_doc\ndata: {"node_id": 1, "doc": {"doc_id": "doc-1"}}\n\n'
+        )
+        # Waits for the client to hang up, which happens long before the stream would time out
+        connection.settimeout(10)
+        while connection.recv(65536):
+            pass
+        closed.set()
+        connection.close()
+
+    threading.Thread(target=stall_after_one_event, daemon=True).start()
+    manager = ArynDocSetManager(aryn_api_key="test-key", aryn_url=f"http://127.0.0.1:{server.getsockname()[1]}")
+    cancellation = CancellationToken(deadline_seconds=30)
+    threading.Timer(0.3, cancellation.cancel, args=("cancelled by the client",)).start()
+
+    start = time.monotonic()
+    result = manager.query("ds-1", "Where?", True, cancellation=cancellation)
+
+    assert time.monotonic() - start < 2
+    assert result == {"doc_id": "doc-1", "stopped_early": "cancelled by the client"}
+    assert closed.wait(2)
+    server.close()
+
+
+def test_repeated_queries_are_served_from_the_query_cache():
+    manager = make_manager(query_events(["doc-1"], ["Alaska."]))
+
+    first = manager.query("ds-1", "Where?", True)
+    manager.client.events = []
+    second = manager.query("ds-1", " Where? ", True)
+
+    assert second.pop("cached_at")
+    assert second == first
+    assert manager.query_cache.stats()["hits"] == 1
+
+
+def test_query_cache_respects_staleness_and_invalidation():
+    manager = make_manager(query_events(["doc-1"], ["Alaska."]))
+    manager.query("ds-1", "Where?", True)
+    manager.query("ds-2", "Where?", True)
+
+    assert manager.query_cache.get("ds-1", "Where?", True, max_staleness_seconds=0) is None
+    notify_docset_changed("ds-1")
+    assert manager.query_cache.get("ds-1", "Where?", True) is None
+    assert manager.query_cache.get("ds-2", "Where?", True) is not None
+
+
+def test_cached_query_results_are_not_shared_between_api_keys():
+    manager = make_manager(query_events(["doc-1"], ["Alaska."]))
+    manager.query("ds-1", "Where?", True)
+
+    other_account = ArynDocSetManager(aryn_api_key="other-key")
+    assert other_account.query_cache.path != manager.query_cache.path
+    assert other_account.query_cache.get("ds-1", "Where?", True) is None
+    assert ArynDocSetManager(aryn_api_key="test-key").query_cache.get("ds-1", "Where?", True) is not None
+
+
+def test_stopped_queries_are_not_cached():
+    manager = make_manager(query_events(["doc-1", "doc-2"], ["Alaska."]))
+
+    manager.query("ds-1", "Where?", True, max_docs=1)
+
+    assert manager.query_cache.stats()["entries"] == 0
+
+
+def test_cancellation_token_deadline():
+    assert not CancellationToken().cancelled
+    cancellation = CancellationToken(deadline_seconds=0)
+    assert cancellation.cancelled
+    assert cancellation.reason == "deadline exceeded"
+    assert cancellation.remaining() == 0
+
+
+@pytest.mark.asyncio
+async def test_progress_is_reported_from_worker_threads():
+    ctx = FakeContext()
+    progress = ProgressReporter(ctx)
+
+    await asyncio.to_thread(lambda: [progress.report(f"chunk {i}") for i in range(3)])
+    await asyncio.sleep(0.01)
+
+    assert ctx.notifications == [(1.0, "chunk 0"), (2.0, "chunk 1"), (3.0, "chunk 2")]
+
+
+class FanOutQueryClient:
+    def __init__(self, events_by_docset: dict[str, list[QueryEvent]], delay_by_docset: dict[str, float]):
+        self.events_by_docset = events_by_docset
+        self.delay_by_docset = delay_by_docset
+
+    def query(self, query):
+        for event in self.events_by_docset[query.docset_id]:
+            time.sleep(self.delay_by_docset.get(query.docset_id, 0))
+            yield event
+
+
+def test_query_docsets_merges_results_and_keeps_what_slow_docsets_found_by_the_deadline():
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = FanOutQueryClient(
+        {
+            "ds-fast": query_events(["doc-1"], ["Fast."]),
+            "ds-slow": query_events(["doc-2", "doc-3"], ["Slow."]),
+        },
+        {"ds-slow": 0.2},
+    )
+    forwarded = []
+
+    start = time.monotonic()
+    result = manager.query_docsets(
+        ["ds-fast", "ds-slow"],
+        "Where?",
+        True,
+        cancellation=CancellationToken(deadline_seconds=0.5),
+        on_event=lambda docset_id, event_type, data: forwarded.append((docset_id, event_type)),
+    )
+
+    assert time.monotonic() - start < 0.8
+    assert result["results"] == {
+        "ds-fast": {"doc_id": "doc-1", "summary": "Fast."},
+        "ds-slow": {"doc_id": "doc-3", "stopped_early": "deadline exceeded"},
+    }
+    assert (result["partial_docset_ids"], result["timed_out_docset_ids"]) == (["ds-slow"], [])
+    assert result["doc_ids"] == [
+        {"docset_id": "ds-fast", "doc_id": "doc-1"},
+        {"docset_id": "ds-slow", "doc_id": "doc-2"},
+        {"docset_id": "ds-slow", "doc_id": "doc-3"},
+    ]
+    assert ("ds-slow", "trace_doc") in forwarded
+
+
+def test_query_docsets_leaves_the_token_alone_once_every_query_finished():
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = FanOutQueryClient(
+        {"ds-1": query_events(["doc-1"], ["One."]), "ds-2": query_events(["doc-2"], ["Two."])}, {}
+    )
+    cancellation = CancellationToken(deadline_seconds=5.0)
+
+    result = manager.query_docsets(["ds-1", "ds-2"], "Where?", True, cancellation=cancellation)
+
+    assert set(result["results"]) == {"ds-1", "ds-2"}
+    assert not cancellation.cancelled
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from aryn_mcp_server.utils.rate_limit import GovernedTransport, RequestGovernor, TokenBucket, classify_request
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_requests_are_classified_by_endpoint():
+    assert classify_request("POST", "/v1/query/search/ds-1") == "search"
+    assert classify_request("POST", "/v1/query") == "query"
+    assert classify_request("POST", "/v1/storage/docsets/ds-1/docs") == "add_doc"
+    assert classify_request("GET", "/v1/storage/docsets/ds-1/docs/doc-1/binary") == "get_doc"
+    assert classify_request("GET", "/v1/storage/docsets/ds-1/docs") is None
+
+
+def test_bucket_allows_bursts_then_spaces_requests_out():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+
+    assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+    for _ in range(10):
+        bucket.acquire()
+    assert abs(clock.now - 1.0) < 1e-9
+
+
+def test_bucket_backs_off_on_throttling_and_recovers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=1, clock=clock, sleep=clock.sleep)
+
+    bucket.record_throttled(retry_after=3)
+    assert bucket.rate == 5
+    bucket.acquire()
+    assert clock.now >= 3
+
+    for _ in range(20):
+        bucket.record_success()
+    assert bucket.rate == 10
+
+
+def test_governor_caps_concurrent_requests_per_endpoint_and_honours_retry_after():
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        if request.url.path.endswith("doc-throttled"):
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+        return httpx.Response(200, json={})
+
+    governor = RequestGovernor(TokenBucket(rate=1000, burst=1000), {"get_doc": 2})
+    client = httpx.Client(
+        base_url="https://api.aryn.ai", transport=GovernedTransport(governor, httpx.MockTransport(handler))
+    )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: client.get(f"/v1/storage/docsets/ds-1/docs/doc-{i}"), range(16)))
+    assert max_in_flight == 2
+    assert governor.stats()["in_flight"] == {"get_doc": 0}
+
+    assert client.get("/v1/storage/docsets/ds-1/docs/doc-throttled").status_code == 429
+    assert governor.bucket.rate == 500
+    start = time.monotonic()
+    client.get("/v1/storage/docsets/ds-1/docs/doc-1")
+    assert time.monotonic() - start >= 0.04
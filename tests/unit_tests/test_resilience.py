@@ -0,0 +1,136 @@
+import httpx
+import pytest
+
+from aryn_sdk.client.partition import PartitionError
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    RetryBudget,
+    use_resilient_transport,
+)
+
+DOCSET = {
+    "account_id": "a",
+    "docset_id": "ds-1",
+    "name": "contracts",
+    "created_at": "2025-01-01T00:00:00Z",
+    "readonly": False,
+}
+
+
+class FakeArynAPI:
+    """Answers DocSet requests, failing the first ones with the queued status codes"""
+
+    def __init__(self, failures: list[int | type[httpx.TransportError]]):
+        self.failures = list(failures)
+        self.requests: list[tuple[str, str]] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        if self.failures:
+            failure = self.failures.pop(0)
+            if not isinstance(failure, int):
+                raise failure("injected failure", request=request)
+            return httpx.Response(failure, headers={"Retry-After": "0"}, json={"detail": "injected failure"})
+        return httpx.Response(200, json=DOCSET)
+
+
+def make_resilience(max_attempts: int = 4, failure_threshold: int = 10, ratio: float = 10.0) -> Resilience:
+    return Resilience(
+        name="Fake API",
+        max_attempts=max_attempts,
+        budget=RetryBudget(ratio=ratio, min_retries_per_second=0.0),
+        breaker=CircuitBreaker("Fake API", failure_threshold=failure_threshold, reset_seconds=60.0),
+        sleep=lambda _: None,
+    )
+
+
+def make_manager(api: FakeArynAPI, resilience: Resilience) -> ArynDocSetManager:
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    use_resilient_transport(manager.client, resilience, httpx.MockTransport(api))
+    return manager
+
+
+def test_transient_failures_are_retried():
+    api = FakeArynAPI([503, httpx.ConnectError, 429])
+    resilience = make_resilience()
+
+    assert make_manager(api, resilience).get_docset("ds-1")["name"] == "contracts"
+    assert len(api.requests) == 4
+    assert resilience.stats()["retries"] == 3
+
+
+def test_non_idempotent_requests_are_only_retried_when_not_processed():
+    api = FakeArynAPI([429, 502])
+    manager = make_manager(api, make_resilience())
+
+    with pytest.raises(Exception, match="status_code: 502"):
+        manager.create_docset("contracts", None)
+    assert api.requests == [("POST", "/v1/storage/docsets")] * 2
+
+
+def test_client_errors_and_exhausted_retries_surface_the_last_response():
+    api = FakeArynAPI([404])
+    manager = make_manager(api, make_resilience())
+    assert manager.get_docset("ds-1") is None
+    assert len(api.requests) == 1
+
+    api = FakeArynAPI([500] * 5)
+    with pytest.raises(Exception, match="status_code: 500"):
+        make_manager(api, make_resilience(max_attempts=3)).get_docset("ds-1")
+    assert len(api.requests) == 3
+
+
+def test_retry_budget_limits_retries_during_an_outage():
+    api = FakeArynAPI([500] * 100)
+    resilience = make_resilience(max_attempts=4, ratio=0.5)
+    manager = make_manager(api, resilience)
+
+    for docset_id in range(10):
+        with pytest.raises(Exception):
+            manager.get_docset(f"ds-{docset_id}")
+    assert resilience.stats()["retries"] <= 5
+    assert resilience.stats()["retries_denied"] > 0
+
+
+def test_circuit_opens_after_sustained_failures_and_recovers():
+    api = FakeArynAPI([500] * 4)
+    resilience = make_resilience(max_attempts=2, failure_threshold=4)
+    manager = make_manager(api, resilience)
+
+    for docset_id in range(2):
+        with pytest.raises(Exception, match="status_code: 500"):
+            manager.get_docset(f"ds-{docset_id}")
+    with pytest.raises(Exception, match="Fake API is unavailable after 4 consecutive failures"):
+        manager.get_docset("ds-2")
+    assert len(api.requests) == 4
+
+    resilience.breaker.opened_at -= 60
+    assert manager.get_docset("ds-3")["name"] == "contracts"
+    assert resilience.breaker.state == "closed"
+
+
+def test_partitions_that_add_to_a_docset_are_not_retried_after_server_errors():
+    calls = []
+
+    def partition():
+        calls.append(1)
+        raise PartitionError("Error partway through processing", 500)
+
+    resilience = make_resilience()
+    with pytest.raises(PartitionError):
+        resilience.call(partition, idempotent=False)
+    assert len(calls) == 1
+
+    with pytest.raises(PartitionError):
+        resilience.call(partition)
+    assert len(calls) == 5
+
+    resilience.breaker.failure_threshold = 1
+    resilience.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        resilience.call(partition)
+    assert len(calls) == 5
@@ -0,0 +1,106 @@
+import gc
+import time
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.cache import TTLCache, _docset_change_listeners, notify_docset_changed, on_docset_changed
+
+
+class CountingSearchClient:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, docset_id, query, page_size):
+        self.calls += 1
+        return SimpleNamespace(value=SimpleNamespace(results=[{"doc_id": f"doc-{self.calls}"}], next_page_token=None))
+
+    def delete_doc(self, docset_id, doc_id):
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                account_id="acct", doc_id=doc_id, name="doc", size=1, content_type="application/pdf", properties={}
+            )
+        )
+
+
+def search(manager, docset_id="ds-1", query="accident"):
+    return manager.search(
+        docset_id=docset_id,
+        query_or_properties_filter="query",
+        query=query,
+        query_type="lexical",
+        properties_filter=None,
+        page_size=10,
+        return_type="doc",
+        page_token=None,
+    )
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl_seconds=0.05)
+    cache.put("key", "value")
+
+    assert cache.get("key") == "value"
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_identical_searches_are_served_from_cache():
+    client = CountingSearchClient()
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+
+    first = search(manager, query="accident")
+    second = search(manager, query="  accident ")
+
+    assert first == second
+    assert client.calls == 1
+    assert manager.search_cache.stats()["hits"] == 1
+
+
+def test_document_changes_invalidate_cached_searches():
+    client = CountingSearchClient()
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+    document_manager = ArynDocumentManager(aryn_api_key="test-key")
+    document_manager.client = client
+
+    search(manager, docset_id="ds-1")
+    search(manager, docset_id="ds-2")
+    document_manager.delete_document(docset_id="ds-1", doc_id="doc-1")
+    search(manager, docset_id="ds-1")
+    search(manager, docset_id="ds-2")
+
+    assert client.calls == 3
+
+
+def test_change_listeners_do_not_keep_managers_alive():
+    gc.collect()
+    listeners = len(_docset_change_listeners)
+
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    assert len(_docset_change_listeners) > listeners
+    del manager
+    gc.collect()
+    assert len(_docset_change_listeners) == listeners
+
+    changed: list[str] = []
+    stop_listening = on_docset_changed(changed.append)
+    notify_docset_changed("ds-1")
+    stop_listening()
+    notify_docset_changed("ds-2")
+    assert changed == ["ds-1"]
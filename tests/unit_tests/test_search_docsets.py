@@ -0,0 +1,105 @@
+import time
+from types import SimpleNamespace
+
+from aryn_mcp_server.aryn_docset_manager import ArynDocSetManager
+
+
+class FakeSearchClient:
+    def __init__(self, results: dict[str, list[dict]], delays: dict[str, float] | None = None):
+        self.results = results
+        self.delays = delays or {}
+
+    def search(self, docset_id, query, page_size):
+        time.sleep(self.delays.get(docset_id, 0))
+        if docset_id not in self.results:
+            raise Exception("ArynSDKException: status_code: 500")
+        return SimpleNamespace(value=SimpleNamespace(results=self.results[docset_id], next_page_token=None))
+
+
+def make_manager(client) -> ArynDocSetManager:
+    manager = ArynDocSetManager(aryn_api_key="test-key")
+    manager.client = client
+    return manager
+
+
+def search_docsets(manager, docset_ids, timeout_seconds=5.0):
+    return manager.search_docsets(
+        docset_ids=docset_ids,
+        query_or_properties_filter="query",
+        query="accident",
+        query_type="lexical",
+        properties_filter=None,
+        page_size=10,
+        return_type="doc",
+        timeout_seconds=timeout_seconds,
+    )
+
+
+def test_results_are_interleaved_by_rank_and_deduplicated():
+    manager = make_manager(
+        FakeSearchClient(
+            {
+                "ds-2023": [{"doc_id": "a"}, {"doc_id": "b"}],
+                "ds-2024": [{"doc_id": "c"}, {"doc_id": "a"}],
+            }
+        )
+    )
+
+    result = search_docsets(manager, ["ds-2023", "ds-2024", "ds-2023"])
+
+    assert [(r["docset_id"], r["doc_id"]) for r in result["results"]] == [
+        ("ds-2023", "a"),
+        ("ds-2024", "c"),
+        ("ds-2023", "b"),
+    ]
+    assert result["timed_out_docset_ids"] == []
+
+
+def test_results_are_ranked_by_score_when_available():
+    manager = make_manager(
+        FakeSearchClient(
+            {
+                "ds-1": [{"doc_id": "a", "score": 0.2}],
+                "ds-2": [{"doc_id": "b", "score": 0.9}, {"doc_id": "c", "score": 0.2}],
+            }
+        )
+    )
+
+    result = search_docsets(manager, ["ds-1", "ds-2"])
+
+    assert [r["doc_id"] for r in result["results"]] == ["b", "a", "c"]
+
+
+def test_results_are_deduplicated_by_document_and_element_whatever_their_score():
+    manager = make_manager(
+        FakeSearchClient(
+            {
+                "ds-1": [
+                    {"doc_id": "a", "element_id": "e-1", "score": 0.9},
+                    {"doc_id": "a", "element_id": "e-2", "score": 0.5},
+                ],
+                "ds-2": [{"doc_id": "a", "element_id": "e-1", "score": 0.7}],
+            }
+        )
+    )
+
+    result = search_docsets(manager, ["ds-1", "ds-2"])
+
+    assert [(r["docset_id"], r["element_id"], r["score"]) for r in result["results"]] == [
+        ("ds-1", "e-1", 0.9),
+        ("ds-1", "e-2", 0.5),
+    ]
+
+
+def test_slow_and_failing_docsets_return_partial_results():
+    manager = make_manager(
+        FakeSearchClient({"ds-fast": [{"doc_id": "a"}], "ds-slow": [{"doc_id": "b"}]}, delays={"ds-slow": 2.0})
+    )
+
+    start = time.monotonic()
+    result = search_docsets(manager, ["ds-fast", "ds-slow", "ds-broken"], timeout_seconds=0.5)
+
+    assert time.monotonic() - start < 1.5
+    assert [r["doc_id"] for r in result["results"]] == ["a"]
+    assert result["timed_out_docset_ids"] == ["ds-slow"]
+    assert list(result["errors"]) == ["ds-broken"]
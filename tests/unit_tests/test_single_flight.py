@@ -0,0 +1,122 @@
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.cancellation import CancellationToken, DeadlineExceeded, check_cancellation, use_cancellation
+from aryn_mcp_server.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {"value": 42}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(single_flight.do, ("get_doc", "ds-1", "doc-1"), slow_call)
+        started.wait()
+        followers = [executor.submit(single_flight.do, ("get_doc", "ds-1", "doc-1"), slow_call) for _ in range(7)]
+        results = [leader.result()] + [follower.result() for follower in followers]
+
+    assert len(calls) == 1
+    assert results[0] == ({"value": 42}, False)
+    assert all(result == ({"value": 42}, True) for result in results[1:])
+    assert single_flight.stats() == {"calls": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_errors_are_shared_and_changed_docsets_start_new_calls():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def failing_call():
+        release.wait()
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(single_flight.do, ("get_doc", "ds-1", "doc-1"), failing_call)
+        while single_flight.stats()["in_flight"] == 0:
+            time.sleep(0.001)
+        follower = executor.submit(single_flight.do, ("get_doc", "ds-1", "doc-1"), failing_call)
+        time.sleep(0.01)
+
+        single_flight.forget_docset("ds-1")
+        assert single_flight.do(("get_doc", "ds-1", "doc-1"), lambda: "after change") == ("after change", False)
+
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+def test_callers_outlive_a_leader_that_ran_out_of_time():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def slow_call():
+        started.set()
+        for _ in range(10):
+            time.sleep(0.05)
+            check_cancellation()
+        return "done"
+
+    def call(deadline_seconds: float, tool: str):
+        with use_cancellation(CancellationToken(deadline_seconds, tool=tool)):
+            return single_flight.do(("partition", None, "report.pdf"), slow_call)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(call, 0.2, "leader_tool")
+        started.wait()
+        follower = executor.submit(call, 60, "follower_tool")
+
+        with pytest.raises(DeadlineExceeded, match="leader_tool ran out of time"):
+            leader.result()
+        assert follower.result() == ("done", False)
+    assert single_flight.stats() == {"calls": 2, "coalesced": 1, "in_flight": 0}
+
+
+class SlowDocumentClient:
+    def __init__(self):
+        self.get_doc_calls = 0
+        self.binary_calls = 0
+
+    def get_doc(self, docset_id, doc_id, include_elements, include_binary=False):
+        self.get_doc_calls += 1
+        time.sleep(0.05)
+        return SimpleNamespace(
+            value=SimpleNamespace(id=doc_id, elements=[], properties={"_original_elements": []}, binary_data=None)
+        )
+
+    def get_doc_binary(self, docset_id, doc_id, file):
+        self.binary_calls += 1
+        time.sleep(0.05)
+        with open(file, "wb") as f:
+            f.write(b"%PDF-1.7")
+
+
+def test_concurrent_document_reads_share_one_download(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "shared"))
+    (tmp_path / "shared").mkdir()
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    client = manager.client = SlowDocumentClient()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        documents = list(executor.map(lambda _: manager.get_document("ds-1", "doc-1", True, False), range(4)))
+        paths = list(
+            executor.map(lambda i: manager.get_document_binary("ds-1", "doc-1", tmp_path / f"copy-{i}.pdf"), range(4))
+        )
+
+    assert client.get_doc_calls == 1
+    assert all(document["doc_id"] == "doc-1" for document in documents)
+    assert client.binary_calls == 1
+    assert all(path.read_bytes() == b"%PDF-1.7" for path in paths)
+    assert not any((tmp_path / "shared").iterdir())
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from aryn_mcp_server.aryn_document_manager import ArynDocumentManager
+from aryn_mcp_server.utils.text_index import ElementTextIndex
+
+
+@pytest.fixture
+def index(tmp_path) -> ElementTextIndex:
+    index = ElementTextIndex(tmp_path / "index.sqlite3")
+    index.add_document(
+        "ds-1",
+        "doc-1",
+        [
+            ("e-1", "Text", "The aircraft landed on runway 27 in gusty crosswind conditions."),
+            ("e-2", "Text", "No injuries were reported."),
+            ("e-3", "Picture", None),
+        ],
+    )
+    index.add_document("ds-1", "doc-2", [("e-1", "Text", "Crosswind exceeded the aircraft's demonstrated limits.")])
+    index.add_document("ds-2", "doc-3", [("e-1", "Text", "Crosswind landing practice.")])
+    return index
+
+
+def test_lexical_search_matches_whole_words_ranked_by_bm25(index):
+    results = index.search("ds-1", "crosswind aircraft", "lexical", "element", 10)
+    assert [(r["doc_id"], r["element_id"]) for r in results] == [("doc-2", "e-1"), ("doc-1", "e-1")]
+    assert results[0]["score"] >= results[1]["score"]
+
+    assert index.search("ds-1", "cross", "lexical", "doc", 10) == []
+
+
+def test_keyword_search_matches_substrings(index):
+    assert [r["doc_id"] for r in index.search("ds-1", "runway 2", "keyword", "doc", 10)] == ["doc-1"]
+    assert {r["doc_id"] for r in index.search("ds-1", "injur", "keyword", "doc", 10)} == {"doc-1"}
+    # Too short for trigrams, so elements are scanned instead
+    assert [r["doc_id"] for r in index.search("ds-1", "27", "keyword", "doc", 10)] == ["doc-1"]
+
+
+def test_documents_are_replaced_and_removed(index):
+    index.add_document("ds-1", "doc-1", [("e-9", "Text", "Replaced text about a helicopter.")])
+    assert index.search("ds-1", "runway", "lexical", "doc", 10) == []
+    assert [r["doc_id"] for r in index.search("ds-1", "helicopter", "lexical", "doc", 10)] == ["doc-1"]
+
+    index.remove_document("ds-1", "doc-1")
+    assert index.search("ds-1", "helicopter", "lexical", "doc", 10) == []
+
+    index.remove_docset("ds-1")
+    assert index.indexed_documents("ds-1") == 0
+    assert index.indexed_documents("ds-2") == 1
+
+
+class FakeDocumentClient:
+    def get_doc(self, docset_id, doc_id, include_elements, include_binary=False):
+        element = SimpleNamespace(
+            id="e-1", type="Text", text_representation="Engine failure after takeoff", properties={}, bbox=(0, 0, 1, 1)
+        )
+        return SimpleNamespace(
+            value=SimpleNamespace(
+                id=doc_id, elements=[element], properties={"_original_elements": []}, binary_data=None
+            )
+        )
+
+    def delete_doc(self, docset_id, doc_id):
+        return SimpleNamespace(
+            value=SimpleNamespace(account_id="a", doc_id=doc_id, name="doc", size=1, content_type="pdf", properties={})
+        )
+
+
+def test_fetched_documents_are_indexed_when_enabled(monkeypatch):
+    monkeypatch.setenv("ARYN_MCP_LOCAL_INDEX", "true")
+    manager = ArynDocumentManager(aryn_api_key="test-key")
+    manager.client = FakeDocumentClient()
+
+    assert manager.search_local("ds-1", "engine", "lexical", "doc", 10) is None
+    manager.get_document("ds-1", "doc-1", include_elements=True, include_binary=False)
+    assert manager.search_local("ds-1", "engine", "lexical", "doc", 10)["results"][0]["doc_id"] == "doc-1"
+
+    manager.delete_document("ds-1", "doc-1")
+    assert manager.search_local("ds-1", "engine", "lexical", "doc", 10) is None
+
+
+def test_local_index_is_disabled_by_default():
+    assert ArynDocumentManager(aryn_api_key="test-key").text_index is None
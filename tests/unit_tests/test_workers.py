@@ -0,0 +1,45 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from aryn_mcp_server.utils.utils import save_file
+from aryn_mcp_server.utils.workers import ArynFastMCP, run_in_process, use_worker_pool
+
+
+@pytest.mark.asyncio
+async def test_blocking_tools_run_concurrently_in_the_worker_pool():
+    server = ArynFastMCP(name="test")
+    threads = []
+
+    @server.tool()
+    def slow_tool() -> str:
+        threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return "done"
+
+    assert slow_tool() == "done"
+
+    async with use_worker_pool(server):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(server.call_tool("slow_tool", {}) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+
+    assert all("done" in str(result) for result in results)
+    assert elapsed < 0.6
+    assert all(thread.startswith("tool-worker") for thread in threads[1:])
+
+
+def test_cpu_bound_work_runs_in_worker_processes(monkeypatch, tmp_path):
+    monkeypatch.setenv("ARYN_MCP_OUTPUT_DIR", str(tmp_path))
+    elements = [{"type": "Text", "text_representation": "x" * 1000}] * 100
+    assert run_in_process(save_file, elements, "doc-1", "json") == tmp_path / "doc-1.json"
+
+    monkeypatch.setenv("ARYN_MCP_CPU_WORKERS", "1")
+    assert run_in_process(os.getpid) != os.getpid()
+    path = run_in_process(save_file, elements, "doc-1", "json")
+    assert path == tmp_path / "doc-1_1.json"
+    assert json.loads(path.read_text()) == elements